@@ -1,32 +1,32 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.modules.user.cache import (
+    cache_claims,
+    cache_user,
+    get_cached_claims,
+    get_cached_user,
+    user_from_snapshot,
+)
 from app.modules.user.model import User
+from app.modules.user.service import USER_BY_ID
 from app.shared.config import settings
 from app.shared.db import get_session
+from app.shared.replica import pin_to_primary, set_request_user
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    session: AsyncSession = Depends(get_session),
-) -> User:
-    if credentials is None or credentials.scheme.lower() != "bearer":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+def _decode_token(token: str) -> dict:
+    claims = get_cached_claims(token)
+    if claims is not None:
+        return claims
 
-    token = credentials.credentials
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        user_id = payload.get("sub")
-        if user_id is None:
+        claims = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        if claims.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
@@ -39,11 +39,41 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = await session.scalar(select(User).where(User.id == user_id))
+    cache_claims(token, claims)
+    return claims
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    session: AsyncSession = Depends(get_session),
+) -> User:
+    if credentials is None or credentials.scheme.lower() != "bearer":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    claims = _decode_token(credentials.credentials)
+    user_id = claims["sub"]
+    set_request_user(user_id)
+
+    if settings.auth_trust_token_claims and "name" in claims and "email" in claims:
+        return user_from_snapshot({"id": user_id, "name": claims["name"], "email": claims["email"]})
+
+    user = get_cached_user(session.bind, user_id)
+    if user is not None:
+        return user
+
+    user = await session.scalar(USER_BY_ID, {"user_id": user_id})
+    if not user and pin_to_primary(session):
+        # the replica may not have the row of a user who registered moments ago
+        user = await session.scalar(USER_BY_ID, {"user_id": user_id})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    cache_user(session.bind, user)
     return user
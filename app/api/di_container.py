@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.modules.user.client import UserClientInterface, UserClient
 from app.modules.product.client import ProductClientInterface, ProductClient
 from app.modules.order.client import OrderClientInterface, OrderClient
+from app.modules.idempotency.client import IdempotencyClientInterface, IdempotencyClient
 
 
 def make_user_client(db_session: AsyncSession) -> UserClientInterface:
@@ -15,3 +16,7 @@ def make_product_client(db_session: AsyncSession) -> ProductClientInterface:
 
 def make_order_client(db_session: AsyncSession) -> OrderClientInterface:
     return OrderClient(db_session=db_session)
+
+
+def make_idempotency_client(db_session: AsyncSession) -> IdempotencyClientInterface:
+    return IdempotencyClient(db_session=db_session)
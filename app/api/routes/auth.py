@@ -5,21 +5,26 @@ from app.api.deps import get_current_user
 from app.api.di_container import make_user_client
 from app.modules.user.model import User
 from app.modules.user.schemas import RegisterIn, LoginIn, UserPublic, LoginOut
-from app.shared.db import get_session
+from app.shared.db import get_primary_session
+from app.shared.replica import remember_writer
+from app.shared.responses import FastJSONRoute
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=FastJSONRoute)
 
 
 @router.post("/register", response_model=UserPublic, status_code=201)
-async def register(body: RegisterIn, session: AsyncSession = Depends(get_session)):
+async def register(body: RegisterIn, session: AsyncSession = Depends(get_primary_session)):
     client = make_user_client(session)
-    return await client.create_user(name=body.name, email=body.email, password=body.password)
+    user = await client.create_user(name=body.name, email=body.email, password=body.password)
+    # the new user's first requests must not miss their own row on a lagging replica
+    remember_writer(user.id)
+    return user
 
 
 @router.post("/login", response_model=LoginOut)
 async def login(
     body: LoginIn,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_primary_session),
 ):
     client = make_user_client(session)
     return await client.generate_access_token(email=body.email, password=body.password)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.api.warmup import is_ready, readiness
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: warm-up has finished and the worker is not shutting down."""
+    return JSONResponse(readiness(), status_code=200 if is_ready() else 503)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+
+from app.shared.cache import cache_snapshot
+from app.shared.pool import pool_snapshot
+
+# operational endpoints, only mounted with settings.internal_routes_enabled
+router = APIRouter(prefix="/internal", tags=["internal"], include_in_schema=False)
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    return pool_snapshot()
+
+
+@router.get("/caches")
+async def get_cache_stats():
+    return cache_snapshot()
@@ -1,13 +1,18 @@
 from __future__ import annotations
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.di_container import make_order_client
+from app.api.di_container import make_idempotency_client, make_order_client
 from app.shared.db import get_session, get_transaction_session
+from app.shared.responses import FastJSONRoute
 from app.api.deps import get_current_user
+from app.shared.conditional import conditional_response, make_etag
+from app.shared.export import ExportFormat, export_response
 from app.modules.order.schemas import (
+    OrderBatchIn,
+    OrderBatchOut,
     OrderCreateIn,
     OrderOut,
     OrderPage,
@@ -15,49 +20,122 @@ from app.modules.order.schemas import (
 )
 
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"], route_class=FastJSONRoute)
+
+IdempotencyKey = Annotated[
+    str | None,
+    Header(
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Retries with the same key replay the first response instead of re-running",
+    ),
+]
 
 
 @router.get("", response_model=OrderPage)
 async def list_my_orders(
     page: Annotated[int, Query(ge=1)] = 1,
     page_size: Annotated[int, Query(ge=1, le=200)] = 20,
+    cursor: Annotated[
+        str | None,
+        Query(description="Opaque meta.next_cursor from a previous page (keyset mode)"),
+    ] = None,
+    session: AsyncSession = Depends(get_session),
+    user=Depends(get_current_user),
+):
+    client = make_order_client(session)
+    return await client.list_orders(
+        user_id=user.id, page=page, page_size=page_size, cursor=cursor
+    )
+
+
+# declared before /{order_id} so "export" is not parsed as an id
+@router.get("/export")
+async def export_my_orders(
+    format: Annotated[ExportFormat, Query(description="ndjson or csv")] = "ndjson",
     session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
     client = make_order_client(session)
-    return await client.list_orders(user_id=user.id, page=page, page_size=page_size)
+    return export_response(client.export_orders(user.id, format), format, "orders")
 
 
 @router.get("/{order_id}", response_model=OrderOut)
 async def get_my_order(
     order_id: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
     client = make_order_client(session)
+    updated_at = await client.order_version(user_id=user.id, order_id=order_id)
+    if updated_at is None:
+        # missing or someone else's
+        raise HTTPException(status_code=404, detail="Order not found")
+    not_modified = conditional_response(
+        request,
+        response,
+        make_etag("order", order_id, updated_at.isoformat()),
+        updated_at,
+        cache_control="private, no-cache",
+    )
+    if not_modified is not None:
+        return not_modified
     return await client.get_order(user_id=user.id, order_id=order_id)
 
 
 @router.post("", response_model=OrderOut, status_code=201)
 async def create_order(
     payload: OrderCreateIn,
+    idempotency_key: IdempotencyKey = None,
     session: AsyncSession = Depends(get_transaction_session),
     user=Depends(get_current_user),
 ):
     client = make_order_client(session)
     items = [(item.product_id, item.quantity) for item in payload.items]
-    return await client.create_order(user_id=user.id, items=items, decrement_stock=True)
+    return await make_idempotency_client(session).run(
+        user_id=user.id,
+        scope="POST /orders",
+        key=idempotency_key,
+        request=payload,
+        handler=lambda: client.create_order(user_id=user.id, items=items, decrement_stock=True),
+        status_code=201,
+    )
+
+
+@router.post("/batch", response_model=OrderBatchOut, status_code=201)
+async def create_orders(
+    payload: OrderBatchIn,
+    response: Response,
+    session: AsyncSession = Depends(get_transaction_session),
+    user=Depends(get_current_user),
+):
+    client = make_order_client(session)
+    orders = [
+        [(item.product_id, item.quantity) for item in order.items] for order in payload.orders
+    ]
+    result = await client.create_orders(user_id=user.id, orders=orders, atomic=payload.atomic)
+    if not result.created:
+        response.status_code = 409
+    return result
 
 
 @router.patch("/{order_id}/status", response_model=OrderOut)
 async def set_order_status(
     order_id: int,
     payload: OrderStatusUpdate,
+    idempotency_key: IdempotencyKey = None,
     session: AsyncSession = Depends(get_transaction_session),
     user=Depends(get_current_user),
 ):
     client = make_order_client(session)
-    return await client.update_order_status(
-        user_id=user.id, order_id=order_id, status=payload.status
+    return await make_idempotency_client(session).run(
+        user_id=user.id,
+        scope=f"PATCH /orders/{order_id}/status",
+        key=idempotency_key,
+        request=payload,
+        handler=lambda: client.update_order_status(
+            user_id=user.id, order_id=order_id, status=payload.status
+        ),
     )
@@ -1,31 +1,70 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.di_container import make_product_client
+from app.shared.conditional import conditional_response, make_etag, validator_headers
 from app.shared.db import get_session
+from app.shared.export import ExportFormat, export_response
+from app.shared.responses import FastJSONRoute
 from app.modules.product.schemas import ProductPage
 from app.modules.product.service import SortField, SortOrder
 
-router = APIRouter(tags=["products"])
+router = APIRouter(tags=["products"], route_class=FastJSONRoute)
 
 
 @router.get("/products", response_model=ProductPage)
 async def get_products(
+    request: Request,
+    response: Response,
     page: Annotated[int, Query(ge=1, description="Page number (1-based)")] = 1,
     page_size: Annotated[int, Query(ge=1, le=200, description="Items per page")] = 20,
-    q: Annotated[str | None, Query(description="Search by name (case-insensitive)")] = None,
-    sort: Annotated[SortField, Query(description="Sort field")] = "name",  # Literal["name","price"]
+    q: Annotated[
+        str | None, Query(description="Search name and description (case-insensitive)")
+    ] = None,
+    sort: Annotated[
+        SortField, Query(description="Sort field; relevance requires q and ignores order")
+    ] = "name",  # Literal["name","price","relevance"]
     order: Annotated[
         SortOrder, Query(description="Sort direction")
     ] = "asc",  # Literal["asc","desc"]
+    cursor: Annotated[
+        str | None,
+        Query(description="Opaque meta.next_cursor from a previous page (keyset mode)"),
+    ] = None,
     session: AsyncSession = Depends(get_session),
 ):
     client = make_product_client(session)
-    return await client.list_products(
+    query = sorted(request.query_params.multi_items())
+
+    # only a conditional request pays for the current validator before the page query
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        version = await client.listing_validator()
+        etag = make_etag("products", *version, query)
+        not_modified = conditional_response(request, response, etag, version.updated_at)
+        if not_modified is not None:
+            return not_modified
+
+    listing, version = await client.list_products_with_version(
         page=page,
         page_size=page_size,
         q=q,
         sort=sort,
         order=order,
+        cursor=cursor,
     )
+    if version is not None:
+        # the validator cached with the page: a cached page may predate the current one
+        response.headers.update(
+            validator_headers(make_etag("products", *version, query), version.updated_at)
+        )
+    return listing
+
+
+@router.get("/products/export")
+async def export_products(
+    format: Annotated[ExportFormat, Query(description="ndjson or csv")] = "ndjson",
+    session: AsyncSession = Depends(get_session),
+):
+    client = make_product_client(session)
+    return export_response(client.export_products(format), format, "products")
@@ -0,0 +1,194 @@
+"""
+Startup warm-up and readiness.
+
+After a deploy the first requests of every worker used to open their pool connections,
+compile each statement and build the response models on the way. The lifespan now starts
+`warm_up()` in the background:
+
+1. open `settings.warmup_connections` connections on every registered engine at once and
+   return them to the pool
+2. run each hot read in `HOT_QUERIES` once, through the same clients the routes use, which
+   fills SQLAlchemy's compiled cache and asyncpg's prepared statements
+3. serve the anonymous `HOT_PATHS` once in-process, which builds the request validators
+   and response serializers FastAPI creates on first use
+
+`/health` answers as soon as the process serves requests; `/ready` answers 503 until the
+warm-up has finished (failed steps are logged and reported, they do not block readiness)
+and again once shutdown begins, so the load balancer drains the worker first.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import Message
+
+from app.api.di_container import make_order_client, make_product_client, make_user_client
+from app.shared.config import settings
+from app.shared.pool import pool_engines
+
+logger = logging.getLogger(__name__)
+
+# ids that match nothing: the statements are what gets warmed, not the rows
+_NO_USER = "00000000-0000-0000-0000-000000000000"
+
+
+async def _products(session: AsyncSession) -> None:
+    client = make_product_client(session)
+    await client.listing_validator()
+    await client.list_products()
+    await client.list_products(sort="price", order="desc")
+    await client.list_products(q="warmup")
+
+
+async def _orders(session: AsyncSession) -> None:
+    client = make_order_client(session)
+    await client.order_version(0, _NO_USER)
+    await client.list_orders(_NO_USER, page=1, page_size=20)
+
+
+async def _users(session: AsyncSession) -> None:
+    with contextlib.suppress(HTTPException):
+        await make_user_client(session).get_user(_NO_USER)
+
+
+HOT_QUERIES: dict[str, Callable[[AsyncSession], Awaitable[None]]] = {
+    "products": _products,
+    "orders": _orders,
+    "users": _users,
+}
+
+# anonymous GETs served in-process (they show up in the request metrics like any other)
+HOT_PATHS = ("/products", "/products?sort=price&order=desc", "/products?q=warmup")
+
+
+async def warm_routes(app: FastAPI) -> None:
+    """Serve each hot path once in-process: routing, validation and response encoding."""
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start" and message["status"] >= 500:
+            raise RuntimeError(f"{path} answered {message['status']}")
+
+    for path_and_query in HOT_PATHS:
+        path, _, query = path_and_query.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query.encode(),
+            "headers": [],
+            "client": ("warmup", 0),
+            "server": ("warmup", 80),
+        }
+        await app(scope, receive, send)
+
+
+_started = time.monotonic()
+_ready = False
+_shutting_down = False
+_report: dict[str, Any] = {}
+_task: asyncio.Task | None = None
+
+
+def is_ready() -> bool:
+    return _ready and not _shutting_down
+
+
+def readiness() -> dict[str, Any]:
+    status = "ready" if is_ready() else "stopping" if _shutting_down else "warming"
+    return {"status": status, **_report}
+
+
+async def warm_pools(connections: int) -> int:
+    """Open `connections` connections per engine concurrently; returns how many opened."""
+    opened = 0
+    for engine in pool_engines().values():
+        async with contextlib.AsyncExitStack() as stack:
+            conns = await asyncio.gather(
+                *(stack.enter_async_context(engine.connect()) for _ in range(connections))
+            )
+            for conn in conns:
+                await conn.execute(text("SELECT 1"))
+            opened += len(conns)
+    return opened
+
+
+async def warm_up(
+    session_factory: Callable[[], AsyncSession], app: FastAPI | None = None
+) -> dict[str, Any]:
+    """Run every warm-up step, then mark the process ready."""
+    global _ready
+    started = time.monotonic()
+    steps: dict[str, float] = {}
+    failed: list[str] = []
+
+    async def step(name: str, work: Callable[[], Awaitable[Any]]) -> None:
+        step_started = time.monotonic()
+        try:
+            await work()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+            failed.append(name)
+        steps[name] = round(time.monotonic() - step_started, 4)
+
+    connections = min(settings.warmup_connections, settings.db_pool_size)
+    if connections > 0:
+        await step("pool", lambda: warm_pools(connections))
+
+    for name, query in HOT_QUERIES.items():
+
+        async def run(query=query) -> None:
+            async with session_factory() as session:
+                await query(session)
+
+        await step(name, run)
+
+    if app is not None:
+        await step("routes", lambda: warm_routes(app))
+
+    _report.clear()
+    _report.update(
+        warmup_seconds=round(time.monotonic() - started, 4),
+        # from this module's import (early in app startup) to ready
+        startup_seconds=round(time.monotonic() - _started, 4),
+        steps=steps,
+        failed=failed,
+    )
+    _ready = True
+    logger.info("Warm-up finished %s", _report)
+    return _report
+
+
+def start_warmup(app: FastAPI, session_factory: Callable[[], AsyncSession]) -> None:
+    global _task, _ready, _shutting_down
+    _shutting_down = False
+    if not settings.warmup_enabled:
+        _ready = True
+        return
+    if _task is None:
+        _task = asyncio.create_task(warm_up(session_factory, app))
+
+
+async def stop_warmup() -> None:
+    """Report not ready from now on, and stop a warm-up that is still running."""
+    global _task, _shutting_down
+    _shutting_down = True
+    if _task is not None:
+        _task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _task
+        _task = None
@@ -1,17 +1,56 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.routes.auth import router as auth_router
+from app.api.routes.health import router as health_router
+from app.api.routes.internal import router as internal_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.products import router as products_router
 from app.api.routes.orders import router as orders_router
+from app.api.warmup import start_warmup, stop_warmup
+from app.modules.product.inventory import start_hot_inventory, stop_hot_inventory
 from app.shared.config import settings
+from app.shared.db import AsyncSessionLocal, ReadSessionLocal
+from app.shared.invalidation import start_invalidation_listener, stop_invalidation_listener
+from app.shared.metrics import MetricsMiddleware, install_db_timing
+from app.shared.profiler import SQLProfilerMiddleware
+from app.shared.pool import start_pool_logging, stop_pool_logging
+from app.shared.replica import start_replica_monitor, stop_replica_monitor
+from app.shared.security import shutdown_password_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_pool_logging()
+    await start_replica_monitor()
+    start_invalidation_listener()
+    await start_hot_inventory(AsyncSessionLocal)
+    start_warmup(app, ReadSessionLocal)
+    yield
+    await stop_warmup()
+    await stop_hot_inventory(AsyncSessionLocal)
+    shutdown_password_executor()
+    stop_replica_monitor()
+    await stop_invalidation_listener()
+    stop_pool_logging()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name, debug=settings.debug)
+    app = FastAPI(title=settings.app_name, debug=settings.debug, lifespan=lifespan)
 
+    app.include_router(health_router)
     app.include_router(auth_router)
     app.include_router(products_router)
     app.include_router(orders_router)
+    if settings.metrics_enabled:
+        install_db_timing()
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+    if settings.sql_profiling:
+        app.add_middleware(SQLProfilerMiddleware)
+    if settings.internal_routes_enabled:
+        app.include_router(internal_router)
 
     return app
 
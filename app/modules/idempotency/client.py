@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable
+
+from app.modules.idempotency.service import IdempotencyService
+
+
+class IdempotencyClientInterface(ABC):
+    @abstractmethod
+    async def run(
+        self,
+        *,
+        user_id: str,
+        scope: str,
+        key: str | None,
+        request: Any,
+        handler: Callable[[], Awaitable[Any]],
+        status_code: int = 200,
+    ) -> Any:
+        pass
+
+
+class IdempotencyClient(IdempotencyClientInterface):
+    def __init__(self, db_session):
+        self.idempotency_service = IdempotencyService(session=db_session)
+
+    async def run(
+        self,
+        *,
+        user_id: str,
+        scope: str,
+        key: str | None,
+        request: Any,
+        handler: Callable[[], Awaitable[Any]],
+        status_code: int = 200,
+    ) -> Any:
+        return await self.idempotency_service.run(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            request=request,
+            handler=handler,
+            status_code=status_code,
+        )
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.shared.db import BaseModel
+
+
+class IdempotencyRecord(BaseModel):
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[str] = mapped_column(String(40), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(100), primary_key=True)  # e.g. "POST /orders"
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # sha256 of the request body; a reused key with a different body is rejected
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    # NULL until the request completes (in the same transaction as its writes)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    body: Mapped[Any] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -0,0 +1,231 @@
+"""
+Idempotency-Key support for unsafe endpoints.
+
+The first request with a key claims it by inserting a placeholder row in its own transaction,
+and writes its response onto that row before committing. The request's writes and the
+stored response therefore commit or roll back together. A retry replays the stored response:
+
+- from the in-memory front, when this process recently served it;
+- from the table otherwise. A duplicate racing another process blocks on the placeholder's
+  primary key until that transaction ends, then reads the committed response.
+
+Duplicates racing inside one process wait on the in-flight request's future instead of
+touching the database. When the original request fails, nothing is stored and one of the
+waiters claims the key and runs the request itself.
+"""
+
+import asyncio
+import hashlib
+import json
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.idempotency.model import IdempotencyRecord
+from app.shared.cache import TTLCache
+from app.shared.config import settings
+from app.shared.transaction import on_outcome
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: Any
+
+
+@dataclass
+class _Claim:
+    """This request owns the key; `stored` is set once its response is written."""
+
+    ident: Hashable
+    future: asyncio.Future
+    stored: StoredResponse | None = None
+
+
+class _Front:
+    def __init__(self) -> None:
+        self.cache: TTLCache[StoredResponse] = TTLCache(
+            maxsize=settings.idempotency_cache_maxsize,
+            ttl=settings.idempotency_cache_ttl_seconds,
+        )
+        self.inflight: dict[Hashable, asyncio.Future] = {}
+
+
+_fronts: "weakref.WeakKeyDictionary[object, _Front]" = weakref.WeakKeyDictionary()
+
+
+def _front(bind) -> _Front:
+    front = _fronts.get(bind)
+    if front is None:
+        front = _fronts[bind] = _Front()
+    return front
+
+
+def fingerprint(request: Any) -> str:
+    payload = json.dumps(jsonable_encoder(request), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class IdempotencyService:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def run(
+        self,
+        *,
+        user_id: str,
+        scope: str,
+        key: str | None,
+        request: Any,
+        handler: Callable[[], Awaitable[Any]],
+        status_code: int = 200,
+    ) -> Any:
+        """
+        Run `handler` at most once per (user, scope, key) and return its result, or a
+        JSONResponse replaying the stored one. Without a key the handler just runs.
+        Must be called inside the transaction that performs the handler's writes.
+        """
+        if key is None:
+            return await handler()
+
+        request_fingerprint = fingerprint(request)
+        claim = await self._claim(user_id, scope, key, request_fingerprint)
+        if isinstance(claim, StoredResponse):
+            return self._replay(claim, request_fingerprint)
+
+        result = await handler()
+        claim.stored = StoredResponse(request_fingerprint, status_code, jsonable_encoder(result))
+        await self.session.execute(
+            update(IdempotencyRecord)
+            .where(*self._match(user_id, scope, key))
+            .values(status_code=status_code, body=claim.stored.body)
+            .execution_options(synchronize_session=False)
+        )
+        return result
+
+    async def _claim(
+        self, user_id: str, scope: str, key: str, request_fingerprint: str
+    ) -> StoredResponse | _Claim:
+        """Return the stored response for the key, or a claim once this request owns it."""
+        front = _front(self.session.bind)
+        ident = (user_id, scope, key)
+        while True:
+            stored = front.cache.get(ident)
+            if stored is not None:
+                return stored
+            pending = front.inflight.get(ident)
+            if pending is None:
+                break
+            stored = await asyncio.shield(pending)
+            if stored is not None:
+                return stored
+            # the in-flight request failed; try to claim the key ourselves
+
+        claim = _Claim(ident, asyncio.get_running_loop().create_future())
+        front.inflight[ident] = claim.future
+        on_outcome(
+            self.session,
+            on_commit=lambda: self._publish(claim, claim.stored),
+            on_rollback=lambda: self._publish(claim, None),
+        )
+
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=settings.idempotency_ttl_seconds)
+        try:
+            async with self.session.begin_nested():
+                await self.session.execute(
+                    insert(IdempotencyRecord).values(
+                        user_id=user_id,
+                        scope=scope,
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        expires_at=expires_at,
+                    )
+                )
+            return claim
+        except IntegrityError:
+            pass
+
+        # an expired record is claimed like a missing one
+        reclaimed = await self.session.execute(
+            update(IdempotencyRecord)
+            .where(*self._match(user_id, scope, key), IdempotencyRecord.expires_at <= now)
+            .values(
+                fingerprint=request_fingerprint,
+                status_code=None,
+                body=None,
+                expires_at=expires_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if reclaimed.rowcount:
+            return claim
+
+        row = (
+            await self.session.execute(
+                select(
+                    IdempotencyRecord.fingerprint,
+                    IdempotencyRecord.status_code,
+                    IdempotencyRecord.body,
+                ).where(*self._match(user_id, scope, key))
+            )
+        ).one()
+        if row.status_code is None:
+            raise HTTPException(status_code=409, detail="A request with this key is in progress")
+        stored = StoredResponse(row.fingerprint, row.status_code, row.body)
+        self._publish(claim, stored)
+        return stored
+
+    def _replay(self, stored: StoredResponse, request_fingerprint: str) -> JSONResponse:
+        if stored.fingerprint != request_fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        return JSONResponse(
+            stored.body, status_code=stored.status_code, headers={REPLAY_HEADER: "true"}
+        )
+
+    def _publish(self, claim: _Claim, stored: StoredResponse | None) -> None:
+        """Release `claim` and wake its waiters with the response (None: they retry)."""
+        front = _front(self.session.bind)
+        if stored is not None:
+            front.cache.set(claim.ident, stored)
+        if front.inflight.get(claim.ident) is claim.future:
+            del front.inflight[claim.ident]
+        if not claim.future.done():
+            claim.future.set_result(stored)
+
+    @staticmethod
+    def _match(user_id: str, scope: str, key: str) -> tuple:
+        return (
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key == key,
+        )
+
+    async def purge_expired(self, batch_size: int = 1000) -> int:
+        """Delete up to `batch_size` expired records; returns how many were removed."""
+        pk = tuple_(IdempotencyRecord.user_id, IdempotencyRecord.scope, IdempotencyRecord.key)
+        expired = (
+            select(IdempotencyRecord.user_id, IdempotencyRecord.scope, IdempotencyRecord.key)
+            .where(IdempotencyRecord.expires_at <= datetime.now(timezone.utc))
+            .limit(batch_size)
+        )
+        result = await self.session.execute(
+            delete(IdempotencyRecord)
+            .where(pk.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
@@ -1,17 +1,30 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator
 
 from app.modules.order.model import Order, OrderStatus
-from app.modules.order.schemas import OrderPage, OrderCreateIn, OrderOut
+from app.modules.order.schemas import OrderBatchOut, OrderPage, OrderCreateIn, OrderOut
 from app.modules.order.service import OrderService
+from app.shared.export import ExportFormat
 
 
 class OrderClientInterface(ABC):
+    @abstractmethod
+    async def order_version(self, order_id: int, user_id: str) -> datetime | None:
+        pass
+
     @abstractmethod
     async def get_order(self, order_id: int, user_id: str) -> Order | None:
         pass
 
     @abstractmethod
-    async def list_orders(self, user_id: str, page: int, page_size: int) -> OrderPage:
+    async def list_orders(
+        self, user_id: str, page: int, page_size: int, cursor: str | None = None
+    ) -> OrderPage:
+        pass
+
+    @abstractmethod
+    def export_orders(self, user_id: str, fmt: ExportFormat) -> AsyncIterator[bytes]:
         pass
 
     @abstractmethod
@@ -20,6 +33,12 @@ class OrderClientInterface(ABC):
     ) -> OrderOut:
         pass
 
+    @abstractmethod
+    async def create_orders(
+        self, user_id: str, orders: list[list[tuple[int, int]]], atomic: bool
+    ) -> OrderBatchOut:
+        pass
+
     @abstractmethod
     async def update_order_status(self, user_id: str, order_id: int, status: OrderStatus) -> Order:
         pass
@@ -29,11 +48,19 @@ class OrderClient(OrderClientInterface):
     def __init__(self, db_session):
         self.order_service = OrderService(session=db_session)
 
+    async def order_version(self, order_id: int, user_id: str) -> datetime | None:
+        return await self.order_service.order_version(order_id, user_id=user_id)
+
     async def get_order(self, order_id: int, user_id: str) -> Order | None:
         return await self.order_service.get_order(order_id, user_id=user_id)
 
-    async def list_orders(self, user_id: str, page: int, page_size: int) -> OrderPage:
-        return await self.order_service.list_orders(user_id, page, page_size)
+    async def list_orders(
+        self, user_id: str, page: int, page_size: int, cursor: str | None = None
+    ) -> OrderPage:
+        return await self.order_service.list_orders(user_id, page, page_size, cursor=cursor)
+
+    def export_orders(self, user_id: str, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        return self.order_service.export_orders(user_id, fmt)
 
     async def create_order(
         self, user_id: str, items: list[tuple[int, int]], decrement_stock: bool
@@ -42,5 +69,10 @@ class OrderClient(OrderClientInterface):
             user_id, items=items, decrement_stock=decrement_stock
         )
 
+    async def create_orders(
+        self, user_id: str, orders: list[list[tuple[int, int]]], atomic: bool
+    ) -> OrderBatchOut:
+        return await self.order_service.create_orders(user_id, orders=orders, atomic=atomic)
+
     async def update_order_status(self, user_id: str, order_id: int, status: OrderStatus) -> Order:
         return await self.order_service.update_order_status(user_id, order_id, status)
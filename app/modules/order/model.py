@@ -5,15 +5,21 @@ from decimal import Decimal
 from enum import Enum
 
 from sqlalchemy import (
+    Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     UniqueConstraint,
     func,
+    text,
     CheckConstraint,
     Enum as SAEnum,
     Numeric,
+    false,
+    true,
 )
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -27,24 +33,52 @@ class OrderStatus(str, Enum):
     CANCELED = "CANCELED"
 
 
+# SQLite's CURRENT_TIMESTAMP has whole seconds; storing datetimes the same way keeps an item's
+# created_at (copied from its order's RETURNING) equal to the order's
+_CREATED_AT = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+# On PostgreSQL both tables are partitioned on (archived, created_at) and their primary keys
+# include those columns (see app.modules.order.partitions); the mappings keep `id` as identity.
+# orders.id is therefore not unique there, and order_items.order_id has no foreign key. Items
+# are joined on created_at too, which bounds item loads to the order's partitions.
+_ORDER_ITEMS_JOIN = (
+    "and_(Order.id == foreign(OrderItem.order_id), "
+    "Order.created_at == foreign(OrderItem.created_at))"
+)
+
+
 class Order(BaseModel):
     __tablename__ = "orders"
+    __table_args__ = (
+        # order history: WHERE user_id = ? [AND id < ?] ORDER BY id DESC
+        Index("ix_orders_user_id_id", "user_id", text("id DESC")),
+    )
+    # created_at is part of the items join, so it is read back on INSERT
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="RESTRICT"), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="RESTRICT"))
     status: Mapped[OrderStatus] = mapped_column(
         SAEnum(OrderStatus, name="order_status", native_enum=True),
         default=OrderStatus.WAITING_PAYMENT,
     )
     # optional denormalized totals (kept in sync on writes)
     subtotal: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(_CREATED_AT, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), onupdate=func.now(), server_default=func.now()
     )
+    # set by the maintenance job on old settled orders, which moves them to the archive
+    archived: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
 
     items: Mapped[list["OrderItem"]] = relationship(
         back_populates="order",
+        primaryjoin=_ORDER_ITEMS_JOIN,
         cascade="all, delete-orphan",
         lazy="selectin",
     )
@@ -53,16 +87,30 @@ class Order(BaseModel):
 class OrderItem(BaseModel):
     __tablename__ = "order_items"
     __table_args__ = (
-        UniqueConstraint("order_id", "product_id", name="uq_orderitem_order_product"),
+        # one line per product; an order's lines share its archived and created_at
+        UniqueConstraint(
+            "order_id", "product_id", "archived", "created_at", name="uq_orderitem_order_product"
+        ),
         CheckConstraint("quantity > 0", name="ck_orderitem_qty_positive"),
+        # hot inventory flush: WHERE NOT stock_applied
+        Index(
+            "ix_order_items_stock_unapplied",
+            "product_id",
+            postgresql_where=text("NOT stock_applied"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), index=True)
+    order_id: Mapped[int] = mapped_column(Integer, index=True)
     product_id: Mapped[int] = mapped_column(
         ForeignKey("products.id", ondelete="RESTRICT"), index=True
     )
     unit_price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer)
+    # false while the quantity is only reserved in the hot inventory, not yet in products.stock
+    stock_applied: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true())
+    # the order's created_at and archived flag, so the line is partitioned alongside it
+    created_at: Mapped[datetime] = mapped_column(_CREATED_AT, server_default=func.now())
+    archived: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
 
-    order: Mapped["Order"] = relationship(back_populates="items")
+    order: Mapped["Order"] = relationship(back_populates="items", primaryjoin=_ORDER_ITEMS_JOIN)
@@ -0,0 +1,211 @@
+"""
+Time partitions of orders and order_items (PostgreSQL, migration e3f8a61c9d24).
+
+Both tables are list-partitioned on `archived`, and each half is range-partitioned on
+`created_at`. An item carries its order's created_at, so an order and its lines always
+sit in matching partitions:
+
+    orders                  LIST (archived)
+      orders_live           RANGE (created_at): orders_live_2026_10, ..., orders_live_default
+      orders_archive        RANGE (created_at): orders_archive_2025, ..., orders_archive_default
+
+order_items has the same layout (order_items_live_2026_10, ...). New orders land in the
+monthly live partitions. `archive_settled_orders` sets `archived` on old COMPLETED/CANCELED
+orders and their items, and PostgreSQL moves those rows into the yearly archive
+partitions. Rows never move back. The default partitions only catch rows that have no
+partition yet; `create_live_partition` moves them out when it creates their month.
+`scripts.maintenance.manage_order_partitions` runs all of this.
+
+A lookup by id alone cannot name a partition. `OrderService` therefore bounds its queries
+with a `Horizon`: the start of the last `order_hot_months` months, plus the highest order
+id created before that start. Ids come from one sequence, so any id above it belongs to an
+order created at or after the start. Such lookups get `created_at >= since` and touch only
+the hot partitions. Older ids are looked up everywhere. History pages try the hot
+partitions first and read the older ones only when the page may reach them.
+"""
+
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, Integer, bindparam, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.order.model import Order
+from app.shared.config import settings
+
+TABLES = ("orders", "order_items")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+END_OF_TIME = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+# a transaction that started before a month began has committed well within this
+_MONTH_GRACE = timedelta(hours=1)
+_HORIZON_TTL_SECONDS = 300.0
+
+_horizons: "weakref.WeakKeyDictionary[object, tuple[Horizon, float]]" = weakref.WeakKeyDictionary()
+
+
+def month_start(moment: datetime, shift: int = 0) -> datetime:
+    """First instant (UTC) of the month `shift` months after the one holding `moment`."""
+    moment = moment.astimezone(timezone.utc)
+    index = moment.year * 12 + moment.month - 1 + shift
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def live_partition(table: str, start: datetime) -> tuple[str, datetime, datetime]:
+    """Name and bounds of the monthly live partition starting at `start`."""
+    return f"{table}_live_{start:%Y_%m}", start, month_start(start, 1)
+
+
+def live_partition_start(name: str) -> datetime | None:
+    """The month a live partition holds (None for the default partition)."""
+    _, year, month = name.rsplit("_", 2)
+    if month == "default":
+        return None
+    return datetime(int(year), int(month), 1, tzinfo=timezone.utc)
+
+
+def archive_partition(table: str, year: int) -> tuple[str, datetime, datetime]:
+    """Name and bounds of the yearly archive partition."""
+    return (
+        f"{table}_archive_{year}",
+        datetime(year, 1, 1, tzinfo=timezone.utc),
+        datetime(year + 1, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+@dataclass(frozen=True)
+class Horizon:
+    since: datetime  # start of the hot partitions
+    last_old_id: int  # highest order id created before `since`
+
+    def covers(self, order_id: int) -> bool:
+        """Whether the order was certainly created at or after `since`."""
+        return order_id > self.last_old_id
+
+    def since_for(self, order_id: int) -> datetime:
+        return self.since if self.covers(order_id) else EPOCH
+
+
+def hot_since(now: datetime) -> datetime:
+    return month_start(now - _MONTH_GRACE, 1 - max(1, settings.order_hot_months))
+
+
+async def refresh_horizon(session: AsyncSession, now: datetime | None = None) -> Horizon:
+    since = hot_since(now or datetime.now(timezone.utc))
+    last_old_id = await session.scalar(select(func.max(Order.id)).where(Order.created_at < since))
+    horizon = Horizon(since=since, last_old_id=last_old_id or 0)
+    _horizons[session.bind] = (horizon, time.monotonic() + _HORIZON_TTL_SECONDS)
+    return horizon
+
+
+async def recent_horizon(session: AsyncSession) -> Horizon | None:
+    """
+    The bind's current horizon, refreshed every few minutes. None when the database has no
+    partitions to prune (only PostgreSQL does).
+    """
+    cached = _horizons.get(session.bind)
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+    if session.bind.dialect.name != "postgresql":
+        return None
+    return await refresh_horizon(session)
+
+
+_PARTITIONS = text("""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = to_regclass(:parent)
+    ORDER BY c.relname
+    """)
+
+
+async def list_partitions(session: AsyncSession, parent: str) -> list[str]:
+    return list((await session.execute(_PARTITIONS, {"parent": parent})).scalars())
+
+
+async def stranded_months(session: AsyncSession, table: str) -> list[datetime]:
+    """Months with rows in the live default partition, i.e. without a partition of their own."""
+    rows = await session.execute(
+        text(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+            f"FROM {table}_live_default"
+        )
+    )
+    return sorted(month.replace(tzinfo=timezone.utc) for month in rows.scalars())
+
+
+async def _create_partition(
+    session: AsyncSession, parent: str, name: str, start: datetime, end: datetime
+) -> bool:
+    if await session.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}):
+        return False
+    default = f"{parent}_default"
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+    create = text(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES {bounds}")
+    if not await session.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})")):
+        await session.execute(create)
+        return True
+    # PostgreSQL refuses a partition whose rows would stay behind in the default
+    await session.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {default}"))
+    await session.execute(create)
+    await session.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"))
+    await session.execute(text(f"DELETE FROM {default} WHERE {in_range}"))
+    await session.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT"))
+    return True
+
+
+async def create_live_partition(session: AsyncSession, table: str, start: datetime) -> bool:
+    """Create the month's live partition unless it exists; False when it already did."""
+    return await _create_partition(session, f"{table}_live", *live_partition(table, start))
+
+
+async def create_archive_partition(session: AsyncSession, table: str, year: int) -> bool:
+    return await _create_partition(session, f"{table}_archive", *archive_partition(table, year))
+
+
+_ARCHIVE_BATCH = text("""
+    WITH batch AS (
+        SELECT id, created_at FROM orders_live
+        WHERE status IN ('COMPLETED', 'CANCELED') AND created_at < :before AND id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), items AS (
+        UPDATE order_items AS i SET archived = true
+        FROM batch
+        WHERE i.order_id = batch.id AND i.created_at = batch.created_at AND NOT i.archived
+    )
+    UPDATE orders AS o SET archived = true
+    FROM batch
+    WHERE o.id = batch.id AND o.created_at = batch.created_at AND NOT o.archived
+    RETURNING o.id
+    """).bindparams(
+    bindparam("before", type_=DateTime(timezone=True)),
+    bindparam("after_id", type_=Integer),
+    bindparam("batch_size", type_=Integer),
+)
+
+
+async def archive_settled_orders(
+    session: AsyncSession, before: datetime, after_id: int = 0, batch_size: int = 1000
+) -> list[int]:
+    """
+    Move one batch of COMPLETED/CANCELED orders created before `before` (by id, after
+    `after_id`), with their items, into the archive partitions. Returns the moved ids.
+
+    updated_at is left alone: archiving changes nothing a client can see, so ETags hold.
+    Orders locked by a running transaction are skipped and picked up by the next run.
+    """
+    result = await session.execute(
+        _ARCHIVE_BATCH, {"before": before, "after_id": after_id, "batch_size": batch_size}
+    )
+    return list(result.scalars())
+
+
+async def drop_partition_if_empty(session: AsyncSession, name: str) -> bool:
+    if await session.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name})")):
+        return False
+    await session.execute(text(f"DROP TABLE {name}"))
+    return True
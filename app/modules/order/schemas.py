@@ -32,11 +32,33 @@ class OrderOut(BaseModel):
         from_attributes = True
 
 
+class OrderBatchIn(BaseModel):
+    orders: List[OrderCreateIn] = Field(min_length=1, max_length=500)
+    # all-or-nothing; by default each order succeeds or fails on its own
+    atomic: bool = False
+
+
+class OrderBatchResult(BaseModel):
+    index: int
+    order: OrderOut | None = None
+    error: str | None = None
+
+
+class OrderBatchOut(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBatchResult]
+
+
 class PaginationMeta(BaseModel):
-    page: int
+    # page/total/pages are only filled in page-number mode; cursor mode skips the count
+    page: int | None = None
     page_size: int
-    total: int
-    pages: int
+    total: int | None = None
+    total_exact: bool = False  # False when total is cached, estimated or skipped
+    pages: int | None = None
+    has_next: bool = False
+    next_cursor: str | None = None
 
 
 class OrderPage(BaseModel):
@@ -1,82 +1,406 @@
-from decimal import Decimal
+from collections import defaultdict
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 from math import ceil
+from typing import Any, AsyncIterator, NoReturn
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Integer, bindparam, case, func, insert, select, tuple_, update
+from sqlalchemy.orm import lazyload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.modules.order.model import Order, OrderItem, OrderStatus
+from app.modules.order.partitions import END_OF_TIME, EPOCH, recent_horizon
 from app.modules.order.schemas import (
-    OrderItemOut,
+    OrderBatchOut,
+    OrderBatchResult,
     OrderOut,
     OrderPage,
     PaginationMeta,
 )
+from app.modules.product.cache import invalidate_product_stock
+from app.modules.product.inventory import get_hot_inventory, track_reservation
 from app.modules.product.model import Product
+from app.shared.config import settings
+from app.shared.counting import CountStrategy, count_rows, invalidate_counts
+from app.shared.export import ExportFormat, encode_batches
+from app.shared.invalidation import publish
+from app.shared.pagination import decode_cursor, encode_cursor
+from app.shared.transaction import on_outcome
+
+CENTS = Decimal("0.01")
+
+# CSV exports one row per order line; NDJSON one object per order with its items
+EXPORT_CSV_FIELDS = (
+    "order_id",
+    "status",
+    "subtotal",
+    "created_at",
+    "product_id",
+    "quantity",
+    "unit_price",
+    "line_total",
+)
+
+
+# hot statements are built once and bound per call (see app.modules.product.service); the
+# created_at bounds let PostgreSQL skip partitions (see app.modules.order.partitions)
+_SINCE = Order.created_at >= bindparam("since")
+_OWNED = (
+    Order.id == bindparam("order_id", type_=Integer),
+    Order.user_id == bindparam("user_id"),
+    _SINCE,
+)
+_ORDER_VERSION = select(Order.updated_at).where(*_OWNED)
+# items are loaded by (order_id, created_at) in _with_items: the relationship loader would
+# filter them by order id only, which no item partition can be pruned on
+_ORDER_WITH_ITEMS = select(Order).where(*_OWNED).options(lazyload(Order.items))
+_ORDER_ITEMS = (
+    select(OrderItem)
+    .where(
+        tuple_(OrderItem.order_id, OrderItem.created_at).in_(bindparam("orders", expanding=True))
+    )
+    .order_by(OrderItem.id)
+)
+# the ORM's flush would update by id alone; the partition key picks the one partition
+_SET_STATUS = (
+    update(Order)
+    .where(
+        Order.id == bindparam("order_id", type_=Integer),
+        Order.archived == bindparam("in_archive"),
+        Order.created_at == bindparam("order_created_at"),
+    )
+    .values(status=bindparam("new_status"))
+    .execution_options(synchronize_session=False)
+)
+_USER_ORDER_COUNT = (
+    select(func.count()).select_from(Order).where(Order.user_id == bindparam("user_id"))
+)
+_USER_ORDERS = (
+    select(Order)
+    .where(Order.user_id == bindparam("user_id"), _SINCE, Order.created_at < bindparam("until"))
+    .order_by(Order.id.desc())
+    .limit(bindparam("limit", type_=Integer))
+    .options(lazyload(Order.items))
+)
+_USER_ORDERS_PAGE = _USER_ORDERS.offset(bindparam("offset", type_=Integer))
+_USER_ORDERS_BEFORE = _USER_ORDERS.where(Order.id < bindparam("before_id", type_=Integer))
+_PRODUCT_IDS = bindparam("product_ids", expanding=True)
+_PRODUCT_PRICES = select(Product.id, Product.price).where(Product.id.in_(_PRODUCT_IDS))
+_PRODUCT_NAMES = select(Product.id, Product.name).where(Product.id.in_(_PRODUCT_IDS))
+_ALL_TIME = {"since": EPOCH, "until": END_OF_TIME}
 
 
 class OrderService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    def _build_order_out(self, order: Order) -> OrderOut:
-        return OrderOut(
-            id=order.id,
-            status=order.status,
-            subtotal=float(order.subtotal),
-            items=[
-                OrderItemOut(
-                    product_id=item.product_id,
-                    quantity=item.quantity,
-                    unit_price=float(item.unit_price),
-                    line_total=float(item.unit_price) * item.quantity,
-                )
-                for item in order.items
-            ],
+    @staticmethod
+    def _order_out(
+        order_id: int, status: OrderStatus, subtotal: Decimal, lines: list[tuple[int, int, Decimal]]
+    ) -> OrderOut:
+        # one model_validate over plain dicts validates the whole tree in a single pydantic-core
+        # pass, cheaper than an OrderItemOut(...) call per line
+        return OrderOut.model_validate(
+            {
+                "id": order_id,
+                "status": status,
+                "subtotal": float(subtotal),
+                "items": [
+                    {
+                        "product_id": pid,
+                        "quantity": qty,
+                        "unit_price": float(price),
+                        "line_total": float(price) * qty,
+                    }
+                    for pid, qty, price in lines
+                ],
+            }
         )
 
-    async def get_order(self, order_id: int, user_id: str) -> OrderOut | None:
-        stmt = (
-            select(Order)
-            .where(Order.id == order_id, Order.user_id == user_id)
-            .options(selectinload(Order.items))
+    def _build_order_out(self, order: Order) -> OrderOut:
+        return self._order_out(
+            order.id,
+            order.status,
+            order.subtotal,
+            [(item.product_id, item.quantity, item.unit_price) for item in order.items],
         )
 
-        result = await self.session.execute(stmt)
-        order = result.scalar_one()
-        return self._build_order_out(order) if order else None
+    async def _owned(self, order_id: int, user_id: str) -> dict[str, Any]:
+        horizon = await recent_horizon(self.session)
+        since = horizon.since_for(order_id) if horizon is not None else EPOCH
+        return {"order_id": order_id, "user_id": user_id, "since": since}
+
+    async def _orders(self, stmt, params: dict[str, Any]) -> list[Order]:
+        return list((await self.session.execute(stmt, params)).scalars().all())
+
+    async def _with_items(self, orders: list[Order]) -> list[Order]:
+        """Load the orders' items in one statement bounded by the orders' created_at."""
+        if not orders:
+            return orders
+        keys = [(order.id, order.created_at) for order in orders]
+        by_order = defaultdict(list)
+        for item in await self.session.scalars(_ORDER_ITEMS, {"orders": keys}):
+            by_order[item.order_id].append(item)
+        for order in orders:
+            set_committed_value(order, "items", by_order[order.id])
+        return orders
+
+    async def _history(self, stmt, params: dict[str, Any]) -> list[Order]:
+        """
+        A newest-first page of the user's orders, read from the hot partitions first.
+
+        That page is the answer when it is full and its oldest order is newer than the
+        horizon. Otherwise a LIMIT page is merged with the same page over the older
+        partitions; an OFFSET page may straddle the horizon and is re-read over all of them.
+        """
+        horizon = await recent_horizon(self.session)
+        if horizon is None:
+            return await self._orders(stmt, params | _ALL_TIME)
+        rows = await self._orders(stmt, params | {"since": horizon.since, "until": END_OF_TIME})
+        if len(rows) == params["limit"] and horizon.covers(rows[-1].id):
+            return rows
+        if params.get("offset"):
+            return await self._orders(stmt, params | _ALL_TIME)
+        older = await self._orders(stmt, params | {"since": EPOCH, "until": horizon.since})
+        return sorted(rows + older, key=lambda order: order.id, reverse=True)[: params["limit"]]
+
+    async def order_version(self, order_id: int, user_id: str) -> datetime | None:
+        """The order's updated_at (its ETag / Last-Modified input) by primary key, or None."""
+        return await self.session.scalar(_ORDER_VERSION, await self._owned(order_id, user_id))
+
+    async def get_order(self, order_id: int, user_id: str) -> OrderOut | None:
+        result = await self.session.execute(_ORDER_WITH_ITEMS, await self._owned(order_id, user_id))
+        order = result.scalar_one_or_none()
+        if order is None:
+            return None
+        await self._with_items([order])
+        return self._build_order_out(order)
 
     async def list_orders(
         self,
         user_id: str,
         page: int = 1,
         page_size: int = 20,
+        cursor: str | None = None,
+        count: CountStrategy | None = None,
     ) -> OrderPage:
-        count_stmt = select(func.count()).select_from(Order).where(Order.user_id == user_id)
-        total = (await self.session.execute(count_stmt)).scalar_one()
+        if cursor is not None:
+            return await self._list_orders_before(user_id, cursor=cursor, page_size=page_size)
 
-        pages = max(1, ceil(total / page_size)) if total else 1
-        page = max(1, min(page, pages))
+        counted = await count_rows(
+            self.session,
+            _USER_ORDER_COUNT,
+            {"user_id": user_id},
+            strategy=count or settings.order_count_strategy,
+            table=Order.__tablename__,
+            filter_key=user_id,
+        )
+        total = counted.total
+
+        pages = None
+        if total is not None:
+            pages = max(1, ceil(total / page_size)) if total else 1
+            if counted.exact:
+                page = max(1, min(page, pages))
 
         orders: list[OrderOut] = []
-        if total:
-            stmt = (
-                select(Order)
-                .where(Order.user_id == user_id)
-                .order_by(Order.id.desc())
-                .limit(page_size)
-                .offset((page - 1) * page_size)
-                .options(selectinload(Order.items))
-            )
-            orders = [
-                self._build_order_out(order)
-                for order in (await self.session.execute(stmt)).scalars().all()
-            ]
+        has_next = False
+        if total is None or total:
+            # one extra row tells us whether there is a next page
+            params = {"user_id": user_id, "limit": page_size + 1, "offset": (page - 1) * page_size}
+            rows = await self._history(_USER_ORDERS_PAGE, params)
+            has_next = len(rows) > page_size
+            orders = [self._build_order_out(o) for o in await self._with_items(rows[:page_size])]
+
+        next_cursor = encode_cursor({"id": orders[-1].id}) if has_next else None
+        return OrderPage(
+            data=orders,
+            meta=PaginationMeta(
+                page=page,
+                page_size=page_size,
+                total=total,
+                total_exact=counted.exact,
+                pages=pages,
+                has_next=has_next,
+                next_cursor=next_cursor,
+            ),
+        )
+
+    async def _list_orders_before(self, user_id: str, cursor: str, page_size: int) -> OrderPage:
+        """
+        Keyset mode: `id < before_id` on the (user_id, id DESC) index, no OFFSET and no count.
+        """
+        try:
+            before_id = int(decode_cursor(cursor)["id"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+        params = {"user_id": user_id, "before_id": before_id, "limit": page_size + 1}
+        rows = await self._history(_USER_ORDERS_BEFORE, params)
+        has_next = len(rows) > page_size
+        orders = [self._build_order_out(o) for o in await self._with_items(rows[:page_size])]
 
         return OrderPage(
             data=orders,
-            meta=PaginationMeta(page=page, page_size=page_size, total=total, pages=pages),
+            meta=PaginationMeta(
+                page_size=page_size,
+                has_next=has_next,
+                next_cursor=encode_cursor({"id": orders[-1].id}) if has_next else None,
+            ),
+        )
+
+    async def _reserve_stock(self, quantities: dict[int, int]) -> dict[int, float]:
+        """
+        Reserve stock for every line and return the unit prices.
+
+        Hot products (see app.modules.product.inventory) are taken from the in-memory
+        counters; the rest go through one conditional UPDATE ... RETURNING. Raises ValueError
+        when any line cannot be reserved; the caller's transaction then rolls back the whole
+        order, which also hands hot reservations back.
+        """
+        inventory = get_hot_inventory()
+        hot = (
+            {pid: qty for pid, qty in quantities.items() if inventory.owns(pid)}
+            if inventory is not None
+            else {}
+        )
+        if not hot:
+            return await self._reserve_rows(quantities)
+
+        short = inventory.reserve(hot)
+        if short:
+            await self._raise_unavailable(short)
+        track_reservation(self.session, hot)
+
+        prices = await self._product_prices(sorted(hot))
+        cold = {pid: qty for pid, qty in quantities.items() if pid not in hot}
+        if cold:
+            prices.update(await self._reserve_rows(cold))
+        return prices
+
+    async def _reserve_rows(self, quantities: dict[int, int]) -> dict[int, float]:
+        """
+        Decrement stock for every product in one conditional UPDATE ... RETURNING.
+
+        Rows are locked in id order first (FOR NO KEY UPDATE, which still lets order_items
+        reference them) so concurrent checkouts cannot deadlock, and `stock >= qty` is
+        checked by the database, so they cannot oversell either.
+        """
+        ids = sorted(quantities)
+        qty = case(quantities, value=Product.id)
+        locked = (
+            select(Product.id)
+            .where(Product.id.in_(ids))
+            .order_by(Product.id)
+            .with_for_update(key_share=True)
+        )
+        stmt = (
+            update(Product)
+            .where(Product.id.in_(locked), Product.stock >= qty)
+            .values(stock=Product.stock - qty)
+            .returning(Product.id, Product.price)
+            .execution_options(synchronize_session=False)
         )
+        prices = {pid: float(price) for pid, price in (await self.session.execute(stmt)).all()}
+
+        missing = [pid for pid in ids if pid not in prices]
+        if missing:
+            await self._raise_unavailable(missing)
+        # a Core UPDATE skips the ORM write hooks: evict this process's cached pages on commit
+        # whether or not the NOTIFY below reaches a listener
+        publish(self.session, "stock", prices)
+        changed = {str(pid) for pid in prices}
+        on_outcome(self.session, on_commit=lambda: invalidate_product_stock(changed))
+        return prices
+
+    async def _raise_unavailable(self, product_ids: list[int]) -> NoReturn:
+        found = dict(
+            (await self.session.execute(_PRODUCT_NAMES, {"product_ids": product_ids})).all()
+        )
+        for pid in product_ids:
+            if pid not in found:
+                raise ValueError(f"Product {pid} not found")
+        pid = product_ids[0]
+        raise ValueError(f"Insufficient stock for product {found[pid]} (id={pid})")
+
+    async def _product_prices(self, product_ids: list[int]) -> dict[int, float]:
+        rows = (await self.session.execute(_PRODUCT_PRICES, {"product_ids": product_ids})).all()
+        prices = {pid: float(price) for pid, price in rows}
+        for pid in product_ids:
+            if pid not in prices:
+                raise ValueError(f"Product {pid} not found")
+        return prices
+
+    @staticmethod
+    def _merge_lines(items: list[tuple[int, int]]) -> dict[int, int]:
+        """One line per product (order_items is unique on order_id, product_id)."""
+        quantities: dict[int, int] = {}
+        for pid, qty in items:
+            quantities[pid] = quantities.get(pid, 0) + qty
+        return quantities
+
+    @staticmethod
+    def _price_lines(
+        quantities: dict[int, int], prices: dict[int, float]
+    ) -> list[tuple[int, int, Decimal]]:
+        # unit_price is NUMERIC(12, 2); round here so the response matches the stored rows
+        return [
+            (pid, qty, Decimal(str(prices[pid])).quantize(CENTS, rounding=ROUND_HALF_UP))
+            for pid, qty in quantities.items()
+        ]
+
+    async def _insert_orders(
+        self,
+        user_id: str,
+        orders: list[list[tuple[int, int, Decimal]]],
+        deferred: frozenset[int] = frozenset(),
+    ) -> list[OrderOut]:
+        """
+        Write already priced orders with one multi-row INSERT ... RETURNING for `orders` and
+        one for all their `order_items`, and build the responses from those same values.
+        Lines for `deferred` products are left for the hot inventory flush to apply to stock.
+        """
+        subtotals = [
+            sum((price * qty for _, qty, price in lines), Decimal("0")) for lines in orders
+        ]
+        inserted = (
+            await self.session.execute(
+                insert(Order).returning(Order.id, Order.created_at, sort_by_parameter_order=True),
+                [
+                    {
+                        "user_id": user_id,
+                        "status": OrderStatus.WAITING_PAYMENT,
+                        "subtotal": subtotal,
+                    }
+                    for subtotal in subtotals
+                ],
+            )
+        ).all()
+        order_ids = [order_id for order_id, _ in inserted]
+        # items carry their order's created_at: it is their partition key
+        await self.session.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": order_id,
+                    "created_at": created_at,
+                    "product_id": pid,
+                    "quantity": qty,
+                    "unit_price": price,
+                    "stock_applied": pid not in deferred,
+                }
+                for (order_id, created_at), lines in zip(inserted, orders, strict=True)
+                for pid, qty, price in lines
+            ],
+        )
+        invalidate_counts(Order.__tablename__, user_id)
+
+        return [
+            self._order_out(order_id, OrderStatus.WAITING_PAYMENT, subtotal, lines)
+            for order_id, subtotal, lines in zip(order_ids, subtotals, orders, strict=True)
+        ]
 
     async def create_order(
         self,
@@ -84,46 +408,201 @@ class OrderService:
         items: list[tuple[int, int]],
         decrement_stock: bool = True,
     ) -> OrderOut:
-        product_ids = [pid for pid, _ in items]
-        products = (
-            (await self.session.execute(select(Product).where(Product.id.in_(product_ids))))
-            .scalars()
-            .all()
+        quantities = self._merge_lines(items)
+        if decrement_stock:
+            prices = await self._reserve_stock(quantities)
+        else:
+            prices = await self._product_prices(list(quantities))
+
+        [order] = await self._insert_orders(
+            user_id,
+            [self._price_lines(quantities, prices)],
+            self._deferred(quantities) if decrement_stock else frozenset(),
         )
-        prod_map = {p.id: p for p in products}
+        return order
 
-        for pid, qty in items:
-            p = prod_map.get(pid)
-            if not p:
-                raise ValueError(f"Product {pid} not found")
-            if decrement_stock and (p.stock or 0) < qty:
-                raise ValueError(f"Insufficient stock for product {p.name} (id={pid})")
+    @staticmethod
+    def _deferred(quantities: dict[int, int]) -> frozenset[int]:
+        inventory = get_hot_inventory()
+        if inventory is None:
+            return frozenset()
+        return frozenset(pid for pid in quantities if inventory.owns(pid))
 
-        order = Order(user_id=user_id, status=OrderStatus.WAITING_PAYMENT)
-        self.session.add(order)
-        await self.session.flush()  # get order.id
+    async def create_orders(
+        self,
+        user_id: str,
+        orders: list[list[tuple[int, int]]],
+        atomic: bool = False,
+    ) -> OrderBatchOut:
+        """
+        Create many orders against one locked, deduplicated product fetch.
 
-        subtotal = 0.0
-        for pid, qty in items:
-            p = prod_map[pid]
-            price = float(p.price)
-            self.session.add(
-                OrderItem(
-                    order_id=order.id,
-                    product_id=p.id,
-                    quantity=qty,
-                    unit_price=price,
-                )
+        Orders are validated and priced in memory in request order, then stock for all
+        accepted orders is reserved with one UPDATE and everything is inserted set-based.
+        With `atomic` any invalid order aborts the whole batch. Otherwise invalid orders are
+        reported and skipped, and if the set-based write itself fails the valid orders are
+        retried one by one through `create_order`, each in its own SAVEPOINT.
+        """
+        requested = [self._merge_lines(items) for items in orders]
+        product_ids = sorted({pid for quantities in requested for pid in quantities})
+        rows = (
+            await self.session.execute(
+                select(Product.id, Product.name, Product.price, Product.stock)
+                .where(Product.id.in_(product_ids))
+                .order_by(Product.id)
+                .with_for_update(key_share=True)
             )
-            subtotal += price * qty
+        ).all()
+        names = {pid: name for pid, name, _, _ in rows}
+        prices = {pid: float(price) for pid, _, price, _ in rows}
+        inventory = get_hot_inventory()
+        available = {
+            pid: inventory.available(pid) if inventory and inventory.owns(pid) else stock or 0
+            for pid, _, _, stock in rows
+        }
 
-        order.subtotal = Decimal(str(round(subtotal, 2)))
+        accepted: list[int] = []
+        errors: dict[int, str] = {}
+        for index, quantities in enumerate(requested):
+            error = next(
+                (
+                    (
+                        f"Product {pid} not found"
+                        if pid not in names
+                        else f"Insufficient stock for product {names[pid]} (id={pid})"
+                    )
+                    for pid, qty in quantities.items()
+                    if pid not in names or available[pid] < qty
+                ),
+                None,
+            )
+            if error:
+                errors[index] = error
+                continue
+            for pid, qty in quantities.items():
+                available[pid] -= qty
+            accepted.append(index)
+
+        created: dict[int, OrderOut] = {}
+        if atomic and errors:
+            for index in accepted:
+                errors[index] = "Not created: another order in the batch failed"
+        elif atomic:
+            created = await self._write_batch(user_id, requested, accepted, prices)
+        elif accepted:
+            try:
+                async with self.session.begin_nested():
+                    created = await self._write_batch(user_id, requested, accepted, prices)
+            except (SQLAlchemyError, ValueError):
+                for index in accepted:
+                    try:
+                        async with self.session.begin_nested():
+                            created[index] = await self.create_order(
+                                user_id, list(requested[index].items())
+                            )
+                    except (SQLAlchemyError, ValueError) as e:
+                        errors[index] = str(e)
 
-        result = await self.get_order(order.id, user_id=user_id)
-        if result is None:
-            raise ValueError("Order not found after creation")
+        return OrderBatchOut(
+            created=len(created),
+            failed=len(errors),
+            results=[
+                OrderBatchResult(index=i, order=created.get(i), error=errors.get(i))
+                for i in range(len(requested))
+            ],
+        )
 
-        return result
+    async def _write_batch(
+        self,
+        user_id: str,
+        requested: list[dict[int, int]],
+        accepted: list[int],
+        prices: dict[int, float],
+    ) -> dict[int, OrderOut]:
+        totals: dict[int, int] = {}
+        for index in accepted:
+            for pid, qty in requested[index].items():
+                totals[pid] = totals.get(pid, 0) + qty
+        await self._reserve_stock(totals)
+
+        written = await self._insert_orders(
+            user_id,
+            [self._price_lines(requested[index], prices) for index in accepted],
+            self._deferred(totals),
+        )
+        return dict(zip(accepted, written, strict=True))
+
+    def export_orders(self, user_id: str, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        """All of the user's orders with their items in id order, streamed."""
+        return encode_batches(self._export_batches(user_id, fmt), fmt, EXPORT_CSV_FIELDS)
+
+    async def _export_batches(
+        self, user_id: str, fmt: ExportFormat
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        One ordered orders x order_items join over a server-side cursor. For NDJSON the lines
+        of an order are folded into it as they arrive; an order whose lines straddle two
+        fetches is held back until its last line has been read.
+        """
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                Order.status,
+                Order.subtotal,
+                Order.created_at,
+                OrderItem.product_id,
+                OrderItem.quantity,
+                OrderItem.unit_price,
+            )
+            .join(
+                OrderItem,
+                (OrderItem.order_id == Order.id) & (OrderItem.created_at == Order.created_at),
+            )
+            .where(Order.user_id == user_id)
+            .order_by(Order.id, OrderItem.id)
+            .execution_options(yield_per=settings.export_batch_size)
+        )
+        async with AsyncSession(
+            self.session.bind, sync_session_class=self.session.sync_session_class
+        ) as session:
+            result = await session.stream(stmt)
+            current: dict[str, Any] | None = None
+            async for partition in result.mappings().partitions():
+                lines = [self._export_line(row) for row in partition]
+                if fmt == "csv":
+                    yield lines
+                    continue
+                done = []
+                for line in lines:
+                    if current is None or current["id"] != line["order_id"]:
+                        if current is not None:
+                            done.append(current)
+                        current = {
+                            "id": line["order_id"],
+                            "status": line["status"],
+                            "subtotal": line["subtotal"],
+                            "created_at": line["created_at"],
+                            "items": [],
+                        }
+                    current["items"].append({field: line[field] for field in EXPORT_CSV_FIELDS[4:]})
+                yield done
+            if current is not None:
+                yield [current]
+
+    @staticmethod
+    def _export_line(row) -> dict[str, Any]:
+        # same representation as OrderOut (floats for money, enum values)
+        unit_price = float(row["unit_price"])
+        return {
+            "order_id": row["order_id"],
+            "status": OrderStatus(row["status"]).value,
+            "subtotal": float(row["subtotal"]),
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "product_id": row["product_id"],
+            "quantity": row["quantity"],
+            "unit_price": unit_price,
+            "line_total": unit_price * row["quantity"],
+        }
 
     async def update_order_status(
         self,
@@ -131,27 +610,26 @@ class OrderService:
         order_id: int,
         status: OrderStatus,
     ) -> OrderOut:
-        stmt = (
-            select(Order)
-            .where(Order.id == order_id, Order.user_id == user_id)
-            .options(selectinload(Order.items))
-        )
-
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(_ORDER_WITH_ITEMS, await self._owned(order_id, user_id))
         order = result.scalar_one_or_none()
         if not order:
             raise ValueError("Order not found")
+        await self._with_items([order])
 
         if order.status in (OrderStatus.CANCELED, OrderStatus.COMPLETED):
             raise ValueError(f"Order already {order.status}, cannot change status")
 
-        # apply change
-        order.status = status
-
-        # persist without closing the outer transaction
-        await self.session.flush()
-
-        # pull server-side updates (e.g., updated_at onupdate=func.now())
-        await self.session.refresh(order)
+        # persist without closing the outer transaction; the response needs none of the
+        # server-generated columns, so the row is not refreshed
+        await self.session.execute(
+            _SET_STATUS,
+            {
+                "order_id": order.id,
+                "in_archive": order.archived,
+                "order_created_at": order.created_at,
+                "new_status": status,
+            },
+        )
+        set_committed_value(order, "status", status)
 
         return self._build_order_out(order)
@@ -0,0 +1,101 @@
+"""
+Listing cache in front of ProductService.list_products.
+
+One bounded TTL/LRU cache per database engine, keyed by the listing parameters, plus the
+listing validator (ETag inputs) cached with the same TTL. Each cached page keeps the
+validator read just before it and its responses carry that one, so a page served stale
+never gets a newer ETag that a later 304 would confirm. ORM writes to Product rows clear
+both (and the in-process search indexes) once their transaction commits; code that changes
+products through Core statements calls `invalidate_product_cache()` itself.
+
+Other workers hear about those writes through app.shared.invalidation: ORM writes publish
+`product:*` and stock updates `stock:<ids>`, which drops only the pages listing those
+products (plus the validator, since updated_at moved).
+
+Hit/miss counters of both caches are exported at GET /metrics and GET /internal/caches.
+"""
+
+import weakref
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.product.model import Product
+from app.modules.product.search import invalidate_search_indexes
+from app.shared.cache import TTLCache, register_caches
+from app.shared.config import settings
+from app.shared.counting import invalidate_counts
+from app.shared.invalidation import publish, register_handler
+
+_page_caches: "weakref.WeakKeyDictionary[object, TTLCache[Any]]" = weakref.WeakKeyDictionary()
+
+_validator_caches: "weakref.WeakKeyDictionary[object, TTLCache[Any]]" = weakref.WeakKeyDictionary()
+
+
+def get_product_page_cache(bind) -> TTLCache[Any] | None:
+    if not settings.product_cache_enabled:
+        return None
+    cache = _page_caches.get(bind)
+    if cache is None:
+        cache = _page_caches[bind] = TTLCache(
+            maxsize=settings.product_cache_maxsize,
+            ttl=settings.product_cache_ttl_seconds,
+            stale_ttl=settings.product_cache_stale_seconds,
+        )
+    return cache
+
+
+def get_product_validator_cache(bind) -> TTLCache[Any] | None:
+    if not settings.product_cache_enabled:
+        return None
+    cache = _validator_caches.get(bind)
+    if cache is None:
+        cache = _validator_caches[bind] = TTLCache(
+            maxsize=1, ttl=settings.product_cache_ttl_seconds
+        )
+    return cache
+
+
+def invalidate_product_cache() -> None:
+    for cache in chain(list(_page_caches.values()), list(_validator_caches.values())):
+        cache.clear()
+    invalidate_search_indexes()
+    invalidate_counts(Product.__tablename__)
+
+
+def invalidate_product_stock(product_ids: set[str] | None) -> None:
+    """Drop the cached pages that list any of `product_ids` (as strings; None: everything)."""
+    if product_ids is None:
+        invalidate_product_cache()
+        return
+    ids = {int(pid) for pid in product_ids}
+    for cache in list(_page_caches.values()):
+        cache.pop_matching(lambda listed: any(product.id in ids for product in listed.page.data))
+    for cache in list(_validator_caches.values()):
+        cache.clear()
+
+
+register_handler("product", lambda _keys: invalidate_product_cache())
+register_caches("product_pages", lambda: list(_page_caches.values()))
+register_caches("product_validator", lambda: list(_validator_caches.values()))
+register_handler("stock", invalidate_product_stock)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_product_writes(session: Session, _flush_context) -> None:
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["products_written"] = True
+        publish(session, "product")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop("products_written", False):
+        invalidate_product_cache()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop("products_written", None)
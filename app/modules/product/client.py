@@ -1,11 +1,23 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.product.schemas import ProductPage
-from app.modules.product.service import ProductService, SortField, SortOrder
+from app.shared.export import ExportFormat
+from app.modules.product.service import (
+    ListedPage,
+    ListingVersion,
+    ProductService,
+    SortField,
+    SortOrder,
+)
 
 
 class ProductClientInterface(ABC):
+    @abstractmethod
+    async def listing_validator(self) -> ListingVersion:
+        pass
+
     @abstractmethod
     async def list_products(
         self,
@@ -14,14 +26,34 @@ class ProductClientInterface(ABC):
         q: str | None = None,
         sort: SortField = "name",
         order: SortOrder = "asc",
+        cursor: str | None = None,
     ) -> ProductPage:
         pass
 
+    @abstractmethod
+    async def list_products_with_version(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        q: str | None = None,
+        sort: SortField = "name",
+        order: SortOrder = "asc",
+        cursor: str | None = None,
+    ) -> ListedPage:
+        pass
+
+    @abstractmethod
+    def export_products(self, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        pass
+
 
 class ProductClient(ProductClientInterface):
     def __init__(self, db_session: AsyncSession):
         self.product_service = ProductService(db_session)
 
+    async def listing_validator(self) -> ListingVersion:
+        return await self.product_service.listing_validator()
+
     async def list_products(
         self,
         page: int = 1,
@@ -29,7 +61,24 @@ class ProductClient(ProductClientInterface):
         q: str | None = None,
         sort: SortField = "name",
         order: SortOrder = "asc",
+        cursor: str | None = None,
     ) -> ProductPage:
         return await self.product_service.list_products(
-            page=page, page_size=page_size, q=q, sort=sort, order=order
+            page=page, page_size=page_size, q=q, sort=sort, order=order, cursor=cursor
+        )
+
+    async def list_products_with_version(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        q: str | None = None,
+        sort: SortField = "name",
+        order: SortOrder = "asc",
+        cursor: str | None = None,
+    ) -> ListedPage:
+        return await self.product_service.list_products_with_version(
+            page=page, page_size=page_size, q=q, sort=sort, order=order, cursor=cursor
         )
+
+    def export_products(self, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        return self.product_service.export_products(fmt)
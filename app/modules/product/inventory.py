@@ -0,0 +1,193 @@
+"""
+In-memory inventory for designated hot products, written behind to `products.stock`.
+
+During flash sales most checkouts hit a handful of products and every stock UPDATE queues on
+the same row. With the engine enabled, reservations for `settings.hot_product_ids` are
+checked and applied against in-process counters (sharded, one lock per shard) and the
+order_items rows are written with `stock_applied = false`. A background flusher then
+flips those rows and subtracts their quantities from `products.stock` in one transaction.
+That makes the flush exactly-once, and after a crash the counters are rebuilt as
+`stock - unapplied quantities`.
+
+The counters are authoritative for the process that holds them, so enable the engine in
+exactly one process per database (e.g. the worker that checkout traffic is pinned to).
+"""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Callable
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.product.model import Product
+from app.shared.config import settings
+from app.shared.invalidation import publish
+from app.shared.transaction import on_outcome
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    __slots__ = ("lock", "available")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.available: dict[int, int] = {}
+
+
+class HotInventory:
+    def __init__(self, product_ids: list[int], shards: int = 16):
+        self.product_ids = frozenset(product_ids)
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._task: asyncio.Task | None = None
+
+    def _shard(self, product_id: int) -> _Shard:
+        return self._shards[product_id % len(self._shards)]
+
+    def owns(self, product_id: int) -> bool:
+        return product_id in self.product_ids
+
+    def available(self, product_id: int) -> int:
+        return self._shard(product_id).available.get(product_id, 0)
+
+    def reserve(self, quantities: dict[int, int]) -> list[int]:
+        """
+        Take every quantity or none of them. Returns the ids that lacked stock (empty on
+        success). Shard locks are taken in index order so multi-product reservations from
+        different threads cannot deadlock.
+        """
+        shards = [self._shards[i] for i in sorted({pid % len(self._shards) for pid in quantities})]
+        for shard in shards:
+            shard.lock.acquire()
+        try:
+            short = [
+                pid
+                for pid, qty in quantities.items()
+                if self._shard(pid).available.get(pid, 0) < qty
+            ]
+            if not short:
+                for pid, qty in quantities.items():
+                    self._shard(pid).available[pid] -= qty
+            return short
+        finally:
+            for shard in reversed(shards):
+                shard.lock.release()
+
+    def release(self, quantities: dict[int, int]) -> None:
+        for pid, qty in quantities.items():
+            shard = self._shard(pid)
+            with shard.lock:
+                shard.available[pid] = shard.available.get(pid, 0) + qty
+
+    async def recover(self, session: AsyncSession) -> None:
+        """Rebuild the counters from `products.stock` minus not yet applied order lines."""
+        from app.modules.order.model import OrderItem
+
+        unapplied = (
+            select(OrderItem.product_id, func.sum(OrderItem.quantity).label("qty"))
+            .where(OrderItem.stock_applied.is_(False))
+            .group_by(OrderItem.product_id)
+            .subquery()
+        )
+        rows = (
+            await session.execute(
+                select(Product.id, Product.stock - func.coalesce(unapplied.c.qty, 0))
+                .outerjoin(unapplied, unapplied.c.product_id == Product.id)
+                .where(Product.id.in_(self.product_ids))
+            )
+        ).all()
+        for pid, available in rows:
+            shard = self._shard(pid)
+            with shard.lock:
+                shard.available[pid] = max(0, available or 0)
+
+    async def flush(self, session: AsyncSession) -> int:
+        """
+        Apply pending order lines to `products.stock` in one transaction. Returns the number of
+        order lines applied.
+        """
+        from app.modules.order.model import OrderItem
+
+        async with session.begin():
+            applied = (
+                await session.execute(
+                    update(OrderItem)
+                    .where(OrderItem.stock_applied.is_(False))
+                    .values(stock_applied=True)
+                    .returning(OrderItem.product_id, OrderItem.quantity)
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            deltas: dict[int, int] = {}
+            for pid, qty in applied:
+                deltas[pid] = deltas.get(pid, 0) + qty
+            if deltas:
+                delta = case(deltas, value=Product.id)
+                await session.execute(
+                    update(Product)
+                    .where(Product.id.in_(sorted(deltas)))
+                    .values(stock=Product.stock - delta)
+                    .execution_options(synchronize_session=False)
+                )
+                publish(session, "stock", deltas)
+        return len(applied)
+
+    async def _flush_loop(self, session_factory: Callable[[], AsyncSession], interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.flush(session)
+            except Exception:
+                # lines stay unapplied and are picked up by the next flush
+                logger.exception("Hot inventory flush failed")
+
+    async def start(self, session_factory: Callable[[], AsyncSession], interval: float) -> None:
+        async with session_factory() as session:
+            await self.flush(session)
+        async with session_factory() as session:
+            await self.recover(session)
+        self._task = asyncio.create_task(self._flush_loop(session_factory, interval))
+
+    async def stop(self, session_factory: Callable[[], AsyncSession]) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        async with session_factory() as session:
+            await self.flush(session)
+
+
+_hot_inventory: HotInventory | None = None
+
+
+def get_hot_inventory() -> HotInventory | None:
+    return _hot_inventory
+
+
+def install_hot_inventory(inventory: HotInventory | None) -> None:
+    global _hot_inventory
+    _hot_inventory = inventory
+
+
+async def start_hot_inventory(session_factory: Callable[[], AsyncSession]) -> None:
+    if not settings.hot_inventory_enabled or not settings.hot_product_ids:
+        return
+    inventory = HotInventory(settings.hot_product_ids, shards=settings.hot_inventory_shards)
+    await inventory.start(session_factory, settings.hot_inventory_flush_seconds)
+    install_hot_inventory(inventory)
+
+
+async def stop_hot_inventory(session_factory: Callable[[], AsyncSession]) -> None:
+    inventory = get_hot_inventory()
+    if inventory is not None:
+        install_hot_inventory(None)
+        await inventory.stop(session_factory)
+
+
+def track_reservation(session: AsyncSession, quantities: dict[int, int]) -> None:
+    """Give `quantities` back if the current transaction (or savepoint) rolls back."""
+    inventory = get_hot_inventory()
+    if inventory is not None:
+        on_outcome(session, on_rollback=lambda: inventory.release(quantities))
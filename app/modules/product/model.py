@@ -7,7 +7,27 @@ from app.shared.db import BaseModel
 
 class Product(BaseModel):
     __tablename__ = "products"
-    __table_args__ = (Index("ix_product_name", "name"),)
+    __table_args__ = (
+        Index("ix_product_name", "name"),
+        # keyset pagination seeks on (sort_col, id)
+        Index("ix_product_name_id", "name", "id"),
+        Index("ix_product_price_id", "price", "id"),
+        # listing ETag: max(updated_at)
+        Index("ix_product_updated_at", "updated_at"),
+        # pg_trgm GIN indexes serve ILIKE '%q%' and similarity ranking for search
+        Index(
+            "ix_product_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_product_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(100))
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Literal
 
-SortField = Literal["name", "price"]
+from app.shared.responses import EncodeOnceModel
+
+SortField = Literal["name", "price", "relevance"]
 SortOrder = Literal["asc", "desc"]
 
 
@@ -17,12 +19,17 @@ class ProductOut(BaseModel):
 
 
 class PaginationMeta(BaseModel):
-    page: int = Field(ge=1)
+    # page/total/pages are only filled in page-number mode; cursor mode skips the count
+    page: int | None = Field(default=None, ge=1)
     page_size: int = Field(ge=1, le=200)
-    total: int
-    pages: int
+    total: int | None = None
+    total_exact: bool = False  # False when total is cached, estimated or skipped
+    pages: int | None = None
+    has_next: bool = False
+    next_cursor: str | None = None
 
 
-class ProductPage(BaseModel):
+class ProductPage(EncodeOnceModel):
+    # pages are shared through the listing cache and never mutated
     data: List[ProductOut]
     meta: PaginationMeta
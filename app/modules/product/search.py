@@ -0,0 +1,213 @@
+"""
+Search backends behind the `q` parameter of GET /products.
+
+PostgreSQL filters with ILIKE over name and description, which the pg_trgm GIN indexes
+serve, and ranks by trigram word similarity. Other dialects (SQLite in tests and local
+setups) use an in-process trigram inverted index built from the products table.
+"""
+
+import re
+import time
+import weakref
+from abc import ABC, abstractmethod
+
+from sqlalchemy import case, false, func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from app.modules.product.model import Product
+from app.shared.config import settings
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _grams(text: str) -> set[str]:
+    """Raw 3-character substrings; every substring of length >= 3 shares all of them."""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: each lowercased word padded with two leading, one trailing space."""
+    grams: set[str] = set()
+    for word in _WORD_RE.findall(text.lower()):
+        grams |= _grams(f"  {word} ")
+    return grams
+
+
+def trigram_similarity(a: set[str], b: set[str]) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class SearchBackend(ABC):
+    async def prepare(self, session: AsyncSession) -> None:
+        """Hook for backends that need to load state before building expressions."""
+        return None
+
+    @abstractmethod
+    def condition(self, q: str) -> ColumnElement[bool]:
+        pass
+
+    @abstractmethod
+    def rank(self, q: str) -> ColumnElement[float]:
+        pass
+
+    def ordered_ids(
+        self, q: str, sort: str, order: str, after: tuple | None = None
+    ) -> list[int] | None:
+        """
+        Backends that resolve the whole match list in-process return it here, already sorted
+        (and past the `after` keyset position); the service then only fetches the page rows.
+        """
+        return None
+
+
+class TrigramSearchBackend(SearchBackend):
+    """PostgreSQL + pg_trgm; see migration b7d93e15a2c4 for the GIN indexes."""
+
+    def condition(self, q: str) -> ColumnElement[bool]:
+        pattern = f"%{q}%"
+        return or_(Product.name.ilike(pattern), Product.description.ilike(pattern))
+
+    def rank(self, q: str) -> ColumnElement[float]:
+        # a hit in the name counts double compared to one in the description
+        return 2 * func.word_similarity(q, Product.name) + func.word_similarity(
+            q, Product.description
+        )
+
+
+class InMemorySearchIndex(SearchBackend):
+    """
+    Trigram inverted index over lowercased `name + description`.
+
+    Candidates are the intersection of the query's trigram posting lists, then confirmed
+    with a substring check so results match ILIKE '%q%'. The index is rebuilt lazily when
+    the products table changes (row count, max id or max updated_at, re-checked at most
+    every `recheck_interval` seconds) or right after `invalidate()`.
+    """
+
+    recheck_interval = 5.0
+
+    def __init__(self) -> None:
+        self._postings: dict[str, set[int]] = {}
+        # id -> (lowercased text, name, price, name word trigrams, description word trigrams)
+        self._docs: dict[int, tuple[str, str, float, set[str], set[str]]] = {}
+        self._version: tuple | None = None
+        self._checked_at = 0.0
+        self._last: tuple[str, list[int]] | None = None  # count + page reuse one lookup
+
+    def invalidate(self) -> None:
+        self._version = None
+
+    async def prepare(self, session: AsyncSession) -> None:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.recheck_interval:
+            return
+        self._checked_at = now
+        version = tuple(
+            (
+                await session.execute(
+                    select(func.count(), func.max(Product.id), func.max(Product.updated_at))
+                )
+            ).one()
+        )
+        if version == self._version:
+            return
+        rows = (
+            await session.execute(
+                select(Product.id, Product.name, Product.description, Product.price)
+            )
+        ).all()
+        self.build(rows)
+        self._version = version
+
+    def build(self, rows) -> None:
+        postings: dict[str, set[int]] = {}
+        docs = {}
+        for pid, name, description, price in rows:
+            name, description = name or "", description or ""
+            text = f"{name}\n{description}".lower()
+            docs[pid] = (text, name, price, word_trigrams(name), word_trigrams(description))
+            for gram in _grams(text):
+                postings.setdefault(gram, set()).add(pid)
+        self._postings, self._docs = postings, docs
+        self._last = None
+
+    def matches(self, q: str) -> list[int]:
+        """Ids of products whose name or description contains `q` (case-insensitive)."""
+        if self._last is not None and self._last[0] == q:
+            return self._last[1]
+        needle = q.lower()
+        grams = _grams(needle)
+        if grams:
+            lists = sorted((self._postings.get(g, set()) for g in grams), key=len)
+            candidates = set.intersection(*lists)
+        else:  # queries shorter than 3 characters cannot use the index
+            candidates = self._docs.keys()
+
+        docs = self._docs
+        ids = [pid for pid in candidates if needle in docs[pid][0]]
+        self._last = (q, ids)
+        return ids
+
+    def scores(self, q: str) -> dict[int, float]:
+        q_grams = word_trigrams(q)
+        docs = self._docs
+        return {
+            pid: 2 * trigram_similarity(q_grams, docs[pid][3])
+            + trigram_similarity(q_grams, docs[pid][4])
+            for pid in self.matches(q)
+        }
+
+    def ordered_ids(
+        self, q: str, sort: str, order: str, after: tuple | None = None
+    ) -> list[int] | None:
+        if sort == "relevance":
+            scores = self.scores(q)
+            return sorted(scores, key=lambda pid: (-scores[pid], pid))
+
+        column = 2 if sort == "price" else 1
+        docs = self._docs
+        keys = [(docs[pid][column], pid) for pid in self.matches(q)]
+        if after is not None:
+            keys = [k for k in keys if (k > after if order == "asc" else k < after)]
+        keys.sort(reverse=order == "desc")
+        return [pid for _, pid in keys]
+
+    def condition(self, q: str) -> ColumnElement[bool]:
+        ids = self.matches(q)
+        return Product.id.in_(ids) if ids else false()
+
+    def rank(self, q: str) -> ColumnElement[float]:
+        scores = self.scores(q)
+        if not scores:
+            return literal(0.0)
+        return case(scores, value=Product.id, else_=0.0)
+
+
+_trigram_backend = TrigramSearchBackend()
+_memory_indexes: "weakref.WeakKeyDictionary[object, InMemorySearchIndex]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_search_backend(session: AsyncSession) -> SearchBackend:
+    """
+    Pick the backend for the session's database (`settings.search_backend` overrides "auto").
+    """
+    backend = settings.search_backend
+    if backend == "auto":
+        backend = "trigram" if session.bind.dialect.name == "postgresql" else "memory"
+    if backend == "trigram":
+        return _trigram_backend
+
+    index = _memory_indexes.get(session.bind)
+    if index is None:
+        index = _memory_indexes[session.bind] = InMemorySearchIndex()
+    return index
+
+
+def invalidate_search_indexes() -> None:
+    """Force in-process indexes to rebuild on their next search."""
+    for index in list(_memory_indexes.values()):
+        index.invalidate()
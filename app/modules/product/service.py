@@ -1,30 +1,140 @@
+from datetime import datetime
 from math import ceil
-from sqlalchemy import select, func
+from typing import Any, AsyncIterator, NamedTuple
+from fastapi import HTTPException
+from sqlalchemy import Integer, bindparam, select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import Select
 
+from app.modules.product.cache import get_product_page_cache, get_product_validator_cache
 from app.modules.product.model import Product
 from app.modules.product.schemas import PaginationMeta, ProductPage, SortField, SortOrder
+from app.modules.product.search import SearchBackend, get_search_backend
+from app.shared.config import settings
+from app.shared.counting import CountStrategy, count_rows
+from app.shared.export import ExportFormat, encode_batches
+from app.shared.pagination import decode_cursor, encode_cursor
+
+EXPORT_FIELDS = ("id", "name", "description", "price", "stock", "updated_at")
+
+# Hot statements are built once and bound per call: a statement object that is executed
+# again keeps its memoized cache key and ORM compile state, so only the parameters are new
+# (see scripts/bench/sql_construction.py). Searches add a WHERE per query and stay dynamic.
+_LATEST_UPDATE = select(func.max(Product.updated_at))  # one probe of ix_products_updated_at
+_COUNT_ALL = select(func.count()).select_from(Product)
+_BY_IDS = select(Product).where(Product.id.in_(bindparam("ids", expanding=True)))
+_LIMIT = bindparam("limit", type_=Integer)
+_OFFSET = bindparam("offset", type_=Integer)
+
+
+class ListingVersion(NamedTuple):
+    """Changes whenever a product row is inserted, updated or deleted."""
+
+    updated_at: datetime | None  # newest row; also the listing's Last-Modified
+    total: int | None  # deletes leave the newest row alone but change the count
+
+
+class ListedPage(NamedTuple):
+    page: ProductPage
+    version: ListingVersion | None  # read just before the page; None without the page cache
 
 
 class ProductService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @staticmethod
+    def _sort_column(sort: SortField):
+        return Product.price if sort == "price" else Product.name
+
+    @classmethod
+    def _ordered(cls, stmt: Select, sort: SortField, order: SortOrder) -> Select:
+        # (sort_col, id) in the same direction so both modes walk the composite index
+        sort_col = cls._sort_column(sort)
+        if order == "asc":
+            return stmt.order_by(sort_col.asc(), Product.id.asc())
+        return stmt.order_by(sort_col.desc(), Product.id.desc())
+
+    async def _search_backend(self, q: str | None) -> SearchBackend | None:
+        if not q:
+            return None
+        backend = get_search_backend(self.session)
+        await backend.prepare(self.session)
+        return backend
+
     def _apply_filters_sort(
         self,
         stmt: Select,
         q: str | None,
         sort: SortField,
         order: SortOrder,
+        search: SearchBackend | None = None,
     ) -> Select:
-        if q:
-            stmt = stmt.where(Product.name.ilike(f"%{q}%"))
-        sort_col = Product.name if sort == "name" else Product.price
-        stmt = stmt.order_by(
-            sort_col.asc() if order == "asc" else sort_col.desc(), Product.id.asc()
+        if search and q:
+            stmt = stmt.where(search.condition(q))
+            if sort == "relevance":
+                # best match first regardless of `order`
+                return stmt.order_by(search.rank(q).desc(), Product.id.asc())
+        return self._ordered(stmt, sort, order)
+
+    @staticmethod
+    def _decode_position(cursor: str, sort: SortField, order: SortOrder) -> tuple:
+        if sort == "relevance":
+            raise HTTPException(
+                status_code=400, detail="Cursor pagination is not supported for sort=relevance"
+            )
+        try:
+            position = decode_cursor(cursor)
+            if position.get("s") != sort or position.get("o") != order:
+                raise ValueError("Cursor does not match sort/order")
+            value, last_id = position["v"], int(position["id"])
+            if not isinstance(value, str if sort == "name" else (int, float)):
+                raise ValueError("Cursor value has the wrong type")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+        return value, last_id
+
+    @classmethod
+    def _apply_seek(cls, stmt: Select, sort: SortField, order: SortOrder) -> Select:
+        """Rows past the `after_value`, `after_id` keyset position bound at execution."""
+        sort_col = cls._sort_column(sort)
+        key = tuple_(sort_col, Product.id)
+        after = tuple_(
+            bindparam("after_value", type_=sort_col.type), bindparam("after_id", type_=Integer)
         )
-        return stmt
+        return stmt.where(key > after if order == "asc" else key < after)
+
+    @staticmethod
+    def _make_cursor(last: Product, sort: SortField, order: SortOrder) -> str:
+        value = last.price if sort == "price" else last.name
+        return encode_cursor({"s": sort, "o": order, "v": value, "id": last.id})
+
+    async def listing_validator(self) -> ListingVersion:
+        """
+        The newest updated_at plus the row count, standing in for every listing page in ETag
+        checks. The count comes from the shared count cache (one COUNT per TTL) or the
+        planner estimate.
+        """
+        cache = get_product_validator_cache(self.session.bind)
+        if cache is None:
+            return await self._listing_validator()
+        return await cache.get_or_load("products", self._listing_validator)
+
+    async def _listing_validator(self) -> ListingVersion:
+        updated_at = await self.session.scalar(_LATEST_UPDATE)
+        return ListingVersion(updated_at, await self._listing_total(None))
+
+    async def _listing_total(self, total: int | None) -> int | None:
+        if total is not None:
+            return total
+        strategy = settings.product_count_strategy
+        counted = await count_rows(
+            self.session,
+            _COUNT_ALL,
+            strategy="estimated" if strategy in ("estimated", "none") else "cached",
+            table=Product.__tablename__,
+        )
+        return counted.total
 
     async def list_products(
         self,
@@ -34,29 +144,260 @@ class ProductService:
         q: str | None = None,
         sort: SortField = "name",
         order: SortOrder = "asc",
+        cursor: str | None = None,
+        count: CountStrategy | None = None,
+    ) -> ProductPage:
+        listed = await self.list_products_with_version(
+            page=page, page_size=page_size, q=q, sort=sort, order=order, cursor=cursor, count=count
+        )
+        return listed.page
+
+    async def list_products_with_version(
+        self,
+        *,
+        page: int = 1,
+        page_size: int = 20,
+        q: str | None = None,
+        sort: SortField = "name",
+        order: SortOrder = "asc",
+        cursor: str | None = None,
+        count: CountStrategy | None = None,
+    ) -> ListedPage:
+        """
+        The page plus the listing validator it was cached with. A cached page, above all one
+        served stale, may be older than the current validator, so its ETag has to come from
+        the validator stored with it.
+        """
+        params = dict(
+            page=page, page_size=page_size, q=q, sort=sort, order=order, cursor=cursor, count=count
+        )
+        cache = get_product_page_cache(self.session.bind)
+        if cache is None:
+            return ListedPage(await self._list_products(**params), None)
+
+        async def refresh() -> ListedPage:
+            # runs after this request's session is gone, so it opens its own
+            async with AsyncSession(self.session.bind, expire_on_commit=False) as session:
+                return await ProductService(session)._load_listing(params)
+
+        return await cache.get_or_load(
+            tuple(params.values()), lambda: self._load_listing(params), refresher=refresh
+        )
+
+    async def _load_listing(self, params: dict[str, Any]) -> ListedPage:
+        # the validator is read before the page, so it is never newer than the page it labels
+        validators = get_product_validator_cache(self.session.bind)
+        generation = validators.generation
+        version = validators.get("products")
+        updated_at = version.updated_at if version else await self.session.scalar(_LATEST_UPDATE)
+        page = await self._list_products(**params)
+        if version is None:
+            # seed the cached validator; an exact unfiltered count comes with the page
+            exact = params["q"] is None and params["cursor"] is None and page.meta.total_exact
+            version = ListingVersion(
+                updated_at, await self._listing_total(page.meta.total if exact else None)
+            )
+            if validators.generation == generation:
+                validators.set("products", version)
+        return ListedPage(page, version)
+
+    async def _list_products(
+        self,
+        *,
+        page: int,
+        page_size: int,
+        q: str | None,
+        sort: SortField,
+        order: SortOrder,
+        cursor: str | None,
+        count: CountStrategy | None,
     ) -> ProductPage:
+        if sort == "relevance" and not q:
+            sort = "name"
+        search = await self._search_backend(q)
+        position = self._decode_position(cursor, sort, order) if cursor is not None else None
+
+        if search and q:
+            ordered_ids = search.ordered_ids(q, sort, order, after=position)
+            if ordered_ids is not None:
+                return await self._list_ordered_ids(
+                    ordered_ids,
+                    page=page,
+                    page_size=page_size,
+                    sort=sort,
+                    order=order,
+                    keyset=position is not None,
+                )
+
+        if position is not None:
+            return await self._list_products_after(
+                position=position, page_size=page_size, q=q, sort=sort, order=order, search=search
+            )
+
         # count
-        count_stmt = select(func.count()).select_from(Product)
-        if q:
-            count_stmt = count_stmt.where(Product.name.ilike(f"%{q}%"))
-        total = (await self.session.execute(count_stmt)).scalar_one()
+        count_stmt = _COUNT_ALL
+        if search and q:
+            count_stmt = count_stmt.where(search.condition(q))
+        counted = await count_rows(
+            self.session,
+            count_stmt,
+            strategy=count or settings.product_count_strategy,
+            table=Product.__tablename__,
+            filter_key=q or None,
+        )
+        total = counted.total
 
-        pages = max(1, ceil(total / page_size)) if total else 1
-        page = max(1, min(page, pages))  # clamp
+        pages = None
+        if total is not None:
+            pages = max(1, ceil(total / page_size)) if total else 1
+            if counted.exact:
+                page = max(1, min(page, pages))  # clamp
 
-        # page query
-        stmt = select(Product)
-        stmt = self._apply_filters_sort(stmt, q, sort, order)
-        stmt = stmt.limit(page_size).offset((page - 1) * page_size)
+        # page query; one extra row tells us whether there is a next page
+        if search and q:
+            stmt = self._apply_filters_sort(select(Product), q, sort, order, search)
+            stmt = stmt.limit(_LIMIT).offset(_OFFSET)
+        else:
+            stmt = _PAGE[sort, order]
+        bounds = {"limit": page_size + 1, "offset": (page - 1) * page_size}
 
-        rows = list((await self.session.execute(stmt)).scalars().all())
+        rows = list((await self.session.execute(stmt, bounds)).scalars().all())
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = None
+        if has_next and sort != "relevance":
+            next_cursor = self._make_cursor(rows[-1], sort, order)
 
         return ProductPage(
             data=rows,
             meta=PaginationMeta(
                 total=total,
+                total_exact=counted.exact,
                 page=page,
                 pages=pages,
                 page_size=page_size,
+                has_next=has_next,
+                next_cursor=next_cursor,
             ),
         )
+
+    async def _list_products_after(
+        self,
+        *,
+        position: tuple,
+        page_size: int,
+        q: str | None,
+        sort: SortField,
+        order: SortOrder,
+        search: SearchBackend | None,
+    ) -> ProductPage:
+        """
+        Keyset mode: seek past the cursor position instead of OFFSET, no count query.
+        """
+        if search and q:
+            stmt = self._apply_seek(select(Product), sort, order)
+            stmt = self._apply_filters_sort(stmt, q, sort, order, search).limit(_LIMIT)
+        else:
+            stmt = _SEEK[sort, order]
+        # one extra row tells us whether there is a next page
+        params = {"limit": page_size + 1, "after_value": position[0], "after_id": position[1]}
+
+        rows = list((await self.session.execute(stmt, params)).scalars().all())
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        return ProductPage(
+            data=rows,
+            meta=PaginationMeta(
+                page_size=page_size,
+                has_next=has_next,
+                next_cursor=self._make_cursor(rows[-1], sort, order) if has_next else None,
+            ),
+        )
+
+    async def _list_ordered_ids(
+        self,
+        ordered_ids: list[int],
+        *,
+        page: int,
+        page_size: int,
+        sort: SortField,
+        order: SortOrder,
+        keyset: bool,
+    ) -> ProductPage:
+        """
+        The search backend already filtered and sorted every match; only load the page rows.
+        """
+        if keyset:
+            page_ids = ordered_ids[:page_size]
+            has_next = len(ordered_ids) > page_size
+        else:
+            total = len(ordered_ids)
+            pages = max(1, ceil(total / page_size)) if total else 1
+            page = max(1, min(page, pages))  # clamp
+            page_ids = ordered_ids[(page - 1) * page_size : page * page_size]
+            has_next = page < pages
+
+        rows = []
+        if page_ids:
+            loaded = (await self.session.execute(_BY_IDS, {"ids": page_ids})).scalars().all()
+            by_id = {p.id: p for p in loaded}
+            rows = [by_id[pid] for pid in page_ids if pid in by_id]
+
+        next_cursor = None
+        if rows and has_next and sort != "relevance":
+            next_cursor = self._make_cursor(rows[-1], sort, order)
+
+        if keyset:
+            meta = PaginationMeta(page_size=page_size, has_next=has_next, next_cursor=next_cursor)
+        else:
+            meta = PaginationMeta(
+                total=total,
+                total_exact=True,
+                page=page,
+                pages=pages,
+                page_size=page_size,
+                has_next=has_next,
+                next_cursor=next_cursor,
+            )
+        return ProductPage(data=rows, meta=meta)
+
+    def export_products(self, fmt: ExportFormat) -> AsyncIterator[bytes]:
+        """The whole catalog in id order, streamed (see app.shared.export)."""
+        return encode_batches(self._export_batches(), fmt, EXPORT_FIELDS)
+
+    async def _export_batches(self) -> AsyncIterator[list[dict[str, Any]]]:
+        # the stream outlives the request handler, so it owns a session (routed like the
+        # request's, so exports read from a replica when there is one); plain columns
+        # instead of entities keep the identity map from growing with the export
+        columns = [getattr(Product, field) for field in EXPORT_FIELDS]
+        async with AsyncSession(
+            self.session.bind, sync_session_class=self.session.sync_session_class
+        ) as session:
+            result = await session.stream(
+                select(*columns)
+                .order_by(Product.id)
+                .execution_options(yield_per=settings.export_batch_size)
+            )
+            async for partition in result.mappings().partitions():
+                yield [
+                    {**row, "updated_at": row["updated_at"] and row["updated_at"].isoformat()}
+                    for row in partition
+                ]
+
+
+# unfiltered page and keyset statements for every (sort, order); relevance needs a query
+_PAGE = {
+    (sort, order): ProductService._ordered(select(Product), sort, order)
+    .limit(_LIMIT)
+    .offset(_OFFSET)
+    for sort in ("name", "price")
+    for order in ("asc", "desc")
+}
+_SEEK = {
+    (sort, order): ProductService._ordered(
+        ProductService._apply_seek(select(Product), sort, order), sort, order
+    ).limit(_LIMIT)
+    for sort in ("name", "price")
+    for order in ("asc", "desc")
+}
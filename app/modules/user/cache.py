@@ -0,0 +1,114 @@
+"""
+Caches behind `get_current_user`.
+
+- verified tokens: token -> decoded claims, kept until the token's `exp` at the latest
+- users: id -> public columns of the row, per database engine
+
+ORM writes to User rows evict those users once their transaction commits, and publish
+`user:<ids>` so other workers evict them too (see app.shared.invalidation); anything else
+that changes users calls `invalidate_user()` itself.
+"""
+
+import time
+import weakref
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.user.model import User
+from app.shared.cache import TTLCache
+from app.shared.config import settings
+from app.shared.invalidation import publish, register_handler
+
+# never cached, so a snapshot can't be mistaken for a row that can verify passwords
+_USER_FIELDS = ("id", "name", "email", "created_at", "updated_at")
+
+_token_cache: TTLCache[dict[str, Any]] = TTLCache(
+    maxsize=settings.auth_cache_maxsize, ttl=settings.auth_cache_ttl_seconds
+)
+_user_caches: "weakref.WeakKeyDictionary[object, TTLCache[dict[str, Any]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_cached_claims(token: str) -> dict[str, Any] | None:
+    if not settings.auth_cache_enabled:
+        return None
+    return _token_cache.get(token)
+
+
+def cache_claims(token: str, claims: dict[str, Any]) -> None:
+    if not settings.auth_cache_enabled:
+        return
+    remaining = float(claims.get("exp", 0)) - time.time()
+    if remaining > 0:
+        _token_cache.set(token, claims, ttl=min(settings.auth_cache_ttl_seconds, remaining))
+
+
+def _user_cache(bind) -> TTLCache[dict[str, Any]]:
+    cache = _user_caches.get(bind)
+    if cache is None:
+        cache = _user_caches[bind] = TTLCache(
+            maxsize=settings.auth_cache_maxsize, ttl=settings.auth_cache_ttl_seconds
+        )
+    return cache
+
+
+def user_from_snapshot(data: dict[str, Any]) -> User:
+    """A transient (session-less) User carrying only the cached public columns."""
+    return User(**data)
+
+
+def get_cached_user(bind, user_id: str) -> User | None:
+    if not settings.auth_cache_enabled:
+        return None
+    data = _user_cache(bind).get(user_id)
+    return user_from_snapshot(data) if data is not None else None
+
+
+def cache_user(bind, user: User) -> None:
+    if settings.auth_cache_enabled:
+        _user_cache(bind).set(user.id, {f: getattr(user, f) for f in _USER_FIELDS})
+
+
+def invalidate_user(user_id: str) -> None:
+    for cache in list(_user_caches.values()):
+        cache.pop(user_id)
+
+
+def invalidate_all_users() -> None:
+    for cache in list(_user_caches.values()):
+        cache.clear()
+    _token_cache.clear()
+
+
+def _invalidate_users(user_ids: set[str] | None) -> None:
+    if user_ids is None:
+        invalidate_all_users()
+        return
+    for user_id in user_ids:
+        invalidate_user(user_id)
+
+
+register_handler("user", _invalidate_users)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_user_writes(session: Session, _flush_context) -> None:
+    changed = {obj.id for obj in chain(session.dirty, session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("users_written", set()).update(changed)
+        publish(session, "user", changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop("users_written", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop("users_written", None)
@@ -1,11 +1,20 @@
 from fastapi import HTTPException
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.modules.user.model import User
 from app.modules.user.schemas import LoginOut
-from app.shared.security import generate_access_token, hash_password, verify_password
+from app.shared.config import settings
+from app.shared.security import (
+    generate_access_token,
+    hash_password_async,
+    verify_password_async,
+)
+
+# built once and bound per call (see app.modules.product.service)
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
 
 
 class UserService:
@@ -13,20 +22,20 @@ class UserService:
         self.session = db_session
 
     async def get_user(self, user_id: str) -> User:
-        user = await self.session.scalar(select(User).where(User.id == user_id))
+        user = await self.session.scalar(USER_BY_ID, {"user_id": user_id})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         return user
 
     async def create_user(self, name: str, email: str, password: str) -> User:
-        existing = await self.session.scalar(select(User).where(User.email == email))
+        existing = await self.session.scalar(USER_BY_EMAIL, {"email": email})
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
 
         user = User(
             name=name,
             email=email,
-            password=hash_password(password),
+            password=await hash_password_async(password),
         )
 
         self.session.add(user)
@@ -36,10 +45,14 @@ class UserService:
         return user
 
     async def generate_access_token(self, email: str, password: str) -> LoginOut:
-        user = await self.session.scalar(select(User).where(User.email == email))
+        user = await self.session.scalar(USER_BY_EMAIL, {"email": email})
 
-        if not user or not verify_password(password, user.password):
+        if not user or not await verify_password_async(password, user.password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        token = generate_access_token(subject=user.id)
+        # signed name/email let get_current_user skip the DB when auth_trust_token_claims is on
+        claims = (
+            {"name": user.name, "email": user.email} if settings.auth_trust_token_claims else None
+        )
+        token = generate_access_token(subject=user.id, claims=claims)
         return LoginOut(access_token=token)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded in-process cache: LRU eviction plus a TTL, with stale-while-revalidate.
+
+    An entry is fresh for `ttl` seconds and may then be served stale for another
+    `stale_ttl` seconds while a single background refresh replaces it. Concurrent misses
+    for the same key share one load. `clear()` drops everything and makes loads that were
+    already running when it was called discard their result.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        # key -> (stored_at, ttl, value)
+        self._data: OrderedDict[Hashable, tuple[float, float, V]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._refreshing: set[Hashable] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def generation(self) -> int:
+        """Bumped by `clear()`; a value computed across a change of it may be stale."""
+        return self._generation
+
+    def lookup(self, key: Hashable) -> tuple[V, bool] | None:
+        """Return (value, is_fresh), or None when missing or past the stale window."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        stored_at, ttl, value = entry
+        age = self._clock() - stored_at
+        if age > ttl + self.stale_ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value, age <= ttl
+
+    def get(self, key: Hashable) -> V | None:
+        found = self.lookup(key)
+        return found[0] if found and found[1] else None
+
+    def set(self, key: Hashable, value: V, ttl: float | None = None) -> None:
+        """Store `value`; `ttl` overrides the cache-wide TTL for this entry."""
+        self._data[key] = (self._clock(), self.ttl if ttl is None else ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def keys(self) -> list[Hashable]:
+        return list(self._data)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[V], bool]) -> int:
+        """Drop the entries whose value matches; returns how many were dropped."""
+        matching = [key for key, (_, _, value) in self._data.items() if predicate(value)]
+        for key in matching:
+            del self._data[key]
+        return len(matching)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._generation += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[V]],
+        refresher: Callable[[], Awaitable[V]] | None = None,
+    ) -> V:
+        """
+        Serve `key` from the cache, calling `loader` on a miss. A stale hit is returned as-is
+        and `refresher` (which must not depend on the caller's request scope) runs once in the
+        background to replace it.
+        """
+        found = self.lookup(key)
+        if found is not None:
+            value, fresh = found
+            if fresh:
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+                if refresher is not None and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(key, refresher))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            return value
+
+        self.stats.misses += 1
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved; waiters re-raise it themselves
+            raise
+        else:
+            if generation == self._generation:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _refresh(self, key: Hashable, refresher: Callable[[], Awaitable[Any]]) -> None:
+        generation = self._generation
+        try:
+            value = await refresher()
+            if generation == self._generation:
+                self.set(key, value)
+            self.stats.refreshes += 1
+        except Exception:
+            self.stats.refresh_errors += 1
+            logger.exception("Background refresh failed for cache key %r", key)
+        finally:
+            self._refreshing.discard(key)
+
+
+# name -> the caches it covers (one per engine, say); exported at GET /metrics and
+# GET /internal/caches
+_registered: dict[str, Callable[[], Iterable[TTLCache]]] = {}
+
+
+def register_caches(name: str, caches: Callable[[], Iterable[TTLCache]]) -> None:
+    _registered[name] = caches
+
+
+def cache_snapshot() -> dict[str, dict[str, int]]:
+    """Entries and CacheStats counters per registered name, summed over its caches."""
+    snapshot = {}
+    for name, caches in _registered.items():
+        entry = {"entries": 0} | {field.name: 0 for field in fields(CacheStats)}
+        for cache in list(caches()):
+            entry["entries"] += len(cache)
+            for counter, value in asdict(cache.stats).items():
+                entry[counter] += value
+        snapshot[name] = entry
+    return snapshot
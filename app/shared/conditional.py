@@ -0,0 +1,76 @@
+"""
+Conditional GET helpers: ETag / Last-Modified validators and 304 Not Modified.
+
+If-None-Match wins over If-Modified-Since when both are sent (RFC 9110 section 13.2.2).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+
+
+def http_date(moment: datetime) -> str:
+    return format_datetime(_utc(moment).astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+
+
+def validator_headers(
+    etag: str, last_modified: datetime | None, cache_control: str = "no-cache"
+) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None,
+    cache_control: str = "no-cache",
+) -> Response | None:
+    """
+    A 304 response when the client's copy is current; otherwise None, after putting the
+    validators on `response` so the full answer carries them.
+    """
+    headers = validator_headers(etag, last_modified, cache_control)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,97 @@
+"""
+Total-count strategies for paginated listings.
+
+- exact:     run the COUNT(*) every time
+- cached:    COUNT(*) once per (table, filter) and reuse it for `count_cache_ttl_seconds`
+- estimated: planner row estimate from pg_class for unfiltered listings (cached otherwise)
+- none:      skip counting; pages only report `has_next`
+"""
+
+import weakref
+from dataclasses import dataclass
+from typing import Any, Hashable, Literal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.shared.cache import TTLCache
+from app.shared.config import settings
+
+CountStrategy = Literal["exact", "cached", "estimated", "none"]
+
+_count_caches: "weakref.WeakKeyDictionary[object, TTLCache[int]]" = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class PageCount:
+    total: int | None
+    exact: bool
+
+
+def _count_cache(bind) -> TTLCache[int]:
+    cache = _count_caches.get(bind)
+    if cache is None:
+        cache = _count_caches[bind] = TTLCache(
+            maxsize=settings.count_cache_maxsize, ttl=settings.count_cache_ttl_seconds
+        )
+    return cache
+
+
+def invalidate_counts(table: str, filter_key: Hashable | None = None) -> None:
+    """Drop cached totals for `table` (only the given filter when `filter_key` is passed)."""
+    for cache in list(_count_caches.values()):
+        if filter_key is not None:
+            cache.pop((table, filter_key))
+            continue
+        for key in [k for k in cache.keys() if k[0] == table]:
+            cache.pop(key)
+
+
+async def _estimate_rows(session: AsyncSession, table: str) -> int | None:
+    if session.bind.dialect.name != "postgresql":
+        return None
+    estimate = (
+        await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+            {"t": table},
+        )
+    ).scalar_one_or_none()
+    # -1 means the table was never vacuumed/analyzed
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+async def count_rows(
+    session: AsyncSession,
+    count_stmt: Select,
+    params: dict[str, Any] | None = None,
+    *,
+    strategy: CountStrategy,
+    table: str,
+    filter_key: Hashable = None,
+) -> PageCount:
+    """
+    Resolve the listing total with `strategy`. `filter_key` identifies the WHERE clause of
+    `count_stmt` (executed with `params`); None means the listing is unfiltered and may use
+    the planner estimate.
+    """
+    if strategy == "none":
+        return PageCount(total=None, exact=False)
+
+    if strategy == "estimated" and filter_key is None:
+        estimate = await _estimate_rows(session, table)
+        if estimate is not None:
+            return PageCount(total=estimate, exact=False)
+        strategy = "cached"
+
+    if strategy in ("cached", "estimated"):
+        cache = _count_cache(session.bind)
+        key = (table, filter_key)
+        cached = cache.get(key)
+        if cached is not None:
+            return PageCount(total=cached, exact=False)
+        total = (await session.execute(count_stmt, params)).scalar_one()
+        cache.set(key, total)
+        return PageCount(total=total, exact=True)
+
+    return PageCount(total=(await session.execute(count_stmt, params)).scalar_one(), exact=True)
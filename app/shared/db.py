@@ -1,14 +1,40 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.shared.config import settings
+from app.shared.pool import pool_options, register_pool
+from app.shared.replica import ReplicaSet, RoutingSession, install_replicas
+
+
+def connect_options(url: str) -> dict[str, Any]:
+    """create_async_engine() keyword arguments for the driver's connections."""
+    if make_url(url).get_driver_name() != "asyncpg":
+        return {}
+    cache_size = settings.db_prepared_statement_cache_size
+    return {"connect_args": {"prepared_statement_cache_size": cache_size}}
+
 
 engine = create_async_engine(
     settings.database_url,
     echo=False,
     future=True,
+    **pool_options("primary", settings.database_url),
+    **connect_options(settings.database_url),
 )
+register_pool("primary", engine)
+
+replica_engines = []
+for number, url in enumerate(settings.database_replica_urls, 1):
+    replica_engines.append(
+        create_async_engine(
+            url, echo=False, **pool_options(f"replica{number}", url), **connect_options(url)
+        )
+    )
+    register_pool(f"replica{number}", replica_engines[-1])
+if replica_engines:
+    install_replicas(ReplicaSet(replica_engines, max_lag=settings.replica_max_lag_seconds))
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -16,12 +42,26 @@ AsyncSessionLocal = async_sessionmaker(
     class_=AsyncSession,
 )
 
+# reads go to a replica while the session has not written (see app.shared.replica)
+ReadSessionLocal = async_sessionmaker(
+    engine,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+)
+
 
 class BaseModel(DeclarativeBase):
     pass
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def get_primary_session() -> AsyncGenerator[AsyncSession, None]:
+    """For anonymous routes that must see their own writes (no request user to pin reads)."""
     async with AsyncSessionLocal() as session:
         yield session
 
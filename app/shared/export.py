@@ -0,0 +1,55 @@
+"""
+Streaming exports.
+
+Services produce batches of plain records from a server-side cursor (`session.stream` with
+`yield_per`); this module encodes each batch as one NDJSON or CSV chunk for a
+StreamingResponse. Nothing holds more than one batch, so memory stays flat however many
+rows there are. Backpressure comes for free: the response awaits `send()` for every chunk,
+the server blocks that while the client's socket buffer is full, and the next batch is only
+fetched from the cursor when the generator is resumed.
+"""
+
+import csv
+import io
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _csv_chunk(rows: list[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def encode_batches(
+    batches: AsyncIterator[list[dict[str, Any]]], fmt: ExportFormat, fields: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """NDJSON: one JSON object per record. CSV: a header row, then `fields` of each record."""
+    if fmt == "csv":
+        yield _csv_chunk([fields])
+    async for batch in batches:
+        if not batch:
+            continue
+        if fmt == "csv":
+            yield _csv_chunk([[record[f] for f in fields] for record in batch])
+        else:
+            yield b"".join(to_json(record) + b"\n" for record in batch)
+
+
+def export_response(
+    chunks: AsyncIterator[bytes], fmt: ExportFormat, filename: str
+) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,269 @@
+"""
+Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Every worker keeps its own caches (product listings, users), so a write in one worker
+leaves the others serving stale entries. Writers queue what they changed with
+`publish(session, topic, keys)`. Right before the session commits, everything queued is
+sent as compact `pg_notify` payloads inside the same transaction. Listeners therefore
+hear about a change only once it is visible, and never about rolled-back ones. A payload
+looks like `product:*;stock:3,17;user:ab12`. `*` means every entry of the topic, and a
+topic with more than `invalidation_max_keys` keys collapses to `*`.
+
+Each worker runs one `InvalidationListener` on its own connection (outside the pool). It
+collects notifications for `invalidation_batch_seconds` and then calls each topic's
+handler once with the merged keys. NOTIFY has no replay, so whenever the listener
+(re)connects it calls every handler with None (drop everything): notifications sent
+while it was away are lost. It detects dead connections through asyncpg's termination
+callback and a `SELECT 1` every `invalidation_check_seconds`, and reconnects with
+backoff.
+
+Handlers run in every worker, the writer's included, so they must be idempotent. Other
+databases (SQLite in tests and local setups) have no NOTIFY; publishing is then a no-op.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+ALL = "*"
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+# keys to drop, or None for everything of the topic
+Handler = Callable[[set[str] | None], None]
+_handlers: dict[str, Handler] = {}
+
+_INFO_KEY = "cache_invalidations"
+
+
+def register_handler(topic: str, handler: Handler) -> None:
+    _handlers[topic] = handler
+
+
+def publish(session: Session, topic: str, keys: Iterable[Any] = (ALL,)) -> None:
+    """Queue an invalidation; it is NOTIFYed when the session's transaction commits."""
+    sync = getattr(session, "sync_session", session)
+    sync.info.setdefault(_INFO_KEY, {}).setdefault(topic, set()).update(map(str, keys))
+
+
+def _merge(into: dict[str, set[str] | None], topic: str, keys: set[str] | None) -> None:
+    if keys is None or ALL in keys:
+        into[topic] = None
+        return
+    current = into.setdefault(topic, set())
+    if current is not None:
+        current |= keys
+        if len(current) > settings.invalidation_max_keys:
+            into[topic] = None
+
+
+def encode(pending: dict[str, set[str] | None]) -> list[str]:
+    """`topic:key,key;topic:*` payloads, each under MAX_PAYLOAD_BYTES."""
+    parts = []
+    for topic, keys in sorted(pending.items()):
+        if keys is None or ALL in keys or len(keys) > settings.invalidation_max_keys:
+            parts.append(f"{topic}:{ALL}")
+        else:
+            parts.append(f"{topic}:{','.join(sorted(keys))}")
+
+    payloads, current = [], ""
+    for part in parts:
+        if len(part.encode()) > MAX_PAYLOAD_BYTES:
+            part = f"{part.partition(':')[0]}:{ALL}"
+        candidate = f"{current};{part}" if current else part
+        if len(candidate.encode()) > MAX_PAYLOAD_BYTES:
+            payloads.append(current)
+            candidate = part
+        current = candidate
+    if current:
+        payloads.append(current)
+    return payloads
+
+
+def decode(payload: str) -> dict[str, set[str] | None]:
+    decoded: dict[str, set[str] | None] = {}
+    for part in payload.split(";"):
+        topic, _, keys = part.partition(":")
+        if topic:
+            _merge(decoded, topic, set(keys.split(",")) if keys else None)
+    return decoded
+
+
+def _send(session: Session, payloads: list[str]) -> None:
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+    for payload in payloads:
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload}
+        )
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+    if session.in_nested_transaction() or not settings.invalidation_enabled:
+        return
+    # commit flushes after this hook; flush now so the writes it would publish are queued
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pending = session.info.pop(_INFO_KEY, None)
+    if pending:
+        _send(session, encode(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
+
+
+def _dispatch(topic: str, keys: set[str] | None) -> None:
+    handler = _handlers.get(topic)
+    if handler is None:
+        return
+    try:
+        handler(keys)
+    except Exception:
+        logger.exception("Cache invalidation handler for %s failed", topic)
+
+
+def flush_all() -> None:
+    """Drop every registered cache, for when notifications may have been missed."""
+    for topic in list(_handlers):
+        _dispatch(topic, None)
+
+
+class InvalidationListener:
+    def __init__(
+        self,
+        url: str,
+        batch_seconds: float,
+        check_seconds: float,
+        connect: Callable[..., Any] | None = None,
+    ):
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(False)
+        self.batch_seconds = batch_seconds
+        self.check_seconds = check_seconds
+        self.connected = False
+        self.reconnects = 0
+        self._connect = connect
+        self._pending: dict[str, set[str] | None] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._lost: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def _on_notify(self, _connection, _pid: int, _channel: str, payload: str) -> None:
+        for topic, keys in decode(payload).items():
+            _merge(self._pending, topic, keys)
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.batch_seconds, self.flush)
+
+    def _on_terminate(self, _connection) -> None:
+        if self._lost is not None:
+            self._lost.set()
+
+    def flush(self) -> None:
+        """Apply the notifications collected since the last flush."""
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        for topic, keys in pending.items():
+            _dispatch(topic, keys)
+
+    async def _open(self):
+        connect = self._connect
+        if connect is None:
+            import asyncpg
+
+            connect = asyncpg.connect
+        connection = await connect(self.dsn)
+        self._lost = asyncio.Event()
+        connection.add_termination_listener(self._on_terminate)
+        await connection.add_listener(CHANNEL, self._on_notify)
+        return connection
+
+    async def _watch(self, connection) -> None:
+        """Return once the connection is gone."""
+        while not connection.is_closed():
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.check_seconds)
+                return
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(connection.execute("SELECT 1"), self.check_seconds)
+
+    async def _run(self) -> None:
+        backoff = 0.5
+        while True:
+            connection = None
+            try:
+                connection = await self._open()
+                self.connected = True
+                backoff = 0.5
+                # anything published while we were not listening is lost
+                flush_all()
+                await self._watch(connection)
+                logger.warning("Cache invalidation listener lost its connection")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Cache invalidation listener failed", exc_info=True)
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_listener: InvalidationListener | None = None
+
+
+def get_invalidation_listener() -> InvalidationListener | None:
+    return _listener
+
+
+def start_invalidation_listener() -> None:
+    global _listener
+    url = settings.database_url
+    if not settings.invalidation_enabled or make_url(url).get_backend_name() != "postgresql":
+        return
+    if _listener is None:
+        _listener = InvalidationListener(
+            url,
+            batch_seconds=settings.invalidation_batch_seconds,
+            check_seconds=settings.invalidation_check_seconds,
+        )
+        _listener.start()
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
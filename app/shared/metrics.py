@@ -0,0 +1,264 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+`MetricsMiddleware` (a plain ASGI middleware, so it adds no extra task or body buffering)
+records per route template:
+
+- http_requests_total{method,route,status}
+- http_request_duration_seconds{method,route}: histogram, until the last body chunk is sent
+- http_requests_in_flight{method,route}
+- http_request_db_seconds{method,route}: histogram of the time each request spent in
+  cursor execution, summed by SQLAlchemy engine events across all of its statements
+
+Routes are labelled by their template (`/orders/{order_id}`), read from the route the
+request was dispatched to, and paths no route matches share one `<unmatched>` label, so
+the label set stays bounded. GET /metrics also exports the connection pool stats from
+app.shared.pool and the cache counters from app.shared.cache. Everything is per process.
+The cost per request is measured by `make bench_metrics`.
+"""
+
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.shared.cache import cache_snapshot
+from app.shared.pool import WAIT_BUCKETS, pool_snapshot
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+UNMATCHED = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self.requests: defaultdict[tuple[str, str, int], int] = defaultdict(int)
+        self.in_flight: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.db_time: dict[tuple[str, str], Histogram] = {}
+
+    def record(self, key: tuple[str, str], status: int, seconds: float, db_seconds: float):
+        self.requests[(*key, status)] += 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.db_time[key] = Histogram(DB_BUCKETS)
+        latency.observe(seconds)
+        self.db_time[key].observe(db_seconds)
+
+
+request_metrics = RequestMetrics()
+
+
+_db_seconds: ContextVar[list[float] | None] = ContextVar("request_db_seconds", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spent = _db_seconds.get()
+    if spent is not None:
+        spent[0] += time.perf_counter() - conn.info["query_started"]
+
+
+def install_db_timing() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope: Scope) -> str:
+    """The template of the route the request was dispatched to."""
+    route = scope.get("route")
+    return UNMATCHED if route is None else route.path
+
+
+class _Templates:
+    """
+    Route templates seen so far, to label a request before routing has happened (for the
+    in-flight gauge). Learned from finished requests because FastAPI only tells which route
+    a request matched while dispatching it; an app-wide dependency could report it, but
+    costs more per request than this whole middleware.
+    """
+
+    def __init__(self) -> None:
+        self._patterns: list[tuple[re.Pattern[str], str]] = []
+        self._known: set[str] = set()
+
+    def learn(self, template: str) -> None:
+        if template in self._known or template == UNMATCHED:
+            return
+        self._known.add(template)
+        parts = re.split(r"(\{[^}]*\})", template)
+        pattern = "".join("[^/]+" if p.startswith("{") else re.escape(p) for p in parts)
+        self._patterns.append((re.compile(pattern), template))
+        # literal segments win over parameters ("/orders/export" before "/orders/{id}")
+        self._patterns.sort(key=lambda entry: entry[1].count("{"))
+
+    def match(self, path: str) -> str:
+        for pattern, template in self._patterns:
+            if pattern.fullmatch(path):
+                return template
+        return UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates = _Templates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = request_metrics
+        method = scope["method"]
+        in_flight = (method, self._templates.match(scope["path"]))
+        metrics.in_flight[in_flight] += 1
+        spent = [0.0]
+        token = _db_seconds.set(spent)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _db_seconds.reset(token)
+            metrics.in_flight[in_flight] -= 1
+            template = route_template(scope)
+            self._templates.learn(template)
+            metrics.record((method, template), status, elapsed, spent[0])
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: object) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(
+    name: str, labels: dict[str, object], buckets: tuple[float, ...], counts: list[int], total
+) -> list[str]:
+    lines, cumulative = [], 0
+    for bound, count in zip((*map(str, buckets), "+Inf"), counts, strict=True):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+    return lines
+
+
+def render_metrics() -> str:
+    metrics = request_metrics
+    out = [
+        "# HELP http_requests_total Requests by route template and status code.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), count in sorted(metrics.requests.items()):
+        out.append(
+            f"http_requests_total{_labels(method=method, route=route, status=status)} {count}"
+        )
+
+    out += [
+        "# HELP http_requests_in_flight Requests being handled.",
+        "# TYPE http_requests_in_flight gauge",
+    ]
+    for (method, route), count in sorted(metrics.in_flight.items()):
+        out.append(f"http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+    for name, histograms, help_text in (
+        ("http_request_duration_seconds", metrics.latency, "Request latency."),
+        ("http_request_db_seconds", metrics.db_time, "Time spent executing SQL per request."),
+    ):
+        out += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), histogram in sorted(histograms.items()):
+            out += _histogram_lines(
+                name,
+                {"method": method, "route": route},
+                histogram.buckets,
+                histogram.counts,
+                histogram.sum,
+            )
+
+    pools = pool_snapshot()
+    out += [
+        "# HELP db_pool_connections Connections per pool and state.",
+        "# TYPE db_pool_connections gauge",
+    ]
+    for pool, entry in pools.items():
+        for state in ("checked_in", "checked_out", "overflow"):
+            if state in entry:
+                out.append(f"db_pool_connections{_labels(pool=pool, state=state)} {entry[state]}")
+    out += [
+        "# HELP db_pool_checkout_timeouts_total Checkouts that timed out waiting.",
+        "# TYPE db_pool_checkout_timeouts_total counter",
+    ]
+    for pool, entry in pools.items():
+        if "timeouts" in entry:
+            out.append(f"db_pool_checkout_timeouts_total{_labels(pool=pool)} {entry['timeouts']}")
+    out += [
+        "# HELP db_pool_checkout_wait_seconds Time to obtain a pooled connection.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+    ]
+    for pool, entry in pools.items():
+        if "wait_seconds_buckets" in entry:
+            cumulative = list(entry["wait_seconds_buckets"].values())
+            counts = [b - a for a, b in zip([0, *cumulative[:-1]], cumulative, strict=True)]
+            out += _histogram_lines(
+                "db_pool_checkout_wait_seconds",
+                {"pool": pool},
+                WAIT_BUCKETS,
+                counts,
+                entry["wait_seconds_sum"],
+            )
+
+    caches = cache_snapshot()
+    out += [
+        "# HELP cache_lookups_total Cache lookups by result (hit, stale_hit, miss).",
+        "# TYPE cache_lookups_total counter",
+    ]
+    for cache, entry in caches.items():
+        for result, counter in (("hit", "hits"), ("stale_hit", "stale_hits"), ("miss", "misses")):
+            count = entry[counter]
+            out.append(f"cache_lookups_total{_labels(cache=cache, result=result)} {count}")
+    for name, counter, kind, help_text in (
+        ("cache_evictions_total", "evictions", "counter", "Entries evicted by the size bound."),
+        ("cache_refreshes_total", "refreshes", "counter", "Background refreshes that finished."),
+        ("cache_refresh_errors_total", "refresh_errors", "counter", "Failed background refreshes."),
+        ("cache_entries", "entries", "gauge", "Entries held."),
+    ):
+        out += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for cache, entry in caches.items():
+            out.append(f"{name}{_labels(cache=cache)} {entry[counter]}")
+    return "\n".join(out) + "\n"
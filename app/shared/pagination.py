@@ -0,0 +1,25 @@
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Encode a keyset position into an opaque, URL-safe cursor.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor produced by `encode_cursor`. Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
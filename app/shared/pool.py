@@ -0,0 +1,165 @@
+"""
+Connection pool sizing and instrumentation.
+
+Engines created with `pool_options()` use `InstrumentedQueuePool`, which times every
+checkout (the wait for a free connection plus opening a new one or the pre-ping), counts
+checkout timeouts and keeps a histogram of the waits. A request that waits here is queued
+on the pool rather than on the database, which is the signal for resizing pool_size /
+max_overflow per worker.
+
+Stats are per process. They are exposed at GET /internal/pool, logged as a warning for
+every slow checkout (`db_pool_slow_wait_seconds`), logged as an error on each timeout and,
+with `db_pool_log_seconds` set, logged periodically.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from bisect import bisect_left
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# upper bounds in seconds, Prometheus-style
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self._buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_sum += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def histogram(self) -> dict[str, int]:
+        """Cumulative counts keyed by upper bound, like a Prometheus histogram."""
+        cumulative, total = {}, 0
+        for bound, count in zip((*map(str, WAIT_BUCKETS), "+Inf"), self._buckets, strict=True):
+            total += count
+            cumulative[bound] = total
+        return cumulative
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # a class attribute because Pool.recreate() (dispose, invalidation) rebuilds the pool
+    # from its class and known arguments only
+    stats: PoolStats = PoolStats()
+    pool_name: str = "db"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            logger.error(
+                "Timed out after %.2fs waiting for a %s connection (%s)",
+                time.perf_counter() - started,
+                self.pool_name,
+                self.status(),
+            )
+            raise
+        waited = time.perf_counter() - started
+        self.stats.observe(waited)
+        if waited >= settings.db_pool_slow_wait_seconds:
+            logger.warning(
+                "Waited %.3fs for a %s connection (%s)", waited, self.pool_name, self.status()
+            )
+        return connection
+
+
+_engines: dict[str, AsyncEngine] = {}
+
+
+def pool_options(name: str, url: str) -> dict[str, Any]:
+    """create_async_engine() keyword arguments for the configured pool."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite engines keep SQLAlchemy's own pools (in-memory databases need a static one)
+        return {}
+    pool_class = type(
+        "InstrumentedQueuePool",
+        (InstrumentedQueuePool,),
+        {"stats": PoolStats(), "pool_name": name},
+    )
+    return {
+        "poolclass": pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def register_pool(name: str, engine: AsyncEngine) -> None:
+    _engines[name] = engine
+
+
+def pool_engines() -> dict[str, AsyncEngine]:
+    return dict(_engines)
+
+
+def pool_snapshot() -> dict[str, dict[str, Any]]:
+    snapshot = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            snapshot[name] = {"pool": type(pool).__name__}
+            continue
+        entry: dict[str, Any] = {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+        stats = getattr(pool, "stats", None)
+        if stats is not None:
+            entry |= {
+                "checkouts": stats.checkouts,
+                "timeouts": stats.timeouts,
+                "wait_seconds_sum": round(stats.wait_sum, 6),
+                "wait_seconds_max": round(stats.wait_max, 6),
+                "wait_seconds_buckets": stats.histogram(),
+            }
+        snapshot[name] = entry
+    return snapshot
+
+
+async def _log_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        for name, entry in pool_snapshot().items():
+            logger.info("Pool %s %s", name, json.dumps(entry))
+
+
+_log_task: asyncio.Task | None = None
+
+
+def start_pool_logging() -> None:
+    global _log_task
+    if settings.db_pool_log_seconds > 0 and _log_task is None:
+        _log_task = asyncio.create_task(_log_loop(settings.db_pool_log_seconds))
+
+
+def stop_pool_logging() -> None:
+    global _log_task
+    if _log_task is not None:
+        _log_task.cancel()
+        _log_task = None
@@ -0,0 +1,172 @@
+"""
+Per-request SQL profiling.
+
+With `settings.sql_profiling` on, `SQLProfilerMiddleware` records every statement a request
+executes: its normalized shape (whitespace collapsed, literals and expanded IN lists
+replaced by placeholders), time in the cursor and row count. After the request it logs a
+warning when the request ran more than `sql_query_budget` statements or ran one shape at
+least `sql_repeat_threshold` times (the N+1 signature). With `settings.debug` also on,
+responses carry a summary in the `X-SQL-Profile` header.
+
+Tests assert budgets without the middleware:
+
+    with profile_queries() as profile:
+        await client.get("/orders/1")
+    profile.assert_budget(2)
+
+Row counts come from `cursor.rowcount`, or from the rows async drivers buffer when a
+SELECT leaves rowcount at -1. Rows read through server-side cursors are not counted.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-SQL-Profile"
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+|\?")
+
+
+def normalize_sql(statement: str) -> str:
+    """One shape for every execution of the same query, whatever its parameters."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _IN_LIST.sub("IN (...)", shape)
+
+
+@dataclass
+class QueryRecord:
+    shape: str
+    seconds: float
+    rows: int | None
+
+
+@dataclass
+class QueryProfile:
+    queries: list[QueryRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(q.seconds for q in self.queries)
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """Shapes executed at least `threshold` times (default sql_repeat_threshold)."""
+        threshold = settings.sql_repeat_threshold if threshold is None else threshold
+        counts = Counter(q.shape for q in self.queries)
+        return {shape: n for shape, n in counts.most_common() if n >= threshold}
+
+    def summary(self) -> str:
+        return (
+            f"queries={self.count}; time_ms={self.seconds * 1000:.1f}; "
+            f"repeated={len(self.repeated())}"
+        )
+
+    def assert_budget(self, budget: int) -> None:
+        assert self.count <= budget, f"{self.count} statements, budget {budget}:\n" + "\n".join(
+            f"  {q.shape}" for q in self.queries
+        )
+
+
+_profile: ContextVar[QueryProfile | None] = ContextVar("sql_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None:
+        conn.info["profile_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is None:
+        return
+    seconds = time.perf_counter() - conn.info["profile_started"]
+    rows = cursor.rowcount
+    if rows < 0:
+        buffered = getattr(cursor, "_rows", None)
+        rows = len(buffered) if buffered is not None else None
+    profile.queries.append(QueryRecord(normalize_sql(statement), seconds, rows))
+
+
+def install_profiler() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Record the statements executed in this context (and requests made from it in tests)."""
+    install_profiler()
+    profile = QueryProfile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        install_profiler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _profile.get() is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_summary(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.debug:
+                MutableHeaders(scope=message).append(HEADER, profile.summary())
+            await send(message)
+
+        with profile_queries() as profile:
+            await self.app(scope, receive, send_with_summary)
+        _report(scope, profile)
+
+
+def _report(scope: Scope, profile: QueryProfile) -> None:
+    repeated = profile.repeated()
+    over_budget = profile.count > settings.sql_query_budget
+    if not repeated and not over_budget:
+        return
+    problems = []
+    if over_budget:
+        problems.append(f"over budget ({profile.count} > {settings.sql_query_budget})")
+    if repeated:
+        problems.append(
+            "repeated statements (possible N+1): "
+            + "; ".join(f"{n}x {shape}" for shape, n in repeated.items())
+        )
+    logger.warning(
+        "%s %s ran %d statements in %.1f ms: %s",
+        scope["method"],
+        scope["path"],
+        profile.count,
+        profile.seconds * 1000,
+        ", ".join(problems),
+    )
@@ -0,0 +1,211 @@
+"""
+Read-replica routing.
+
+`get_session` sessions use `RoutingSession`: their reads go to one healthy replica from
+`settings.database_replica_urls` (picked round-robin, then kept for the whole session so a
+request reads one consistent copy). Everything else goes to the primary:
+
+- writes (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE), and every statement after
+  the session's first write
+- `get_transaction_session`, `get_primary_session` (register/login, which have no user to
+  pin) and background jobs, which never route
+- the requests of a user who committed a write (or registered) in the last
+  `read_your_writes_seconds`
+- a user lookup that missed on the replica (the user may have just registered on a
+  worker that did not remember them)
+- all reads while no replica is healthy
+
+A monitor checks each replica every `replica_check_seconds` and takes it out of rotation
+while it is unreachable or lags more than `replica_max_lag_seconds` behind. Stickiness is
+remembered per process. With several workers, keep read_your_writes_seconds above the
+usual replica lag so a user whose next request lands on another worker still reads their
+own writes once the replica has caught up.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.shared.cache import TTLCache
+from app.shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WROTE = "replica_wrote"  # a write since the last commit: the user becomes sticky
+_PINNED = "replica_pinned"  # this session wrote, so it reads from the primary from now on
+_REPLICA = "replica_engine"
+
+_LAG_QUERIES = {
+    "postgresql": text(
+        "SELECT CASE"
+        " WHEN NOT pg_is_in_recovery() THEN 0"
+        " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+        " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+        " END"
+    ),
+}
+
+_request_user: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "replica_request_user", default=None
+)
+_recent_writers: TTLCache[bool] = TTLCache(maxsize=100_000, ttl=settings.read_your_writes_seconds)
+
+
+def set_request_user(user_id: str) -> None:
+    """Route the rest of this request by `user_id` (called once the user is authenticated)."""
+    _request_user.set(user_id)
+
+
+def remember_writer(user_id: str) -> None:
+    """Read `user_id`'s requests from the primary for the next read_your_writes_seconds."""
+    _recent_writers.set(user_id, True)
+
+
+def reads_from_primary(user_id: str | None) -> bool:
+    return user_id is not None and _recent_writers.get(user_id) is not None
+
+
+def pin_to_primary(session: AsyncSession | Session) -> bool:
+    """
+    Send the session's remaining statements to the primary. False when it already read
+    from the primary, so a retry there could not see anything new.
+    """
+    sync = session.sync_session if isinstance(session, AsyncSession) else session
+    if sync.info.get(_PINNED) or sync.info.get(_REPLICA) is None:
+        return False
+    sync.info[_PINNED] = True
+    return True
+
+
+class _Replica:
+    __slots__ = ("engine", "healthy", "lag")
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+        self.lag: float | None = None
+
+
+class ReplicaSet:
+    def __init__(self, engines: list[AsyncEngine], max_lag: float):
+        self.max_lag = max_lag
+        self._replicas = [_Replica(engine) for engine in engines]
+        self._turn = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def pick(self) -> AsyncEngine | None:
+        healthy = [r for r in self._replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)].engine
+
+    async def _lag(self, replica: _Replica) -> float:
+        query = _LAG_QUERIES.get(replica.engine.dialect.name, text("SELECT 0"))
+        async with replica.engine.connect() as conn:
+            return float(await conn.scalar(query))
+
+    async def _probe(self, replica: _Replica, timeout: float) -> None:
+        try:
+            lag = await asyncio.wait_for(self._lag(replica), timeout)
+            healthy = lag <= self.max_lag
+        except Exception as e:
+            lag, healthy = None, False
+            logger.debug("Replica %s check failed: %r", replica.engine.url, e)
+        if healthy != replica.healthy:
+            logger.warning(
+                "Replica %s %s (lag %s)",
+                replica.engine.url.render_as_string(),
+                "back in rotation" if healthy else "taken out of rotation",
+                "unknown" if lag is None else f"{lag:.1f}s",
+            )
+        replica.healthy, replica.lag = healthy, lag
+
+    async def check(self, timeout: float = 2.0) -> None:
+        await asyncio.gather(*(self._probe(r, timeout) for r in self._replicas))
+
+    async def _check_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check(timeout=interval)
+
+    async def start(self, interval: float) -> None:
+        await self.check(timeout=interval)
+        self._task = asyncio.create_task(self._check_loop(interval))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+_replicas: ReplicaSet | None = None
+
+
+def get_replicas() -> ReplicaSet | None:
+    return _replicas
+
+
+def install_replicas(replicas: ReplicaSet | None) -> None:
+    global _replicas
+    _replicas = replicas
+
+
+async def start_replica_monitor() -> None:
+    replicas = get_replicas()
+    if replicas is not None:
+        await replicas.start(settings.replica_check_seconds)
+
+
+def stop_replica_monitor() -> None:
+    replicas = get_replicas()
+    if replicas is not None:
+        replicas.stop()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper, clause=clause, **kw)
+        if (
+            self._flushing
+            or self.info.get(_WROTE)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info[_PINNED] = True
+        if self.info.get(_PINNED):
+            return primary
+
+        replica = self.info.get(_REPLICA)
+        if replica is None:
+            replicas = get_replicas()
+            if replicas is None or reads_from_primary(_request_user.get()):
+                return primary
+            replica = replicas.pick()
+            if replica is None:
+                return primary
+            self.info[_REPLICA] = replica
+        return replica.sync_engine
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # a released savepoint; wait for the real commit
+    user_id = _request_user.get()
+    if session.info.pop(_WROTE, False) and user_id is not None:
+        remember_writer(user_id)
@@ -0,0 +1,87 @@
+"""
+Fast response encoding.
+
+With `settings.response_encoding == "fast"`, routes built with `FastJSONRoute` that return
+an instance of their own `response_model` skip FastAPI's response validation/serialization
+pass and are encoded straight to JSON bytes by pydantic-core. The services already built
+and validated those models, so validating them again only costs CPU (a full dump and
+re-validate on older FastAPI releases). Anything else a route returns (dicts, Responses,
+other types) takes the regular path.
+
+Models shared between requests, like cached listing pages, subclass `EncodeOnceModel` so
+they are encoded only once.
+"""
+
+import inspect
+from functools import wraps
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.dependencies.utils import get_typed_signature
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, PrivateAttr
+from pydantic_core import to_json
+
+from app.shared.config import settings
+
+_SINK = "fast_json_response_sink"
+
+
+class EncodeOnceModel(BaseModel):
+    """A response model whose instances are never mutated, so their JSON can be memoized."""
+
+    _json: bytes | None = PrivateAttr(default=None)
+
+
+def encode_json(content: Any) -> bytes:
+    if isinstance(content, EncodeOnceModel):
+        if content._json is None:
+            content._json = to_json(content)
+        return content._json
+    return to_json(content)
+
+
+class PydanticJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._fast_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _fast_endpoint(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        # annotations are resolved against the endpoint's module, not this one
+        signature = get_typed_signature(endpoint)
+        params = list(signature.parameters.values())
+        # FastAPI injects a single sub-response per endpoint; reuse the endpoint's own
+        sink = next((p.name for p in params if p.annotation is Response), None)
+        if sink is None:
+            params.append(
+                inspect.Parameter(_SINK, inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+            )
+
+        @wraps(endpoint)
+        async def fast_endpoint(**values: Any) -> Any:
+            sub_response = values[sink] if sink else values.pop(_SINK)
+            result = await endpoint(**values)
+            if (
+                settings.response_encoding != "fast"
+                or self.response_model is None
+                or type(result) is not self.response_model
+            ):
+                return result
+            response = PydanticJSONResponse(
+                result, status_code=sub_response.status_code or self.status_code or 200
+            )
+            response.raw_headers.extend(
+                (k, v) for k, v in sub_response.headers.raw if k != b"content-length"
+            )
+            return response
+
+        fast_endpoint.__signature__ = signature.replace(parameters=params)
+        return fast_endpoint
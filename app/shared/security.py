@@ -1,12 +1,22 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.shared.config import settings
 
+T = TypeVar("T")
 
 pwd_ctx = CryptContext(schemes=["argon2"], deprecated="auto")
 
+_executor: Executor | None = None
+_pending = 0
+
 
 def hash_password(raw: str) -> str:
     """
@@ -22,12 +32,67 @@ def verify_password(raw: str, hashed: str) -> bool:
     return pwd_ctx.verify(raw, hashed)
 
 
-def generate_access_token(subject: str | int, expires_minutes: int | None = None) -> str:
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        workers = settings.password_hash_workers or os.cpu_count() or 1
+        if settings.password_hash_executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+    return _executor
+
+
+def shutdown_password_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run_off_loop(fn: Callable[..., T], *args) -> T:
+    """
+    Run a CPU-heavy password call on the executor. Fails fast with 503 once
+    `password_hash_max_pending` calls are already queued or running.
+    """
+    global _pending
+    if settings.password_hash_executor == "inline":
+        return fn(*args)
+    if _pending >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent authentication requests, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(raw: str) -> str:
+    """
+    Hash a password without blocking the event loop.
+    """
+    return await _run_off_loop(hash_password, raw)
+
+
+async def verify_password_async(raw: str, hashed: str) -> bool:
+    """
+    Verify a hashed password without blocking the event loop.
+    """
+    return await _run_off_loop(verify_password, raw, hashed)
+
+
+def generate_access_token(
+    subject: str | int, expires_minutes: int | None = None, claims: dict | None = None
+) -> str:
     """
-    Generate a JWT token.
+    Generate a JWT token. Extra `claims` are signed into the payload as-is.
     """
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=expires_minutes or settings.access_token_expire_minutes
     )
-    to_encode = {"sub": str(subject), "exp": expire}
+    to_encode = {**(claims or {}), "sub": str(subject), "exp": expire}
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
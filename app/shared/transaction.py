@@ -0,0 +1,72 @@
+"""
+Callbacks on the outcome of the transaction that is current when they are registered.
+
+`on_commit` runs once the outermost transaction commits. `on_rollback` runs when that
+transaction (or the SAVEPOINT the callback was registered in, or an enclosing one) rolls
+back, or when the session is closed without committing.
+"""
+
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+_INFO_KEY = "transaction_callbacks"
+
+Callback = Callable[[], None]
+
+
+def on_outcome(
+    session: AsyncSession | Session,
+    *,
+    on_commit: Callback | None = None,
+    on_rollback: Callback | None = None,
+) -> None:
+    sync = session.sync_session if isinstance(session, AsyncSession) else session
+    transaction = sync.get_nested_transaction() or sync.get_transaction()
+    sync.info.setdefault(_INFO_KEY, []).append((transaction, on_commit, on_rollback))
+
+
+def _within(transaction: SessionTransaction | None, ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    # also fires when a savepoint is released; only the outermost commit is final
+    if session.in_nested_transaction():
+        return
+    for _, on_commit, _ in session.info.pop(_INFO_KEY, ()):
+        if on_commit is not None:
+            on_commit()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _run_savepoint_rollback_callbacks(
+    session: Session, previous_transaction: SessionTransaction
+) -> None:
+    pending = session.info.get(_INFO_KEY)
+    if not pending:
+        return
+    kept = []
+    for entry in pending:
+        if not _within(entry[0], previous_transaction):
+            kept.append(entry)
+        elif entry[2] is not None:
+            entry[2]()
+    session.info[_INFO_KEY] = kept
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_abandoned_callbacks(session: Session, transaction: SessionTransaction) -> None:
+    # the outermost transaction ended without after_commit: rolled back or closed
+    if transaction.parent is not None:
+        return
+    for _, _, on_rollback in session.info.pop(_INFO_KEY, ()):
+        if on_rollback is not None:
+            on_rollback()
@@ -0,0 +1,31 @@
+"""add keyset pagination indexes on products
+
+Revision ID: 3c1e7a9d2b40
+Revises: 76f5c2549861
+Create Date: 2025-10-06 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1e7a9d2b40'
+down_revision: Union[str, Sequence[str], None] = '76f5c2549861'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (sort_col, id) composite indexes; DESC listings use a backward index scan
+    op.create_index('ix_product_name_id', 'products', ['name', 'id'], unique=False)
+    op.create_index('ix_product_price_id', 'products', ['price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_price_id', table_name='products')
+    op.drop_index('ix_product_name_id', table_name='products')
@@ -0,0 +1,33 @@
+"""add (user_id, id desc) index on orders
+
+Revision ID: 8e4b21f6c0d7
+Revises: 3c1e7a9d2b40
+Create Date: 2025-10-06 15:40:02.771930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b21f6c0d7'
+down_revision: Union[str, Sequence[str], None] = '3c1e7a9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_orders_user_id_id', 'orders', ['user_id', sa.text('id DESC')], unique=False
+    )
+    # the composite index leads with user_id, so the single-column one is redundant
+    op.drop_index(op.f('ix_orders_user_id'), table_name='orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.drop_index('ix_orders_user_id_id', table_name='orders')
@@ -0,0 +1,28 @@
+"""add index on products.updated_at
+
+Revision ID: a91c3e5f0b72
+Revises: 5d2f9b83e6a1
+Create Date: 2025-10-10 16:05:48.211937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91c3e5f0b72'
+down_revision: Union[str, Sequence[str], None] = '5d2f9b83e6a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_product_updated_at', 'products', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_updated_at', table_name='products')
@@ -0,0 +1,45 @@
+"""add pg_trgm search indexes on products
+
+Revision ID: b7d93e15a2c4
+Revises: 8e4b21f6c0d7
+Create Date: 2025-10-07 09:03:55.120417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d93e15a2c4'
+down_revision: Union[str, Sequence[str], None] = '8e4b21f6c0d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_product_name_trgm',
+        'products',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_product_description_trgm',
+        'products',
+        ['description'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_description_trgm', table_name='products')
+    op.drop_index('ix_product_name_trgm', table_name='products')
@@ -0,0 +1,39 @@
+"""add order_items.stock_applied for hot inventory write-behind
+
+Revision ID: c4a8e2d17f93
+Revises: b7d93e15a2c4
+Create Date: 2025-10-09 14:21:07.530194
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2d17f93'
+down_revision: Union[str, Sequence[str], None] = 'b7d93e15a2c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'order_items',
+        sa.Column('stock_applied', sa.Boolean(), server_default=sa.true(), nullable=False),
+    )
+    op.create_index(
+        'ix_order_items_stock_unapplied',
+        'order_items',
+        ['product_id'],
+        unique=False,
+        postgresql_where=sa.text('NOT stock_applied'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_stock_unapplied', table_name='order_items')
+    op.drop_column('order_items', 'stock_applied')
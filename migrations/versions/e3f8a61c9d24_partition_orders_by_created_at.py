@@ -0,0 +1,217 @@
+"""partition orders and order_items by archived and created_at
+
+Revision ID: e3f8a61c9d24
+Revises: a91c3e5f0b72
+Create Date: 2025-10-20 09:12:44.318206
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f8a61c9d24'
+down_revision: Union[str, Sequence[str], None] = 'a91c3e5f0b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# live monthly partitions created past the current month (the maintenance job keeps ahead)
+MONTHS_AHEAD = 3
+
+
+def _month_starts(first: datetime, last: datetime) -> list[datetime]:
+    first, last = first.astimezone(timezone.utc), last.astimezone(timezone.utc)
+    index, end = first.year * 12 + first.month - 1, last.year * 12 + last.month - 1
+    return [datetime(i // 12, i % 12 + 1, 1, tzinfo=timezone.utc) for i in range(index, end + 1)]
+
+
+def _next_month(start: datetime) -> datetime:
+    return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partitioned tables need the partition key in every unique constraint, so orders.id is no
+    # longer unique on its own and order_items can no longer reference it: the items carry
+    # their order's created_at instead, which keeps an order and its lines in matching
+    # partitions. The data is copied once, in this transaction.
+    op.execute('ALTER TABLE order_items RENAME TO order_items_unpartitioned')
+    op.execute('ALTER TABLE orders RENAME TO orders_unpartitioned')
+    op.execute('ALTER TABLE order_items_unpartitioned DROP CONSTRAINT order_items_order_id_fkey')
+    op.execute('ALTER TABLE order_items_unpartitioned DROP CONSTRAINT order_items_pkey')
+    op.execute(
+        'ALTER TABLE order_items_unpartitioned DROP CONSTRAINT uq_orderitem_order_product'
+    )
+    op.execute('ALTER TABLE orders_unpartitioned DROP CONSTRAINT orders_pkey')
+    op.drop_index('ix_orders_user_id_id', table_name='orders_unpartitioned')
+    op.drop_index('ix_order_items_order_id', table_name='order_items_unpartitioned')
+    op.drop_index('ix_order_items_product_id', table_name='order_items_unpartitioned')
+    op.drop_index('ix_order_items_stock_unapplied', table_name='order_items_unpartitioned')
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY NONE')
+    op.execute('ALTER SEQUENCE order_items_id_seq OWNED BY NONE')
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id VARCHAR(40) NOT NULL REFERENCES users (id) ON DELETE RESTRICT,
+            status order_status NOT NULL,
+            subtotal NUMERIC(12, 2) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            archived BOOLEAN NOT NULL DEFAULT false,
+            CONSTRAINT orders_pkey PRIMARY KEY (id, archived, created_at)
+        ) PARTITION BY LIST (archived)
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE order_items (
+            id INTEGER NOT NULL DEFAULT nextval('order_items_id_seq'),
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL REFERENCES products (id) ON DELETE RESTRICT,
+            unit_price NUMERIC(12, 2) NOT NULL,
+            quantity INTEGER NOT NULL,
+            stock_applied BOOLEAN NOT NULL DEFAULT true,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            archived BOOLEAN NOT NULL DEFAULT false,
+            CONSTRAINT order_items_pkey PRIMARY KEY (id, archived, created_at),
+            CONSTRAINT uq_orderitem_order_product
+                UNIQUE (order_id, product_id, archived, created_at),
+            CONSTRAINT ck_orderitem_qty_positive CHECK (quantity > 0)
+        ) PARTITION BY LIST (archived)
+        """
+    )
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY orders.id')
+    op.execute('ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id')
+    op.create_index(
+        'ix_orders_user_id_id', 'orders', ['user_id', sa.text('id DESC')], unique=False
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+    op.create_index(
+        'ix_order_items_stock_unapplied',
+        'order_items',
+        ['product_id'],
+        unique=False,
+        postgresql_where=sa.text('NOT stock_applied'),
+    )
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM orders_unpartitioned')).scalar()
+    now = datetime.now(timezone.utc)
+    months = _month_starts(oldest or now, now)
+    for _ in range(MONTHS_AHEAD):
+        months.append(_next_month(months[-1]))
+    for table in ('orders', 'order_items'):
+        op.execute(
+            f'CREATE TABLE {table}_live PARTITION OF {table} '
+            'FOR VALUES IN (false) PARTITION BY RANGE (created_at)'
+        )
+        op.execute(
+            f'CREATE TABLE {table}_archive PARTITION OF {table} '
+            'FOR VALUES IN (true) PARTITION BY RANGE (created_at)'
+        )
+        op.execute(f'CREATE TABLE {table}_live_default PARTITION OF {table}_live DEFAULT')
+        op.execute(f'CREATE TABLE {table}_archive_default PARTITION OF {table}_archive DEFAULT')
+        for start in months:
+            op.execute(
+                f'CREATE TABLE {table}_live_{start:%Y_%m} PARTITION OF {table}_live '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_next_month(start).isoformat()}')"
+            )
+
+    op.execute(
+        """
+        INSERT INTO orders (id, user_id, status, subtotal, created_at, updated_at)
+        SELECT id, user_id, status, subtotal, created_at, updated_at FROM orders_unpartitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_items
+            (id, order_id, product_id, unit_price, quantity, stock_applied, created_at)
+        SELECT i.id, i.order_id, i.product_id, i.unit_price, i.quantity, i.stock_applied,
+               o.created_at
+        FROM order_items_unpartitioned i JOIN orders_unpartitioned o ON o.id = i.order_id
+        """
+    )
+    op.drop_table('order_items_unpartitioned')
+    op.drop_table('orders_unpartitioned')
+    op.execute('ANALYZE orders, order_items')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('ALTER TABLE order_items RENAME TO order_items_partitioned')
+    op.execute('ALTER TABLE orders RENAME TO orders_partitioned')
+    op.execute('ALTER TABLE order_items_partitioned DROP CONSTRAINT order_items_pkey')
+    op.execute('ALTER TABLE order_items_partitioned DROP CONSTRAINT uq_orderitem_order_product')
+    op.execute('ALTER TABLE orders_partitioned DROP CONSTRAINT orders_pkey')
+    op.drop_index('ix_orders_user_id_id', table_name='orders_partitioned')
+    op.drop_index('ix_order_items_order_id', table_name='order_items_partitioned')
+    op.drop_index('ix_order_items_product_id', table_name='order_items_partitioned')
+    op.drop_index('ix_order_items_stock_unapplied', table_name='order_items_partitioned')
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY NONE')
+    op.execute('ALTER SEQUENCE order_items_id_seq OWNED BY NONE')
+
+    op.execute(
+        """
+        CREATE TABLE orders (
+            id INTEGER NOT NULL DEFAULT nextval('orders_id_seq'),
+            user_id VARCHAR(40) NOT NULL REFERENCES users (id) ON DELETE RESTRICT,
+            status order_status NOT NULL,
+            subtotal NUMERIC(12, 2) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT orders_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE order_items (
+            id INTEGER NOT NULL DEFAULT nextval('order_items_id_seq'),
+            order_id INTEGER NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+            product_id INTEGER NOT NULL REFERENCES products (id) ON DELETE RESTRICT,
+            unit_price NUMERIC(12, 2) NOT NULL,
+            quantity INTEGER NOT NULL,
+            stock_applied BOOLEAN NOT NULL DEFAULT true,
+            CONSTRAINT order_items_pkey PRIMARY KEY (id),
+            CONSTRAINT uq_orderitem_order_product UNIQUE (order_id, product_id),
+            CONSTRAINT ck_orderitem_qty_positive CHECK (quantity > 0)
+        )
+        """
+    )
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY orders.id')
+    op.execute('ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id')
+    op.execute(
+        """
+        INSERT INTO orders (id, user_id, status, subtotal, created_at, updated_at)
+        SELECT id, user_id, status, subtotal, created_at, updated_at FROM orders_partitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_items (id, order_id, product_id, unit_price, quantity, stock_applied)
+        SELECT id, order_id, product_id, unit_price, quantity, stock_applied
+        FROM order_items_partitioned
+        """
+    )
+    op.create_index(
+        'ix_orders_user_id_id', 'orders', ['user_id', sa.text('id DESC')], unique=False
+    )
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False)
+    op.create_index(
+        'ix_order_items_stock_unapplied',
+        'order_items',
+        ['product_id'],
+        unique=False,
+        postgresql_where=sa.text('NOT stock_applied'),
+    )
+    # dropping the partitioned parents drops every partition with them
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
@@ -0,0 +1,151 @@
+"""
+Import time, cold-start time and first-request latency of a fresh worker.
+
+Import time comes from `python -X importtime -c "import app.main"`: the total, and the
+packages whose modules cost the most (own import time, summed per top-level package).
+Then, once with the startup warm-up disabled and once with it enabled, a uvicorn worker
+is launched against a scratch SQLite file and polled for `/health` and `/ready`. After
+`/ready` answers, each hot path is requested twice: the first request is what a worker's
+first user pays, the second is the steady state.
+
+    python -m scripts.bench.cold_start --runs 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+HOT_PATHS = ("/products", "/products?sort=price&order=desc", "/products?q=lamp")
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def import_time() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total, packages = 0, Counter()
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            own, name = int(match[1]), match[2]
+            total += own
+            packages[name.split(".")[0]] += own
+    return {
+        "import_ms": round(total / 1000, 1),
+        "heaviest_ms": {name: round(us / 1000, 1) for name, us in packages.most_common(8)},
+    }
+
+
+async def seed(products: int) -> None:
+    import app.modules.idempotency.model  # noqa: F401  (register every table)
+    import app.modules.order.model  # noqa: F401
+    import app.modules.user.model  # noqa: F401
+    from app.modules.product.model import Product
+    from app.shared.db import AsyncSessionLocal, BaseModel, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add_all(
+            Product(name=f"lamp {i}", description="desk lamp", price=i % 500 + 1, stock=10)
+            for i in range(products)
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(client: httpx.Client, path: str, started: float, timeout: float = 30) -> float:
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise SystemExit(f"{path} did not answer 200 within {timeout}s")
+
+
+def cold_start(warmup: bool, env: dict) -> dict:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env | {"WARMUP_ENABLED": str(warmup).lower()},
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            result = {
+                "health_s": round(_wait_for(client, "/health", started), 3),
+                "ready_s": round(_wait_for(client, "/ready", started), 3),
+            }
+            for path in HOT_PATHS:
+                timings = []
+                for _ in range(2):
+                    request_started = time.perf_counter()
+                    client.get(path).raise_for_status()
+                    timings.append(round((time.perf_counter() - request_started) * 1000, 2))
+                result[path] = {"first_ms": timings[0], "second_ms": timings[1]}
+            return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def median_of(runs: list[dict]) -> dict:
+    merged = {}
+    for key, value in runs[0].items():
+        if isinstance(value, dict):
+            merged[key] = median_of([run[key] for run in runs])
+        else:
+            merged[key] = round(statistics.median(run[key] for run in runs), 3)
+    return merged
+
+
+def main(runs: int, products: int) -> None:
+    print(json.dumps({"shape": "imports", **import_time()}))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = os.environ | {"DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/cold_start.db"}
+        os.environ["DATABASE_URL"] = env["DATABASE_URL"]
+        asyncio.run(seed(products))
+        for warmup in (False, True):
+            results = [cold_start(warmup, env) for _ in range(runs)]
+            print(json.dumps({"shape": "cold_start", "warmup": warmup, **median_of(results)}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="workers launched per mode")
+    parser.add_argument("--products", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.runs, args.products)
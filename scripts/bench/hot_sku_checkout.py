@@ -0,0 +1,127 @@
+"""
+Checkout throughput on a single hot product.
+
+`--clients` concurrent buyers each run OrderService.create_order in their own transaction
+until the hot product sells out. Reports orders/sec and verifies nothing was oversold. Mode
+`rows` reserves with the row UPDATE, `memory` through the hot inventory (write-behind).
+
+    python -m scripts.bench.hot_sku_checkout --clients 32 --stock 2000
+    python -m scripts.bench.hot_sku_checkout --modes memory --flush-seconds 0.5
+    python -m scripts.bench.hot_sku_checkout --database-url postgresql+asyncpg://.../scratch
+
+All tables in the target database are DROPPED and recreated; use a scratch database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.order.model import Order, OrderItem
+from app.modules.order.service import OrderService
+from app.modules.product.inventory import HotInventory, install_hot_inventory
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.db import BaseModel
+
+
+async def main(
+    database_url: str | None, modes: list[str], clients: int, stock: int, flush_seconds: float
+) -> None:
+    for mode in modes:
+        await run_mode(database_url, mode, clients, stock, flush_seconds)
+
+
+async def run_mode(
+    database_url: str | None, mode: str, clients: int, stock: int, flush_seconds: float
+) -> None:
+    scratch = None
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        database_url = f"sqlite+aiosqlite:///{scratch}"
+    engine = create_async_engine(
+        database_url, pool_size=clients, connect_args=_connect_args(database_url)
+    )
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with Session() as session:
+        session.add(User(id="bench", name="bench", email="bench@example.com", password="x"))
+        hot = Product(name="hot", description="flash sale", price=9.99, stock=stock)
+        session.add(hot)
+        await session.commit()
+
+    inventory = None
+    if mode == "memory":
+        inventory = HotInventory([hot.id])
+        await inventory.start(Session, flush_seconds)
+        install_hot_inventory(inventory)
+
+    sold_out = asyncio.Event()
+    rejected = 0
+
+    async def buyer() -> int:
+        nonlocal rejected
+        placed = 0
+        while not sold_out.is_set():
+            async with Session() as session:
+                try:
+                    async with session.begin():
+                        await OrderService(session).create_order("bench", [(hot.id, 1)])
+                    placed += 1
+                except ValueError:
+                    rejected += 1
+                    sold_out.set()
+        return placed
+
+    started = time.perf_counter()
+    placed = sum(await asyncio.gather(*(buyer() for _ in range(clients))))
+    elapsed = time.perf_counter() - started
+    if inventory is not None:
+        install_hot_inventory(None)
+        await inventory.stop(Session)
+
+    async with Session() as session:
+        left = await session.scalar(select(Product.stock).where(Product.id == hot.id))
+        sold = await session.scalar(select(func.coalesce(func.sum(OrderItem.quantity), 0)))
+        orders = await session.scalar(select(func.count()).select_from(Order))
+    await engine.dispose()
+    if scratch:
+        os.unlink(scratch)
+
+    print(
+        json.dumps(
+            {
+                "mode": mode,
+                "dialect": engine.dialect.name,
+                "clients": clients,
+                "orders": orders,
+                "orders_per_sec": round(placed / elapsed, 1),
+                "rejected": rejected,
+                "stock_left": left,
+                "oversold": sold > stock or left < 0,
+            }
+        )
+    )
+
+
+def _connect_args(url: str) -> dict:
+    return {"timeout": 60} if url.startswith("sqlite") else {}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None, help="defaults to a scratch SQLite file")
+    parser.add_argument("--modes", nargs="+", default=["rows", "memory"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--flush-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.database_url, args.modes, args.clients, args.stock, args.flush_seconds))
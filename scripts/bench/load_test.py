@@ -0,0 +1,361 @@
+"""
+Reproducible mixed-workload load test for the API.
+
+Seeds users, products and orders, then runs `--concurrency` virtual users for `--duration`
+seconds. Each virtual user logs in once and then picks an operation per iteration from the
+weighted `--mix`:
+
+- browse:   GET /products (random page), every fourth time GET /orders instead
+- search:   GET /products?q=<catalog word>
+- login:    POST /auth/login
+- checkout: POST /orders with 1-3 random products
+- status:   PATCH /orders/{id}/status on an order the virtual user placed (a checkout
+            until it has one)
+
+By default the ASGI app runs in-process against a scratch SQLite file. `--database-url`
+seeds and serves another database instead; all its tables are DROPPED and recreated, so
+use a scratch database. `--base-url` sends the traffic to a running server. That server
+must use the database seeded here (`--no-seed` reuses it).
+
+The report is one JSON document. It holds the run configuration and, per operation, the
+count, server errors, 4xx rejections, throughput and latency percentiles in ms.
+`--output` also writes it to a file, and `--baseline previous.json` adds the change
+against an earlier report. Data and the operation sequence derive from `--seed`, so runs
+with the same arguments are comparable.
+
+    python -m scripts.bench.load_test --users 200 --products 5000 --orders 20000 \\
+        --concurrency 32 --duration 30 --output run.json
+    python -m scripts.bench.load_test --mix browse=70,search=20,checkout=10 --baseline run.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from httpx import ASGITransport, AsyncClient
+
+OPERATIONS = ("browse", "search", "login", "checkout", "status")
+DEFAULT_MIX = "browse=45,search=20,login=5,checkout=20,status=10"
+PASSWORD = "load-test-password"
+WORDS = (
+    "aero blue crim delta echo flux giga hexa iron jade board cable dock lamp mouse pad "
+    "screen stand watch zoom"
+).split()
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p95": 0.95, "p99": 0.99}
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name] = int(weight)
+    return weights
+
+
+def email(i: int) -> str:
+    return f"load-{i}@example.com"
+
+
+async def seed(users: int, products: int, orders: int, rng: random.Random) -> None:
+    from sqlalchemy import insert
+
+    from app.modules.order.model import Order, OrderItem, OrderStatus
+    from app.modules.product.model import Product
+    from app.modules.user.model import User
+    from app.shared.db import BaseModel, engine
+    from app.shared.security import hash_password
+
+    # one argon2 hash for everyone: hashing is what logins measure, not what seeding should
+    password = hash_password(PASSWORD)
+    prices = [Decimal(rng.randint(100, 300_000)) / 100 for _ in range(products)]
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {"id": f"load-{i}", "name": f"User {i}", "email": email(i), "password": password}
+                for i in range(users)
+            ],
+        )
+        for start in range(0, products, 5000):
+            await conn.execute(
+                insert(Product),
+                [
+                    {
+                        "name": " ".join(rng.choices(WORDS, k=3)) + f" {i}",
+                        "description": " ".join(rng.choices(WORDS, k=10)),
+                        "price": prices[i],
+                        "stock": 1_000_000,
+                    }
+                    for i in range(start, min(start + 5000, products))
+                ],
+            )
+        for start in range(0, orders, 2000):
+            batch = range(start, min(start + 2000, orders))
+            lines = {
+                n: [(pid, rng.randint(1, 3)) for pid in rng.sample(range(products), k=2)]
+                for n in batch
+            }
+            order_rows = [
+                {
+                    "id": n + 1,
+                    "user_id": f"load-{rng.randrange(users)}",
+                    "status": rng.choice(list(OrderStatus)),
+                    "subtotal": sum(prices[pid] * qty for pid, qty in lines[n]),
+                }
+                for n in batch
+            ]
+            await conn.execute(insert(Order), order_rows)
+            await conn.execute(
+                insert(OrderItem),
+                [
+                    {
+                        "order_id": n + 1,
+                        "product_id": pid + 1,
+                        "unit_price": prices[pid],
+                        "quantity": qty,
+                    }
+                    for n in batch
+                    for pid, qty in lines[n]
+                ],
+            )
+    if engine.dialect.name == "postgresql" and orders:
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('orders', 'id'), max(id)) FROM orders"
+            )
+
+
+class VirtualUser:
+    def __init__(self, client: AsyncClient, number: int, users: int, products: int, seed: int):
+        self.client = client
+        self.rng = random.Random(seed * 100_003 + number)
+        self.email = email(number % users)
+        self.products = products
+        self.headers: dict[str, str] = {}
+        self.open_orders: list[int] = []
+
+    async def login(self):
+        res = await self.client.post(
+            "/auth/login", json={"email": self.email, "password": PASSWORD}
+        )
+        if res.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+        return res
+
+    async def browse(self):
+        if self.rng.random() < 0.25:
+            return await self.client.get("/orders", headers=self.headers)
+        pages = max(1, self.products // 20)
+        return await self.client.get(
+            "/products", params={"page": self.rng.randint(1, min(pages, 50)), "page_size": 20}
+        )
+
+    async def search(self):
+        return await self.client.get("/products", params={"q": self.rng.choice(WORDS)})
+
+    async def checkout(self):
+        picked = self.rng.sample(range(1, self.products + 1), k=self.rng.randint(1, 3))
+        items = [{"product_id": pid, "quantity": 1} for pid in picked]
+        res = await self.client.post("/orders", json={"items": items}, headers=self.headers)
+        if res.status_code == 201:
+            self.open_orders.append(res.json()["id"])
+        return res
+
+    async def status(self):
+        order_id = self.open_orders.pop(self.rng.randrange(len(self.open_orders)))
+        status = self.rng.choice(["COMPLETED", "CANCELED"])
+        return await self.client.patch(
+            f"/orders/{order_id}/status", json={"status": status}, headers=self.headers
+        )
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(latencies: list[float], errors: int, rejected: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    summary = {
+        "count": len(ordered),
+        "errors": errors,
+        "rejected_4xx": rejected,
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+    }
+    if ordered:
+        summary |= {name: round(percentile(ordered, p), 2) for name, p in PERCENTILES.items()}
+        summary |= {
+            "mean": round(sum(ordered) / len(ordered), 2),
+            "max": round(ordered[-1], 2),
+        }
+    return summary
+
+
+async def run(args: argparse.Namespace, mix: dict[str, int]) -> dict:
+    if args.base_url:
+        client = AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from app.main import create_app
+
+        client = AsyncClient(
+            transport=ASGITransport(app=create_app()), base_url="http://load", timeout=60
+        )
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter[str] = Counter()
+    rejected: Counter[str] = Counter()
+    statuses: Counter[str] = Counter()
+    recording = False
+
+    async def timed(op: str, call) -> None:
+        started = time.perf_counter()
+        try:
+            res = await call()
+            code = res.status_code
+        except Exception:
+            code = 599  # transport failure
+        if recording:
+            latencies[op].append((time.perf_counter() - started) * 1000)
+            statuses[str(code)] += 1
+            if code >= 500:
+                errors[op] += 1
+            elif code >= 400:
+                rejected[op] += 1
+
+    async def virtual_user(user: VirtualUser, deadline: float) -> None:
+        if not user.headers:
+            res = await user.login()
+            if res.status_code != 200:
+                raise SystemExit(f"login as {user.email} failed: {res.status_code} {res.text}")
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            op = user.rng.choices(names, weights)[0]
+            if op == "status" and not user.open_orders:
+                op = "checkout"  # nothing of this user's to update yet
+            await timed(op, getattr(user, op))
+
+    async with client:
+        users = [
+            VirtualUser(client, n, args.users, args.products, args.seed)
+            for n in range(args.concurrency)
+        ]
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(virtual_user(u, deadline) for u in users))
+        recording = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(virtual_user(u, deadline) for u in users))
+        elapsed = time.perf_counter() - started
+
+    everything = [ms for op in latencies.values() for ms in op]
+    return {
+        "config": {
+            "target": args.base_url or "asgi",
+            "database": "scratch-sqlite" if args.scratch else args.database_url,
+            "users": args.users,
+            "products": args.products,
+            "orders": args.orders,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "mix": mix,
+            "seed": args.seed,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+        },
+        "total": summarize(everything, sum(errors.values()), sum(rejected.values()), elapsed),
+        "operations": {
+            op: summarize(latencies[op], errors[op], rejected[op], elapsed)
+            for op in mix
+            if op in latencies
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change per operation: positive throughput / negative latency is better."""
+    delta = {}
+    for op, now in {"total": report["total"], **report["operations"]}.items():
+        before = baseline["total"] if op == "total" else baseline["operations"].get(op)
+        if not before:
+            continue
+        delta[op] = {
+            key: round((now[key] - before[key]) / before[key] * 100, 1)
+            for key in ("throughput_rps", "p50", "p95", "p99")
+            if before.get(key) and key in now
+        }
+    return {"baseline_commit": baseline["config"].get("git_commit"), "change_pct": delta}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    mix = parse_mix(args.mix)
+    if not args.no_seed:
+        await seed(args.users, args.products, args.orders, random.Random(args.seed))
+    report = await run(args, mix)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    from app.shared.db import engine
+    from app.shared.security import shutdown_password_executor
+
+    shutdown_password_executor()
+    await engine.dispose()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None, help="defaults to a scratch SQLite file")
+    parser.add_argument("--base-url", default=None, help="load a running server instead")
+    parser.add_argument("--no-seed", action="store_true", help="reuse the seeded database")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight,...")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="also write the report here")
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    args = parser.parse_args()
+
+    args.scratch = None
+    if args.database_url is None:
+        args.scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        args.database_url = f"sqlite+aiosqlite:///{args.scratch}"
+    # app.shared.db builds its engine on import, so the URL must be set before that
+    os.environ["DATABASE_URL"] = args.database_url
+    try:
+        asyncio.run(main(args))
+    finally:
+        if args.scratch:
+            os.unlink(args.scratch)
@@ -0,0 +1,103 @@
+"""
+Login throughput and catalog latency under concurrent logins.
+
+Runs the ASGI app in-process against a scratch SQLite database. For each password executor
+mode, `--logins` clients hammer POST /auth/login while one client keeps polling
+GET /products; the catalog latency shows how long argon2 holds the event loop.
+
+    python -m scripts.bench.login_contention --logins 16 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_file.name}")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.main import create_app  # noqa: E402
+from app.modules.product.model import Product  # noqa: E402
+from app.shared import security  # noqa: E402
+from app.shared.config import settings  # noqa: E402
+from app.shared.db import BaseModel, engine  # noqa: E402
+
+CREDENTIALS = {"email": "bench@example.com", "password": "bench-password"}
+
+
+async def setup(client: AsyncClient) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.drop_all)
+        await conn.run_sync(BaseModel.metadata.create_all)
+        await conn.execute(
+            insert(Product),
+            [
+                {"name": f"Product {i}", "description": "bench", "price": i, "stock": 10}
+                for i in range(200)
+            ],
+        )
+    res = await client.post("/auth/register", json={"name": "bench", **CREDENTIALS})
+    res.raise_for_status()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 3)
+
+
+async def run_mode(client: AsyncClient, mode: str, logins: int, duration: float) -> dict:
+    security.shutdown_password_executor()
+    settings.password_hash_executor = mode
+    await client.post("/auth/login", json=CREDENTIALS)  # warm the pool
+
+    deadline = time.perf_counter() + duration
+    counts = {"ok": 0, "rejected": 0}
+    probe_ms: list[float] = []
+
+    async def login_loop() -> None:
+        while time.perf_counter() < deadline:
+            res = await client.post("/auth/login", json=CREDENTIALS)
+            counts["ok" if res.status_code == 200 else "rejected"] += 1
+
+    async def probe_loop() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            (await client.get("/products", params={"page_size": 20})).raise_for_status()
+            probe_ms.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(probe_loop(), *(login_loop() for _ in range(logins)))
+    return {
+        "mode": mode,
+        "logins_per_sec": round(counts["ok"] / duration, 1),
+        "rejected_503": counts["rejected"],
+        "catalog_p50_ms": percentile(probe_ms, 0.50),
+        "catalog_p99_ms": percentile(probe_ms, 0.99),
+        "catalog_mean_ms": round(statistics.fmean(probe_ms), 3),
+    }
+
+
+async def main(modes: list[str], logins: int, duration: float) -> None:
+    app = create_app()
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        await setup(client)
+        for mode in modes:
+            print(json.dumps(await run_mode(client, mode, logins, duration)))
+    security.shutdown_password_executor()
+    await engine.dispose()
+    os.unlink(_db_file.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.modes, args.logins, args.duration))
@@ -0,0 +1,99 @@
+"""
+Per-request CPU cost of the metrics instrumentation.
+
+Calls the ASGI app directly (no HTTP client or server in the measurement) for a trivial
+JSON route, once without and once with MetricsMiddleware, and reports the difference. The
+DB-time engine events are measured separately as the cost per executed statement on
+in-memory SQLite.
+
+    python -m scripts.bench.metrics_overhead --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, FastAPI
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.shared import metrics
+from app.shared.config import settings
+from scripts.bench.response_encoding import call
+
+
+def build_app() -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router)
+    if settings.metrics_enabled:
+        app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+async def cpu_per_request(app: FastAPI, requests: int) -> float:
+    for i in range(200):
+        await call(app, f"/items/{i}")
+    started = time.process_time()
+    for i in range(requests):
+        await call(app, f"/items/{i}")
+    return (time.process_time() - started) / requests * 1e6
+
+
+async def cpu_per_statement(statements: int) -> float:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.connect() as conn:
+        query = text("SELECT 1")
+        for _ in range(200):
+            await conn.execute(query)
+        started = time.process_time()
+        for _ in range(statements):
+            await conn.execute(query)
+        elapsed = time.process_time() - started
+    await engine.dispose()
+    return elapsed / statements * 1e6
+
+
+async def main(requests: int) -> None:
+    results = {}
+    for enabled in (False, True):
+        settings.metrics_enabled = enabled
+        results["on" if enabled else "off"] = round(await cpu_per_request(build_app(), requests), 1)
+    print(
+        json.dumps(
+            {
+                "shape": "request",
+                "cpu_us_per_request": results,
+                "overhead_us": round(results["on"] - results["off"], 1),
+            }
+        )
+    )
+
+    plain = await cpu_per_statement(requests)
+    metrics.install_db_timing()
+    timed = await cpu_per_statement(requests)
+    event.remove(Engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", metrics._after_cursor_execute)
+    print(
+        json.dumps(
+            {
+                "shape": "statement",
+                "cpu_us_per_statement": {"off": round(plain, 1), "on": round(timed, 1)},
+                "overhead_us": round(timed - plain, 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,133 @@
+"""
+Per-request CPU and allocation cost of response encoding.
+
+Calls the ASGI app directly (no HTTP client or server in the measurement) for three shapes,
+once with `response_encoding=validated` (FastAPI's response_model pass) and once with
+`fast` (FastJSONRoute):
+
+- product_page:        200-item ProductPage built from ORM-like rows on every request
+- product_page_cached: the same ProductPage instance every time (listing cache hit)
+- order:               100-line OrderOut built by OrderService._order_out
+
+    python -m scripts.bench.response_encoding --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi import APIRouter, FastAPI
+
+from app.modules.order.model import OrderStatus
+from app.modules.order.schemas import OrderOut
+from app.modules.order.service import OrderService
+from app.modules.product.schemas import PaginationMeta, ProductPage
+from app.shared.config import settings
+from app.shared.responses import FastJSONRoute
+
+ROWS = [
+    SimpleNamespace(
+        id=i, name=f"Product {i}", description="lorem ipsum " * 6, price=i * 1.25, stock=i
+    )
+    for i in range(200)
+]
+LINES = [(i, 1 + i % 3, Decimal("9.99") + i) for i in range(100)]
+META = PaginationMeta(page=1, page_size=200, total=10_000, total_exact=True, pages=50)
+CACHED_PAGE = ProductPage(data=ROWS, meta=META)
+
+
+def build_app() -> FastAPI:
+    router = APIRouter(route_class=FastJSONRoute)
+
+    @router.get("/product_page", response_model=ProductPage)
+    async def product_page():
+        return ProductPage(data=ROWS, meta=META)
+
+    @router.get("/product_page_cached", response_model=ProductPage)
+    async def product_page_cached():
+        return CACHED_PAGE
+
+    @router.get("/order", response_model=OrderOut)
+    async def order():
+        subtotal = sum(price * qty for _, qty, price in LINES)
+        return OrderService._order_out(1, OrderStatus.WAITING_PAYMENT, subtotal, LINES)
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("bench", 0),
+        "server": ("bench", 80),
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> dict:
+    for _ in range(50):
+        size = await call(app, path)
+
+    started = time.process_time()
+    for _ in range(requests):
+        await call(app, path)
+    cpu_us = (time.process_time() - started) / requests * 1e6
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(requests, 200)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await call(app, path)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "cpu_us_per_request": round(cpu_us, 1),
+        "peak_alloc_kib_per_request": round(sum(peaks) / len(peaks) / 1024, 1),
+        "body_bytes": size,
+    }
+
+
+async def main(requests: int) -> None:
+    app = build_app()
+    for path in ("/product_page", "/product_page_cached", "/order"):
+        results = {}
+        for mode in ("validated", "fast"):
+            settings.response_encoding = mode
+            results[mode] = await measure(app, path, requests)
+        speedup = results["validated"]["cpu_us_per_request"] / results["fast"]["cpu_us_per_request"]
+        print(json.dumps({"shape": path.strip("/"), **results, "cpu_speedup": round(speedup, 2)}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
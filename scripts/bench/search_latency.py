@@ -0,0 +1,123 @@
+"""
+Search latency vs catalog size.
+
+Seeds a scratch products table at each size and times GET /products?q=... through
+ProductService, comparing the indexed search backend with the old ILIKE sequential scan.
+
+    python -m scripts.bench.search_latency --sizes 1000 10000 100000
+    python -m scripts.bench.search_latency --database-url postgresql+asyncpg://.../scratch
+
+The products table in the target database is DROPPED and recreated; never point this at a
+database you care about.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.product.model import Product
+from app.modules.product.service import ProductService
+
+WORDS = [
+    f"{a}{b}"
+    for a in ("aero", "blue", "crim", "delta", "echo", "flux", "giga", "hexa", "iron", "jade")
+    for b in ("board", "cable", "dock", "lamp", "mouse", "pad", "screen", "stand", "watch", "zoom")
+]
+
+
+def build_rows(rng: random.Random, count: int) -> list[dict]:
+    return [
+        {
+            "name": " ".join(rng.choices(WORDS, k=3)) + f" {i}",
+            "description": " ".join(rng.choices(WORDS, k=10)),
+            "price": round(rng.uniform(1, 3000), 2),
+            "stock": rng.randint(0, 500),
+        }
+        for i in range(count)
+    ]
+
+
+async def reset_products(engine, rows: list[dict]) -> None:
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(lambda c: Product.__table__.drop(c, checkfirst=True))
+        await conn.run_sync(lambda c: Product.__table__.create(c))
+        for i in range(0, len(rows), 5000):
+            await conn.execute(insert(Product), rows[i : i + 5000])
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("ANALYZE products"))
+
+
+async def time_queries(session: AsyncSession, queries: list[str], sort: str) -> list[float]:
+    service = ProductService(session)
+    await service.list_products(q=queries[0], sort=sort)  # warm-up (builds in-process index)
+    timings = []
+    for q in queries:
+        started = time.perf_counter()
+        await service.list_products(q=q, sort=sort)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def scan_baseline(session: AsyncSession, queries: list[str]) -> list[float]:
+    """The pre-index query shape: two ILIKE statements over a sequential scan."""
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SET enable_bitmapscan = off"))
+        await session.execute(text("SET enable_indexscan = off"))
+
+    timings = []
+    for q in queries:
+        cond = or_(Product.name.ilike(f"%{q}%"), Product.description.ilike(f"%{q}%"))
+        started = time.perf_counter()
+        await session.execute(select(func.count()).select_from(Product).where(cond))
+        await session.execute(select(Product).where(cond).order_by(Product.name).limit(20))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+async def main(database_url: str, sizes: list[int], queries_per_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_async_engine(database_url)
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        for size in sizes:
+            await reset_products(engine, build_rows(rng, size))
+            queries = [rng.choice(WORDS)[: rng.randint(4, 8)] for _ in range(queries_per_size)]
+            result = {"size": size, "dialect": engine.dialect.name}
+            async with Session() as session:
+                result["scan"] = summarize(await scan_baseline(session, queries))
+            async with Session() as session:
+                result["indexed"] = summarize(await time_queries(session, queries, "name"))
+            async with Session() as session:
+                result["indexed_relevance"] = summarize(
+                    await time_queries(session, queries, "relevance")
+                )
+            print(json.dumps(result))
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.database_url, args.sizes, args.queries, args.seed))
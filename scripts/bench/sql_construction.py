@@ -0,0 +1,181 @@
+"""
+Per-request Python CPU spent building and compiling the hot SQL statements.
+
+For each hot statement, "before" builds it with select(...) per call the way the services
+used to, and "after" executes the statement the service now defines once, with bound
+parameters. Three numbers per statement, in CPU microseconds:
+
+- build_us:   constructing the statement plus generating its cache key, which SQLAlchemy
+              does on every execution before it looks up the compiled form
+- execute_us: a full session.execute() on in-memory SQLite (tiny tables, so this is
+              mostly Python overhead: build, cache lookup, ORM setup, result handling)
+- compile_us: compiling for PostgreSQL/asyncpg from scratch, i.e. what each statement
+              would cost without SQLAlchemy's compiled cache (same before and after)
+
+    python -m scripts.bench.sql_construction --iterations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from functools import partial
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+import app.modules.idempotency.model  # noqa: F401  (register every table)
+from app.modules.order import service as order_service
+from app.modules.order.model import Order, OrderItem, OrderStatus
+from app.modules.order.partitions import END_OF_TIME, EPOCH
+from app.modules.product import service as product_service
+from app.modules.product.model import Product
+from app.modules.user import service as user_service
+from app.modules.user.model import User
+from app.shared.db import BaseModel
+
+USER = "u1"
+
+# name: (per-call builder as the code used to read, prebuilt statement, its parameters)
+STATEMENTS = {
+    "user_by_id": (
+        lambda: select(User).where(User.id == USER),
+        user_service.USER_BY_ID,
+        {"user_id": USER},
+    ),
+    "order_version": (
+        lambda: select(Order.updated_at).where(Order.id == 1, Order.user_id == USER),
+        order_service._ORDER_VERSION,
+        {"order_id": 1, "user_id": USER, "since": EPOCH},
+    ),
+    "order_with_items": (
+        lambda: select(Order)
+        .where(Order.id == 1, Order.user_id == USER)
+        .options(selectinload(Order.items)),
+        order_service._ORDER_WITH_ITEMS,
+        {"order_id": 1, "user_id": USER, "since": EPOCH},
+    ),
+    "user_order_count": (
+        lambda: select(func.count()).select_from(Order).where(Order.user_id == USER),
+        order_service._USER_ORDER_COUNT,
+        {"user_id": USER},
+    ),
+    "user_orders_page": (
+        lambda: select(Order)
+        .where(Order.user_id == USER)
+        .order_by(Order.id.desc())
+        .limit(21)
+        .offset(0)
+        .options(selectinload(Order.items)),
+        order_service._USER_ORDERS_PAGE,
+        {"user_id": USER, "limit": 21, "offset": 0, "since": EPOCH, "until": END_OF_TIME},
+    ),
+    "product_prices": (
+        lambda: select(Product.id, Product.price).where(Product.id.in_([1, 2, 3])),
+        order_service._PRODUCT_PRICES,
+        {"product_ids": [1, 2, 3]},
+    ),
+    "product_page": (
+        lambda: select(Product).order_by(Product.name.asc(), Product.id.asc()).limit(21).offset(0),
+        product_service._PAGE["name", "asc"],
+        {"limit": 21, "offset": 0},
+    ),
+    "latest_update": (
+        lambda: select(func.max(Product.updated_at)),
+        product_service._LATEST_UPDATE,
+        None,
+    ),
+}
+
+
+def cpu_us(work, iterations: int) -> float:
+    for _ in range(min(iterations, 200)):
+        work()
+    started = time.process_time()
+    for _ in range(iterations):
+        work()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+async def async_cpu_us(work, iterations: int) -> float:
+    for _ in range(min(iterations, 200)):
+        await work()
+    started = time.process_time()
+    for _ in range(iterations):
+        await work()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+async def seed(session: AsyncSession) -> None:
+    session.add(User(id=USER, name="bench", email="bench@example.com", password="x"))
+    session.add_all(Product(name=f"p{i}", description="", price=i, stock=10) for i in range(1, 41))
+    session.add(
+        Order(
+            id=1,
+            user_id=USER,
+            status=OrderStatus.WAITING_PAYMENT,
+            subtotal=3,
+            items=[OrderItem(product_id=pid, unit_price=pid, quantity=1) for pid in (1, 2)],
+        )
+    )
+    await session.commit()
+
+
+async def main(iterations: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    dialect = asyncpg_dialect()
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        await seed(session)
+
+        async def run(stmt, params) -> None:
+            (await session.execute(stmt, params)).all()
+            session.expunge_all()
+
+        totals = {"before": 0.0, "after": 0.0}
+        for name, (build, prebuilt, params) in STATEMENTS.items():
+            result = {
+                "statement": name,
+                "build_us": {
+                    "before": round(
+                        cpu_us(lambda build=build: build()._generate_cache_key(), iterations), 2
+                    ),
+                    "after": round(cpu_us(prebuilt._generate_cache_key, iterations), 2),
+                },
+                "execute_us": {
+                    "before": round(
+                        await async_cpu_us(lambda build=build: run(build(), None), iterations), 1
+                    ),
+                    "after": round(
+                        await async_cpu_us(partial(run, prebuilt, params), iterations), 1
+                    ),
+                },
+                "compile_us": round(
+                    cpu_us(partial(prebuilt.compile, dialect=dialect), iterations // 10 or 1), 1
+                ),
+            }
+            for side in totals:
+                totals[side] += result["execute_us"][side]
+            print(json.dumps(result))
+
+    await engine.dispose()
+    print(
+        json.dumps(
+            {
+                "statement": "all",
+                "execute_us": {side: round(total, 1) for side, total in totals.items()},
+                "saved_pct": round((1 - totals["after"] / totals["before"]) * 100, 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
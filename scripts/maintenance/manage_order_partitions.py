@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.modules.order.partitions import (
+    TABLES,
+    archive_settled_orders,
+    create_archive_partition,
+    create_live_partition,
+    drop_partition_if_empty,
+    list_partitions,
+    live_partition,
+    live_partition_start,
+    month_start,
+    stranded_months,
+)
+from app.shared.config import settings
+from app.shared.db import AsyncSessionLocal
+
+
+async def manage_order_partitions(
+    months_ahead: int = settings.order_partition_months_ahead,
+    archive_after_days: int = settings.order_archive_after_days,
+    batch_size: int = settings.order_archive_batch_size,
+):
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=archive_after_days)
+
+    # live partitions for the coming months, and for any month whose rows fell into the default
+    created = []
+    for table in TABLES:
+        async with AsyncSessionLocal() as session:
+            months = set(await stranded_months(session, table))
+        months.update(month_start(now, shift) for shift in range(months_ahead + 1))
+        for start in sorted(months):
+            # one short transaction per partition: creating one locks its parent briefly
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    if await create_live_partition(session, table, start):
+                        created.append(live_partition(table, start)[0])
+
+    # a yearly archive partition for every year that still has live partitions to archive
+    async with AsyncSessionLocal() as session:
+        starts = [
+            live_partition_start(name) for name in await list_partitions(session, "orders_live")
+        ]
+    first_year = min((start.year for start in starts if start), default=cutoff.year)
+    for table in TABLES:
+        for year in range(first_year, cutoff.year + 1):
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    if await create_archive_partition(session, table, year):
+                        created.append(f"{table}_archive_{year}")
+
+    # short transactions so the job never holds many row locks at once
+    archived, after_id = 0, 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                moved = await archive_settled_orders(session, cutoff, after_id, batch_size)
+        archived += len(moved)
+        if len(moved) < batch_size:
+            break
+        after_id = max(moved)
+
+    # months wholly before the cutoff are left empty once nothing in them is unsettled
+    dropped = 0
+    for table in TABLES:
+        async with AsyncSessionLocal() as session:
+            names = await list_partitions(session, f"{table}_live")
+        for name in names:
+            start = live_partition_start(name)
+            if start is None or month_start(start, 1) > month_start(cutoff):
+                continue
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    dropped += await drop_partition_if_empty(session, name)
+
+    print(
+        f"✅ Created {len(created)} partitions, archived {archived} settled orders, "
+        f"dropped {dropped} empty live partitions."
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(manage_order_partitions())
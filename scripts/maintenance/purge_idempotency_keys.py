@@ -0,0 +1,21 @@
+import asyncio
+
+from app.modules.idempotency.service import IdempotencyService
+from app.shared.db import AsyncSessionLocal
+
+
+async def purge_idempotency_keys(batch_size: int = 1000):
+    # short transactions so the purge never holds many row locks at once
+    purged = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                deleted = await IdempotencyService(session).purge_expired(batch_size)
+        purged += deleted
+        if deleted < batch_size:
+            break
+    print(f"✅ Purged {purged} expired idempotency keys.")
+
+
+if __name__ == "__main__":
+    asyncio.run(purge_idempotency_keys())
@@ -0,0 +1,326 @@
+"""
+High-volume synthetic dataset for reproducing production query plans.
+
+Generates users, products, orders and order items and streams them into PostgreSQL with
+asyncpg's binary COPY (`copy_records_to_table`), from parallel worker processes:
+
+- product popularity is Zipfian (`--product-skew`): a few products appear in most order
+  lines. Popular products are scattered over the id range, not clustered at low ids
+- orders per user are heavy-tailed (`--user-skew`): most users have a handful of orders,
+  a few have thousands
+- orders get 1-10 distinct lines (mostly 1-3), created_at spread over `--days` and rising
+  with the id; subtotal and unit prices match the products
+
+Each table is cut into fixed-size chunks and every chunk draws from its own generator
+seeded with (`--seed`, table, chunk). The data is therefore identical for a given seed
+whatever `--workers` is. Prices and user ids are pure functions of the seed and the row
+number, so workers never need to share state.
+
+The schema must exist (`alembic upgrade head`) and the tables must be empty, or pass
+`--truncate` to empty them first. `--dry-run` only generates, which measures generation
+speed without a database. One JSON line per table reports rows and rows/sec. Orders
+older than the partitions the migration created land in the default partitions;
+`make partition_orders` afterwards gives their months partitions of their own.
+
+    python -m scripts.seed.generate_dataset --products 10000000 --users 2000000 \\
+        --orders 50000000 --workers 8 --truncate
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+CHUNK_ROWS = {"users": 100_000, "products": 100_000, "orders": 20_000}
+COLUMNS = {
+    "users": ("id", "name", "email", "password", "created_at", "updated_at"),
+    "products": ("id", "name", "description", "price", "stock", "created_at", "updated_at"),
+    "orders": ("id", "user_id", "status", "subtotal", "created_at", "updated_at"),
+    "order_items": (
+        "order_id",
+        "product_id",
+        "unit_price",
+        "quantity",
+        "stock_applied",
+        "created_at",
+    ),
+}
+STATUSES = ("COMPLETED", "WAITING_PAYMENT", "CANCELED")
+STATUS_WEIGHTS = (70, 20, 10)
+ADJECTIVES = (
+    "Aurora Crimson Velvet Silver Cobalt Amber Onyx Ivory Jade Scarlet Lunar Solar "
+    "Arctic Ember Misty Rustic Urban Royal Swift Quiet"
+).split()
+NOUNS = (
+    "Keyboard Monitor Lamp Backpack Headset Speaker Watch Mouse Chair Desk Kettle Blender "
+    "Camera Charger Tripod Jacket Sneaker Bottle Notebook Drone"
+).split()
+# multiplicative permutation of popularity ranks over ids (prime, so coprime with any count
+# below it)
+SCATTER = 2_654_435_761
+
+
+def _hash(seed: int, kind: str, n: int) -> int:
+    digest = hashlib.blake2b(f"{seed}:{kind}:{n}".encode(), digest_size=16).digest()
+    return int.from_bytes(digest, "big")
+
+
+def user_id(seed: int, n: int) -> str:
+    return str(uuid.UUID(int=_hash(seed, "user", n), version=4))
+
+
+def product_cents(seed: int, product_id: int) -> int:
+    # log-uniform between 1.99 and 2999.99, so cheap products are the common case
+    unit = (_hash(seed, "price", product_id) % 1_000_000) / 1_000_000
+    return int(199 * (300_000 / 199) ** unit)
+
+
+class Zipf:
+    """Ranks 1..n with P(rank k) ~ k^-s, by inverting the continuous approximation."""
+
+    def __init__(self, n: int, s: float):
+        self.n, self.s = n, s
+        self._top = math.log(n + 1) if s == 1 else (n + 1) ** (1 - s) - 1
+
+    def rank(self, rng: random.Random) -> int:
+        u = rng.random()
+        if self.s == 1:
+            value = math.exp(u * self._top)
+        else:
+            value = (1 + u * self._top) ** (1 / (1 - self.s))
+        return min(self.n, int(value))
+
+    def scattered(self, rng: random.Random) -> int:
+        """A 1-based id whose popularity follows the rank, spread over the id range."""
+        return (self.rank(rng) - 1) * SCATTER % self.n + 1
+
+
+def _chunk_rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def _rows(table: str, chunk: int, opts: dict) -> dict[str, list[tuple]]:
+    """The rows of one chunk (orders come with their items)."""
+    seed, size, total = opts["seed"], CHUNK_ROWS[table], opts[table]
+    rng = _chunk_rng(seed, table, chunk)
+    first, last = chunk * size + 1, min(total, (chunk + 1) * size)
+    end = datetime.fromisoformat(opts["end"]).replace(tzinfo=timezone.utc)
+    span = timedelta(days=opts["days"]).total_seconds()
+    start = end - timedelta(days=opts["days"])
+
+    if table == "users":
+        rows = []
+        for n in range(first, last + 1):
+            joined = start - timedelta(seconds=rng.random() * span)
+            rows.append(
+                (
+                    user_id(seed, n),
+                    f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}",
+                    f"user{n}@example.com",
+                    opts["password_hash"],
+                    joined,
+                    joined,
+                )
+            )
+        return {"users": rows}
+
+    if table == "products":
+        rows = []
+        for n in range(first, last + 1):
+            listed = start - timedelta(seconds=rng.random() * span)
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}"
+            description = " ".join(rng.choices(ADJECTIVES + NOUNS, k=12)).lower()
+            rows.append(
+                (
+                    n,
+                    name,
+                    description,
+                    product_cents(seed, n) / 100,
+                    rng.randint(0, 1000),
+                    listed,
+                    listed,
+                )
+            )
+        return {"products": rows}
+
+    products = Zipf(opts["products"], opts["product_skew"])
+    users = Zipf(opts["users"], opts["user_skew"])
+    orders, items = [], []
+    for n in range(first, last + 1):
+        created = start + timedelta(seconds=(n - 1) / total * span + rng.random() * 60)
+        lines = min(10, 1 + int(rng.expovariate(0.9)))
+        picked: set[int] = set()
+        while len(picked) < min(lines, opts["products"]):
+            picked.add(products.scattered(rng))
+        subtotal = 0
+        for product_id in sorted(picked):
+            quantity = 1 + int(rng.expovariate(1.5))
+            cents = product_cents(seed, product_id)
+            subtotal += cents * quantity
+            items.append((n, product_id, Decimal(cents) / 100, quantity, True, created))
+        status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+        owner = user_id(seed, users.scattered(rng))
+        orders.append((n, owner, status, Decimal(subtotal) / 100, created, created))
+    return {"orders": orders, "order_items": items}
+
+
+async def _copy_chunks(table: str, chunks: list[int], opts: dict) -> int:
+    written = 0
+    if opts["dry_run"]:
+        for chunk in chunks:
+            written += sum(len(rows) for rows in _rows(table, chunk, opts).values())
+        return written
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    engine = create_async_engine(opts["database_url"], poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            driver = (await conn.get_raw_connection()).driver_connection
+            for chunk in chunks:
+                batch = _rows(table, chunk, opts)
+                # a chunk's orders and their items land together or not at all
+                async with driver.transaction():
+                    for name, rows in batch.items():
+                        await driver.copy_records_to_table(
+                            name, records=rows, columns=COLUMNS[name]
+                        )
+                        written += len(rows)
+    finally:
+        await engine.dispose()
+    return written
+
+
+def _worker(table: str, chunks: list[int], opts: dict) -> int:
+    return asyncio.run(_copy_chunks(table, chunks, opts))
+
+
+def load_table(pool: ProcessPoolExecutor, table: str, opts: dict, workers: int) -> dict:
+    chunks = math.ceil(opts[table] / CHUNK_ROWS[table])
+    started = time.perf_counter()
+    futures = [
+        pool.submit(_worker, table, list(range(w, chunks, workers)), opts)
+        for w in range(min(workers, chunks))
+    ]
+    rows = sum(f.result() for f in futures)
+    elapsed = time.perf_counter() - started
+    return {
+        "table": table if table != "orders" else "orders+order_items",
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed) if elapsed else None,
+    }
+
+
+async def _prepare(opts: dict, truncate: bool) -> None:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(opts["database_url"])
+    async with engine.begin() as conn:
+        if truncate:
+            await conn.execute(
+                text("TRUNCATE order_items, orders, products, users RESTART IDENTITY CASCADE")
+            )
+    await engine.dispose()
+
+
+async def _finish(opts: dict) -> None:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(opts["database_url"])
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # explicit ids were copied, so move the sequences past them
+        for table in ("products", "orders"):
+            await conn.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+                )
+            )
+        await conn.execute(text("ANALYZE users, products, orders, order_items"))
+    await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    from app.shared.security import hash_password
+
+    opts = {
+        "database_url": args.database_url,
+        "dry_run": args.dry_run,
+        "seed": args.seed,
+        "users": args.users,
+        "products": args.products,
+        "orders": args.orders,
+        "product_skew": args.product_skew,
+        "user_skew": args.user_skew,
+        "days": args.days,
+        "end": args.end,
+        # one hash for every user: argon2 per row would dominate the run
+        "password_hash": hash_password(args.password),
+    }
+    if not args.dry_run:
+        asyncio.run(_prepare(opts, args.truncate))
+
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # orders reference users and products, so they go last
+        for table in ("users", "products", "orders"):
+            if opts[table]:
+                results.append(load_table(pool, table, opts, args.workers))
+                print(json.dumps(results[-1]), flush=True)
+    if not args.dry_run:
+        asyncio.run(_finish(opts))
+
+    elapsed = time.perf_counter() - started
+    rows = sum(r["rows"] for r in results)
+    print(
+        json.dumps(
+            {
+                "table": "total",
+                "rows": rows,
+                "seconds": round(elapsed, 2),
+                "rows_per_sec": round(rows / elapsed) if elapsed else None,
+                "workers": args.workers,
+                "seed": args.seed,
+                "dry_run": args.dry_run,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="postgresql+asyncpg:// URL (defaults to $DATABASE_URL)",
+    )
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--product-skew", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--user-skew", type=float, default=0.9, help="Zipf exponent")
+    parser.add_argument("--days", type=int, default=730, help="order history length")
+    parser.add_argument("--end", default="2026-01-01", help="newest order date (UTC)")
+    parser.add_argument("--password", default="password123", help="every user's password")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="empty the tables first")
+    parser.add_argument("--dry-run", action="store_true", help="generate without writing")
+    args = parser.parse_args()
+    if not args.dry_run and not (args.database_url or "").startswith("postgresql"):
+        parser.error("COPY needs a postgresql+asyncpg:// --database-url (or use --dry-run)")
+    main(args)
@@ -0,0 +1,18 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.modules.idempotency.model  # noqa: F401  (register tables on BaseModel.metadata)
+import app.modules.order.model  # noqa: F401
+import app.modules.product.model  # noqa: F401
+import app.modules.user.model  # noqa: F401
+from app.shared.db import BaseModel
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as s:
+        yield s
+    await engine.dispose()
@@ -0,0 +1,37 @@
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import update
+
+from app.api.deps import get_current_user
+from app.modules.user.model import User
+from app.shared.config import settings
+from app.shared.security import generate_access_token
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def test_user_is_cached_and_evicted_on_write(session):
+    user = User(id="u1", name="Ann", email="ann@x.io", password="x")
+    session.add(user)
+    await session.commit()
+    token = generate_access_token("u1")
+
+    assert (await get_current_user(bearer(token), session)).name == "Ann"
+
+    # a Core update bypasses the ORM hooks, so the cached snapshot is still served
+    await session.execute(update(User).where(User.id == "u1").values(name="Zed"))
+    await session.commit()
+    assert (await get_current_user(bearer(token), session)).name == "Ann"
+
+    user.name = "Bea"
+    await session.commit()
+    assert (await get_current_user(bearer(token), session)).name == "Bea"
+
+
+async def test_trusted_claims_skip_the_lookup(session, monkeypatch):
+    monkeypatch.setattr(settings, "auth_trust_token_claims", True)
+    token = generate_access_token("ghost", claims={"name": "G", "email": "g@x.io"})
+
+    user = await get_current_user(bearer(token), session)
+    assert (user.id, user.email) == ("ghost", "g@x.io")
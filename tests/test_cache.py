@@ -0,0 +1,62 @@
+import asyncio
+
+from app.shared.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats.evictions == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+async def test_stale_while_revalidate_runs_one_refresh():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=10, stale_ttl=10, clock=clock)
+    calls = []
+
+    async def load():
+        calls.append("load")
+        return len(calls)
+
+    assert await cache.get_or_load("k", load, refresher=load) == 1
+    clock.now = 15
+    assert await asyncio.gather(*(cache.get_or_load("k", load, refresher=load) for _ in range(5)))
+    await asyncio.sleep(0)
+    assert calls == ["load", "load"]
+    assert await cache.get_or_load("k", load) == 2
+    assert (cache.stats.misses, cache.stats.stale_hits, cache.stats.hits) == (1, 5, 1)
+
+
+async def test_concurrent_misses_share_one_load_and_clear_discards_it():
+    cache = TTLCache(maxsize=10, ttl=10)
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load():
+        started.set()
+        await release.wait()
+        return "v"
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", load)) for _ in range(3)]
+    await started.wait()
+    cache.clear()
+    release.set()
+    assert await asyncio.gather(*tasks) == ["v", "v", "v"]
+    assert cache.get("k") is None
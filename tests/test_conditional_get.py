@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import update
+
+from app.api.deps import get_current_user
+from app.main import create_app
+from app.modules.order.service import OrderService
+from app.modules.product.cache import (
+    get_product_page_cache,
+    get_product_validator_cache,
+    invalidate_product_cache,
+)
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.config import settings
+from app.shared.db import get_session
+from app.shared.profiler import profile_queries
+
+
+@pytest.fixture
+async def client(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add_all(Product(name=f"p{i}", description="", price=i, stock=5) for i in range(5))
+    await session.commit()
+    invalidate_product_cache()
+
+    app = create_app()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+async def test_product_listing_revalidates_with_etag(client, session):
+    first = await client.get("/products", params={"page_size": 2})
+    etag = first.headers["etag"]
+
+    again = await client.get("/products", params={"page_size": 2}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    other_page = await client.get(
+        "/products", params={"page_size": 2, "page": 2}, headers={"If-None-Match": etag}
+    )
+    assert other_page.status_code == 200
+
+    session.add(Product(name="new", description="", price=1, stock=1))
+    await session.commit()
+    changed = await client.get(
+        "/products", params={"page_size": 2}, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_listing_validator_runs_only_for_conditional_requests_or_to_seed_the_cache(
+    client, monkeypatch
+):
+    def validator_queries(profile):
+        return [q.shape for q in profile.queries if "max(products.updated_at)" in q.shape]
+
+    # first listing: count and page, then one index probe seeds the cached validator
+    with profile_queries() as profile:
+        first = await client.get("/products")
+    assert profile.count == 3 and len(validator_queries(profile)) == 1
+    with profile_queries() as profile:
+        other = await client.get("/products", params={"page_size": 3})
+    assert validator_queries(profile) == [] and other.headers["etag"] != first.headers["etag"]
+
+    monkeypatch.setattr(settings, "product_cache_enabled", False)
+    with profile_queries() as profile:
+        plain = await client.get("/products")
+    assert profile.count == 2 and "etag" not in plain.headers
+    with profile_queries() as profile:
+        again = await client.get("/products", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    # the newest updated_at and a count, no per-row aggregate
+    assert [q.shape.split(" FROM")[0] for q in profile.queries] == [
+        "SELECT max(products.updated_at) AS max_1",
+        "SELECT count(*) AS count_1",
+    ]
+
+
+async def test_a_page_served_stale_keeps_the_etag_it_was_cached_with(client, session, monkeypatch):
+    now = [0.0]
+    for cache in (
+        get_product_page_cache(session.bind),
+        get_product_validator_cache(session.bind),
+    ):
+        monkeypatch.setattr(cache, "_clock", lambda: now[0])
+    first = await client.get("/products")
+
+    # a stock change this process never hears about (another worker, no LISTEN/NOTIFY)
+    # (a second later: SQLite's CURRENT_TIMESTAMP has whole seconds)
+    later = datetime.now(timezone.utc) + timedelta(seconds=1)
+    await session.execute(update(Product).where(Product.id == 1).values(stock=4, updated_at=later))
+    await session.commit()
+    now[0] = settings.product_cache_ttl_seconds + 1
+
+    stale = await client.get("/products")
+    assert stale.json() == first.json()
+    assert stale.headers["etag"] == first.headers["etag"]
+    again = await client.get("/products", headers={"If-None-Match": stale.headers["etag"]})
+    assert again.status_code == 200
+
+    # once the background refresh has replaced the page, it comes with the new ETag
+    for _ in range(100):
+        fresh = await client.get("/products")
+        if fresh.json() != first.json():
+            break
+        assert fresh.headers["etag"] == first.headers["etag"]
+        await asyncio.sleep(0.01)
+    assert fresh.json()["data"][0]["stock"] == 4
+    assert fresh.headers["etag"] != first.headers["etag"]
+
+
+async def test_order_detail_honours_if_none_match_and_if_modified_since(client, session):
+    order = await OrderService(session).create_order("u1", [(1, 1)])
+    await session.commit()
+
+    first = await client.get(f"/orders/{order.id}")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    by_etag = await client.get(
+        f"/orders/{order.id}", headers={"If-None-Match": f'"x", {first.headers["etag"]}'}
+    )
+    assert by_etag.status_code == 304
+
+    by_date = await client.get(
+        f"/orders/{order.id}", headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+    assert by_date.status_code == 304
+
+    stale = await client.get(f"/orders/{order.id}", headers={"If-None-Match": '"old"'})
+    assert stale.status_code == 200
+
+    session.add(User(id="u2", name="b", email="b@x.io", password="x"))
+    foreign = await OrderService(session).create_order("u2", [(1, 1)])
+    await session.commit()
+    for missing in (foreign.id, 999):
+        response = await client.get(f"/orders/{missing}", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+        assert (await client.get(f"/orders/{missing}")).status_code == 404
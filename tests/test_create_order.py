@@ -0,0 +1,28 @@
+from sqlalchemy import event
+
+from app.modules.order.service import OrderService
+from app.modules.product.model import Product
+from app.modules.user.model import User
+
+
+async def test_fifty_line_order_takes_three_statements(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    products = [Product(name=f"p{i}", description="", price=i + 0.125, stock=5) for i in range(50)]
+    session.add_all(products)
+    await session.commit()
+
+    statements = []
+    listen_on = session.bind.sync_engine
+    record = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(listen_on, "before_cursor_execute", record)
+    try:
+        created = await OrderService(session).create_order(
+            "u1", [(p.id, 2) for p in products] + [(products[0].id, 1)]
+        )
+    finally:
+        event.remove(listen_on, "before_cursor_execute", record)
+    await session.commit()
+
+    assert [s.split()[0] for s in statements] == ["UPDATE", "INSERT", "INSERT"]
+    assert created == await OrderService(session).get_order(created.id, user_id="u1")
+    assert created.items[0].quantity == 3
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_current_user
+from app.main import create_app
+from app.modules.order.service import OrderService
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.config import settings
+from app.shared.db import get_session
+
+
+@pytest.fixture
+async def client(session, monkeypatch):
+    # small batches so every export spans several cursor fetches
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add(User(id="u2", name="b", email="b@x.io", password="x"))
+    session.add_all(
+        Product(name=f"p{i}", description='d, "quoted"', price=i + 1, stock=100) for i in range(5)
+    )
+    await session.commit()
+
+    app = create_app()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+async def test_product_export_streams_every_row(client):
+    ndjson = await client.get("/products/export")
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [r["id"] for r in records] == [1, 2, 3, 4, 5]
+    assert records[0]["description"] == 'd, "quoted"'
+
+    as_csv = await client.get("/products/export", params={"format": "csv"})
+    assert as_csv.headers["content-disposition"] == 'attachment; filename="products.csv"'
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert [int(r["id"]) for r in rows] == [1, 2, 3, 4, 5]
+    assert rows[4]["description"] == 'd, "quoted"'
+
+
+async def test_order_export_keeps_items_with_their_order_across_batches(client, session):
+    service = OrderService(session)
+    first = await service.create_order("u1", [(1, 1), (2, 2), (3, 1)])
+    second = await service.create_order("u1", [(4, 3)])
+    await service.create_order("u2", [(5, 1)])
+    await session.commit()
+
+    ndjson = await client.get("/orders/export")
+    orders = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [o["id"] for o in orders] == [first.id, second.id]
+    assert [(i["product_id"], i["quantity"]) for i in orders[0]["items"]] == [
+        (1, 1),
+        (2, 2),
+        (3, 1),
+    ]
+    assert orders[0]["subtotal"] == first.subtotal
+    assert orders[1]["items"][0]["line_total"] == 12.0
+
+    as_csv = await client.get("/orders/export", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(as_csv.text)))
+    assert [(int(r["order_id"]), int(r["product_id"])) for r in rows] == [
+        (first.id, 1),
+        (first.id, 2),
+        (first.id, 3),
+        (second.id, 4),
+    ]
+    assert rows[0]["status"] == first.status
@@ -1,6 +1,10 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
-from app.main import app
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api import warmup
+from app.main import app, create_app
+from app.shared.db import get_session
 
 
 @pytest.mark.asyncio
@@ -9,3 +13,28 @@ async def test_health():
         res = await ac.get("/health")
     assert res.status_code == 200
     assert res.json() == {"status": "ok"}
+
+
+async def test_ready_only_after_warm_up(session, monkeypatch):
+    monkeypatch.setattr(warmup, "_ready", False)
+    monkeypatch.setattr(warmup, "_shutting_down", False)
+    monkeypatch.setattr(warmup, "pool_engines", lambda: {"primary": session.bind})
+    session_factory = async_sessionmaker(session.bind, expire_on_commit=False)
+    warm_app = create_app()
+    warm_app.dependency_overrides[get_session] = lambda: session
+
+    async with AsyncClient(transport=ASGITransport(app=warm_app), base_url="http://test") as ac:
+        warming = await ac.get("/ready")
+        assert warming.status_code == 503
+        assert warming.json()["status"] == "warming"
+
+        report = await warmup.warm_up(session_factory, warm_app)
+        assert report["failed"] == []
+        assert set(report["steps"]) == {"pool", "products", "orders", "users", "routes"}
+        ready = await ac.get("/ready")
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+
+        await warmup.stop_warmup()
+        assert (await ac.get("/ready")).status_code == 503
+        assert (await ac.get("/health")).status_code == 200
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.order.model import OrderItem
+from app.modules.order.service import OrderService
+from app.modules.product.inventory import HotInventory, install_hot_inventory
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.db import BaseModel
+
+
+@pytest.fixture
+async def sessionmaker(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'shop.db'}", connect_args={"timeout": 30}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)() as s:
+        s.add(User(id="u1", name="a", email="a@x.io", password="x"))
+        s.add_all(
+            [
+                Product(id=1, name="hot", description="", price=5, stock=10),
+                Product(id=2, name="cold", description="", price=1, stock=3),
+            ]
+        )
+        await s.commit()
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    install_hot_inventory(None)
+    await engine.dispose()
+
+
+async def _stock(sessionmaker, product_id: int) -> int:
+    async with sessionmaker() as session:
+        return await session.scalar(select(Product.stock).where(Product.id == product_id))
+
+
+async def test_hot_checkouts_never_oversell_and_flush_to_stock(sessionmaker):
+    inventory = HotInventory([1], shards=4)
+    async with sessionmaker() as session:
+        await inventory.recover(session)
+    install_hot_inventory(inventory)
+
+    async def checkout(items) -> bool:
+        async with sessionmaker() as session:
+            try:
+                async with session.begin():
+                    await OrderService(session).create_order("u1", items)
+                return True
+            except ValueError:
+                return False
+
+    # the cold product only covers 3 of these; the other hot reservations must come back
+    results = await asyncio.gather(*(checkout([(1, 1), (2, 1)]) for _ in range(6)))
+    assert sum(results) == 3
+    assert inventory.available(1) == 7
+    assert await _stock(sessionmaker, 1) == 10  # not written yet
+
+    results = await asyncio.gather(*(checkout([(1, 2)]) for _ in range(6)))
+    assert sum(results) == 3
+    assert inventory.available(1) == 1
+
+    async with sessionmaker() as session:
+        assert await inventory.flush(session) == 6
+    assert await _stock(sessionmaker, 1) == 1
+    async with sessionmaker() as session:
+        assert await inventory.flush(session) == 0
+    assert await _stock(sessionmaker, 1) == 1
+
+
+async def test_recover_subtracts_lines_that_were_never_flushed(sessionmaker):
+    inventory = HotInventory([1])
+    async with sessionmaker() as session:
+        await inventory.recover(session)
+    install_hot_inventory(inventory)
+    async with sessionmaker() as session:
+        async with session.begin():
+            await OrderService(session).create_order("u1", [(1, 4)])
+
+    # simulate a crash before the flush: a fresh process rebuilds from the database
+    restarted = HotInventory([1])
+    async with sessionmaker() as session:
+        await restarted.recover(session)
+    assert restarted.available(1) == 6
+    async with sessionmaker() as session:
+        unapplied = await session.scalar(
+            select(func.count()).select_from(OrderItem).where(OrderItem.stock_applied.is_(False))
+        )
+    assert unapplied == 1
+
+
+async def test_rolled_back_savepoint_releases_only_its_reservation(sessionmaker):
+    inventory = HotInventory([1])
+    async with sessionmaker() as session:
+        await inventory.recover(session)
+    install_hot_inventory(inventory)
+
+    async with sessionmaker() as session:
+        async with session.begin():
+            service = OrderService(session)
+            await service.create_order("u1", [(1, 2)])
+            with pytest.raises(ValueError):
+                async with session.begin_nested():
+                    await service.create_order("u1", [(1, 3), (2, 5)])
+            assert inventory.available(1) == 8
+    assert inventory.available(1) == 8
+
+    async with sessionmaker() as session:
+        with pytest.raises(RuntimeError):
+            async with session.begin():
+                await OrderService(session).create_order("u1", [(1, 1)])
+                raise RuntimeError
+    assert inventory.available(1) == 8
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.idempotency.model import IdempotencyRecord
+from app.modules.idempotency.service import REPLAY_HEADER, IdempotencyService
+from app.modules.order.model import Order
+from app.modules.order.schemas import OrderCreateIn
+from app.modules.order.service import OrderService
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.db import BaseModel
+
+
+@pytest.fixture
+async def sessionmaker(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'shop.db'}", connect_args={"timeout": 30}
+    )
+
+    # pysqlite defers BEGIN to the first write, which would make the claim's SAVEPOINT the
+    # outermost transaction; emit BEGIN ourselves as the SQLAlchemy docs recommend
+    @event.listens_for(engine.sync_engine, "connect")
+    def _no_implicit_begin(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with maker() as s:
+        s.add(User(id="u1", name="a", email="a@x.io", password="x"))
+        s.add(Product(id=1, name="p", description="", price=5, stock=100))
+        await s.commit()
+    yield maker
+    await engine.dispose()
+
+
+def checkout(sessionmaker, key: str, quantity: int = 1, calls: list | None = None):
+    payload = OrderCreateIn(items=[{"product_id": 1, "quantity": quantity}])
+
+    async def run():
+        async with sessionmaker() as session:
+            async with session.begin():
+
+                async def handler():
+                    if calls is not None:
+                        calls.append(key)
+                    await asyncio.sleep(0.01)  # keep duplicates overlapping
+                    return await OrderService(session).create_order("u1", [(1, quantity)])
+
+                return await IdempotencyService(session).run(
+                    user_id="u1",
+                    scope="POST /orders",
+                    key=key,
+                    request=payload,
+                    handler=handler,
+                    status_code=201,
+                )
+
+    return run()
+
+
+async def count_orders(sessionmaker) -> int:
+    async with sessionmaker() as session:
+        return await session.scalar(select(func.count()).select_from(Order))
+
+
+async def test_retry_replays_the_stored_response(sessionmaker):
+    first = await checkout(sessionmaker, "k1")
+    replay = await checkout(sessionmaker, "k1")
+
+    assert isinstance(replay, JSONResponse)
+    assert replay.status_code == 201
+    assert replay.headers[REPLAY_HEADER] == "true"
+    assert replay.body == JSONResponse(first.model_dump(mode="json")).body
+    assert await count_orders(sessionmaker) == 1
+
+
+async def test_concurrent_duplicates_run_the_request_once(sessionmaker):
+    calls: list[str] = []
+    results = await asyncio.gather(*(checkout(sessionmaker, "k2", calls=calls) for _ in range(5)))
+
+    assert calls == ["k2"]
+    assert sum(isinstance(r, JSONResponse) for r in results) == 4
+    assert await count_orders(sessionmaker) == 1
+
+
+async def test_key_reused_with_another_body_is_rejected(sessionmaker):
+    await checkout(sessionmaker, "k3", quantity=1)
+    with pytest.raises(HTTPException) as exc:
+        await checkout(sessionmaker, "k3", quantity=2)
+    assert exc.value.status_code == 422
+
+
+async def test_failed_request_leaves_the_key_free(sessionmaker):
+    with pytest.raises(ValueError):
+        await checkout(sessionmaker, "k4", quantity=1000)
+    order = await checkout(sessionmaker, "k4", quantity=100)
+    assert not isinstance(order, JSONResponse)
+    assert await count_orders(sessionmaker) == 1
+
+
+async def test_expired_keys_are_purged(sessionmaker):
+    await checkout(sessionmaker, "k5")
+    async with sessionmaker() as session:
+        async with session.begin():
+            await session.execute(
+                update(IdempotencyRecord).values(
+                    expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+                )
+            )
+    async with sessionmaker() as session:
+        async with session.begin():
+            assert await IdempotencyService(session).purge_expired() == 1
+    assert await count_orders(sessionmaker) == 1
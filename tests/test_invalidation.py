@@ -0,0 +1,142 @@
+import asyncio
+
+from app.modules.order.service import OrderService
+from app.modules.product.cache import get_product_page_cache, invalidate_product_cache
+from app.modules.product.model import Product
+from app.modules.product.service import ProductService
+from app.modules.user.model import User
+from app.shared import invalidation
+from app.shared.invalidation import InvalidationListener, decode, encode
+
+
+def test_payloads_are_compact_and_collapse_large_topics(monkeypatch):
+    monkeypatch.setattr(invalidation.settings, "invalidation_max_keys", 3)
+    payloads = encode({"stock": {"3", "17"}, "product": {"*"}, "user": {"a", "b", "c", "d"}})
+    assert payloads == ["product:*;stock:17,3;user:*"]
+    assert decode(payloads[0]) == {"product": None, "stock": {"3", "17"}, "user": None}
+
+    monkeypatch.setattr(invalidation, "MAX_PAYLOAD_BYTES", 20)
+    assert encode({"stock": {"1", "2"}, "user": {"abcdefgh"}}) == ["stock:1,2", "user:abcdefgh"]
+
+
+async def test_commits_publish_what_they_changed_and_rollbacks_nothing(session, monkeypatch):
+    sent = []
+    monkeypatch.setattr(invalidation, "_send", lambda _session, payloads: sent.extend(payloads))
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add_all(Product(name=f"p{i}", description="", price=1, stock=5) for i in range(2))
+    await session.commit()
+    assert sent == ["product:*"]
+
+    sent.clear()
+    await OrderService(session).create_order("u1", [(1, 2), (2, 1)])
+    await session.commit()
+    assert sent == ["stock:1,2"]
+
+    sent.clear()
+    (await session.get(User, "u1")).name = "b"
+    await session.flush()
+    await session.rollback()
+    assert sent == []
+
+
+async def test_checkout_evicts_the_pages_listing_its_products_on_commit(session, monkeypatch):
+    monkeypatch.setattr(invalidation.settings, "invalidation_enabled", False)
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add_all(Product(name=f"p{i:02}", description="", price=1, stock=5) for i in range(20))
+    await session.commit()
+    invalidate_product_cache()
+    service = ProductService(session)
+    cache = get_product_page_cache(session.bind)
+    await service.list_products(page=1, page_size=10)
+    await service.list_products(page=2, page_size=10)
+
+    await OrderService(session).create_order("u1", [(15, 1)])
+    assert len(cache) == 2  # not before the commit
+    await session.commit()
+    assert [key[0] for key in cache.keys()] == [1]
+    assert (await service.list_products(page=2, page_size=10)).data[4].stock == 4
+
+
+async def test_listener_batches_notifications_and_flushes_everything_on_reconnect(
+    session, monkeypatch
+):
+    session.add_all(Product(name=f"p{i}", description="", price=1, stock=5) for i in range(30))
+    await session.commit()
+    invalidate_product_cache()
+    service = ProductService(session)
+    cache = get_product_page_cache(session.bind)
+
+    calls = []
+    monkeypatch.setitem(invalidation._handlers, "user", lambda keys: calls.append(keys))
+
+    class FakeConnection:
+        def __init__(self):
+            self.closed = False
+
+        def add_termination_listener(self, callback):
+            self.on_terminate = callback
+
+        async def add_listener(self, channel, callback):
+            self.notify = lambda payload: callback(self, 1, channel, payload)
+
+        async def execute(self, _query):
+            return None
+
+        def is_closed(self):
+            return self.closed
+
+        def terminate(self):
+            self.closed = True
+
+    connections = []
+
+    async def connect(_dsn):
+        if len(connections) == 1 and connections[0].closed:
+            connections.append(None)
+            raise OSError("connection refused")
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    listener = InvalidationListener(
+        "postgresql+asyncpg://u:p@db/shop", batch_seconds=0.01, check_seconds=5, connect=connect
+    )
+    monkeypatch.setattr(asyncio, "sleep", _fast_sleep(asyncio.sleep))
+    listener.start()
+    await _until(lambda: listener.connected)
+    assert listener.dsn == "postgresql://u:p@db/shop"
+    assert calls == [None]  # connected: whatever was cached before may be stale
+
+    # a stock change evicts only the page listing that product (p24 sorts onto page 2)
+    await service.list_products(page=1, page_size=10)
+    await service.list_products(page=2, page_size=10)
+    assert len(cache) == 2
+    calls.clear()
+    conn = connections[0]
+    conn.notify("user:a;stock:25")
+    conn.notify("user:b")
+    await _until(lambda: calls)
+    assert calls == [{"a", "b"}]
+    assert [key[0] for key in cache.keys()] == [1]
+
+    # dropped connection, one refused attempt, then a new connection flushes everything
+    calls.clear()
+    conn.closed = True
+    conn.on_terminate(conn)
+    await _until(lambda: len(connections) == 3 and listener.connected)
+    assert calls == [None]
+    assert len(cache) == 0
+    assert listener.reconnects == 2
+    await listener.stop()
+
+
+def _fast_sleep(sleep):
+    # skip the reconnect backoff
+    return lambda seconds: sleep(min(seconds, 0.01))
+
+
+async def _until(condition, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline
+        await asyncio.sleep(0.005)
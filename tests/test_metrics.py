@@ -0,0 +1,80 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.deps import get_current_user
+from app.main import create_app
+from app.modules.product.cache import invalidate_product_cache
+from app.modules.product.model import Product
+from app.shared import metrics
+from app.shared.config import settings
+from app.shared.db import get_session
+
+
+@pytest.fixture
+async def client(session, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enabled", True)
+    monkeypatch.setattr(metrics, "request_metrics", metrics.RequestMetrics())
+    session.add_all(Product(name=f"p{i}", description="", price=i, stock=5) for i in range(3))
+    await session.commit()
+    invalidate_product_cache()
+
+    app = create_app()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def _sample(text: str, name: str, **labels: str) -> float:
+    selector = ",".join(f'{k}="{re.escape(v)}"' for k, v in labels.items())
+    match = re.search(rf"^{name}{{{selector}}} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name}{{{selector}}} not exported"
+    return float(match.group(1))
+
+
+async def test_metrics_are_labelled_by_route_template(client):
+    await client.get("/products")
+    await client.get("/products")
+    await client.get("/orders/a")
+    await client.get("/orders/b")
+    await client.get("/no/such/path")
+
+    await client.get("/metrics")
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    assert _sample(text, "http_requests_total", method="GET", route="/products", status="200") == 2
+    assert (
+        _sample(text, "http_requests_total", method="GET", route="/orders/{order_id}", status="422")
+        == 2
+    )
+    assert (
+        _sample(text, "http_requests_total", method="GET", route="<unmatched>", status="404") == 1
+    )
+    assert (
+        _sample(text, "http_request_duration_seconds_count", method="GET", route="/products") == 2
+    )
+    assert _sample(text, "http_request_db_seconds_sum", method="GET", route="/products") > 0
+    # the scrape itself is in flight (labelled once its route has been seen)
+    assert _sample(text, "http_requests_in_flight", method="GET", route="/metrics") == 1
+    assert _sample(text, "http_requests_in_flight", method="GET", route="/products") == 0
+
+
+async def test_cache_counters_are_exported(client):
+    before = (await client.get("/metrics")).text
+    await client.get("/products")
+    await client.get("/products")
+    after = (await client.get("/metrics")).text
+
+    def delta(**labels: str) -> float:
+        return _sample(after, "cache_lookups_total", **labels) - _sample(
+            before, "cache_lookups_total", **labels
+        )
+
+    assert delta(cache="product_pages", result="miss") == 1
+    assert delta(cache="product_pages", result="hit") == 1
+    assert _sample(after, "cache_entries", cache="product_pages") >= 1
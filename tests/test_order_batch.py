@@ -0,0 +1,57 @@
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.modules.order.service import OrderService
+from app.modules.product.model import Product
+from app.modules.user.model import User
+
+
+async def setup(session) -> tuple[int, int]:
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    a = Product(name="a", description="", price=2, stock=3)
+    b = Product(name="b", description="", price=5, stock=100)
+    session.add_all([a, b])
+    await session.commit()
+    return a.id, b.id
+
+
+async def stock(session) -> list[int]:
+    return list((await session.execute(select(Product.stock).order_by(Product.id))).scalars())
+
+
+async def test_per_order_batch_skips_only_the_invalid_orders(session):
+    a, b = await setup(session)
+    batch = [[(a, 2), (b, 1)], [(a, 2)], [(999, 1)], [(a, 1), (b, 4), (b, 1)]]
+
+    result = await OrderService(session).create_orders("u1", batch)
+
+    assert (result.created, result.failed) == (2, 2)
+    assert [r.error is None for r in result.results] == [True, False, False, True]
+    assert result.results[3].order.subtotal == 2 + 5 * 5
+    assert await stock(session) == [0, 94]
+
+
+async def test_atomic_batch_writes_nothing_when_one_order_fails(session):
+    a, b = await setup(session)
+
+    result = await OrderService(session).create_orders("u1", [[(b, 1)], [(a, 4)]], atomic=True)
+
+    assert (result.created, result.failed) == (0, 2)
+    assert await stock(session) == [3, 100]
+
+
+async def test_failed_bulk_write_falls_back_to_one_savepoint_per_order(session, monkeypatch):
+    a, b = await setup(session)
+    service = OrderService(session)
+    insert_orders = service._insert_orders
+
+    async def flaky_insert(user_id, orders, *args):
+        if len(orders) > 1:
+            raise SQLAlchemyError("boom")
+        return await insert_orders(user_id, orders, *args)
+
+    monkeypatch.setattr(service, "_insert_orders", flaky_insert)
+    result = await service.create_orders("u1", [[(a, 1)], [(b, 2)]])
+
+    assert result.created == 2
+    assert await stock(session) == [2, 98]
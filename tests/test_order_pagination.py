@@ -0,0 +1,51 @@
+from app.modules.order.model import Order
+from app.modules.order.service import OrderService
+from app.modules.user.model import User
+
+
+async def test_cursor_walk_matches_page_walk(session):
+    session.add_all(
+        [
+            User(id="u1", name="a", email="a@x.io", password="x"),
+            User(id="u2", name="b", email="b@x.io", password="x"),
+        ]
+    )
+    session.add_all(Order(user_id="u1" if i % 3 else "u2", subtotal=0) for i in range(40))
+    await session.commit()
+    service = OrderService(session)
+
+    by_page = []
+    for page in range(1, 5):
+        by_page += [o.id for o in (await service.list_orders("u1", page, 8)).data]
+
+    res = await service.list_orders("u1", page_size=8)
+    by_cursor = [o.id for o in res.data]
+    while res.meta.next_cursor:
+        res = await service.list_orders("u1", page_size=8, cursor=res.meta.next_cursor)
+        by_cursor += [o.id for o in res.data]
+
+    assert by_cursor == by_page == sorted(by_page, reverse=True)
+    assert len(by_cursor) == 26
+
+
+async def test_count_strategies(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add_all(Order(user_id="u1", subtotal=0) for _ in range(5))
+    await session.commit()
+    service = OrderService(session)
+
+    res = await service.list_orders("u1", page=1, page_size=2, count="none")
+    assert (res.meta.total, res.meta.pages, res.meta.has_next) == (None, None, True)
+    res = await service.list_orders("u1", page=3, page_size=2, count="none")
+    assert len(res.data) == 1 and not res.meta.has_next
+
+    first = await service.list_orders("u1", page_size=2, count="cached")
+    session.add(Order(user_id="u1", subtotal=0))
+    await session.commit()
+    again = await service.list_orders("u1", page_size=2, count="cached")
+    assert (first.meta.total, first.meta.total_exact) == (5, True)
+    assert (again.meta.total, again.meta.total_exact) == (5, False)
+
+    # per-user listings are filtered, so "estimated" falls back to the cached count
+    res = await service.list_orders("u1", page_size=2, count="estimated")
+    assert res.meta.total == 5
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from app.modules.order.model import Order, OrderItem, OrderStatus
+from app.modules.order.partitions import (
+    EPOCH,
+    archive_partition,
+    hot_since,
+    live_partition,
+    live_partition_start,
+    month_start,
+    refresh_horizon,
+)
+from app.modules.order.service import OrderService
+from app.modules.user.model import User
+from app.shared.profiler import profile_queries
+
+UTC = timezone.utc
+
+
+def test_partition_names_and_bounds(monkeypatch):
+    new_year = datetime(2026, 1, 1, tzinfo=UTC)
+    assert month_start(datetime(2025, 12, 31, 23, tzinfo=UTC), 1) == new_year
+    assert month_start(datetime(2026, 1, 5, tzinfo=UTC), -13) == datetime(2024, 12, 1, tzinfo=UTC)
+
+    name, start, end = live_partition("order_items", datetime(2026, 2, 1, tzinfo=UTC))
+    assert (name, end) == ("order_items_live_2026_02", datetime(2026, 3, 1, tzinfo=UTC))
+    assert live_partition_start(name) == start
+    assert live_partition_start("orders_live_default") is None
+    assert archive_partition("orders", 2025)[0] == "orders_archive_2025"
+
+    # the hot months include the current one; a month only counts an hour after it began
+    monkeypatch.setattr("app.shared.config.settings.order_hot_months", 2)
+    assert hot_since(datetime(2026, 10, 18, tzinfo=UTC)) == datetime(2026, 9, 1, tzinfo=UTC)
+    assert hot_since(datetime(2026, 10, 1, 0, 30, tzinfo=UTC)) == datetime(2026, 8, 1, tzinfo=UTC)
+
+
+async def test_lookups_and_history_stay_exact_across_the_horizon(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    old = datetime.now(UTC) - timedelta(days=400)
+    # ids 1-5 are old except id 4, which a long transaction committed late
+    session.add_all(Order(id=i, user_id="u1", subtotal=0, created_at=old) for i in (1, 2, 3, 5))
+    session.add(Order(id=4, user_id="u1", subtotal=0))
+    await session.commit()
+    session.add_all(Order(user_id="u1", subtotal=0) for _ in range(3))
+    await session.commit()
+
+    horizon = await refresh_horizon(session)
+    assert horizon.last_old_id == 5
+    assert (horizon.since_for(6), horizon.since_for(4)) == (horizon.since, EPOCH)
+
+    service = OrderService(session)
+    for page_size in (2, 3, 4, 10):
+        by_page = []
+        for page in range(1, (8 + page_size - 1) // page_size + 1):
+            by_page += [o.id for o in (await service.list_orders("u1", page, page_size)).data]
+        res = await service.list_orders("u1", page_size=page_size)
+        by_cursor = [o.id for o in res.data]
+        while res.meta.next_cursor:
+            res = await service.list_orders("u1", page_size=page_size, cursor=res.meta.next_cursor)
+            by_cursor += [o.id for o in res.data]
+        assert by_page == by_cursor == [8, 7, 6, 5, 4, 3, 2, 1]
+
+    for order_id in range(1, 9):
+        assert (await service.get_order(order_id, "u1")).id == order_id
+        assert await service.order_version(order_id, "u1") is not None
+
+
+async def test_item_loads_are_bounded_by_the_orders_created_at(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add(
+        Order(
+            id=1,
+            user_id="u1",
+            subtotal=0,
+            items=[OrderItem(product_id=1, unit_price=1, quantity=1)],
+        )
+    )
+    await session.commit()
+    session.expunge_all()
+
+    with profile_queries() as profile:
+        order = await OrderService(session).get_order(1, "u1")
+    assert len(order.items) == 1
+    (items_query,) = [q for q in profile.queries if "FROM order_items" in q.shape]
+    # the partition key is bound, so PostgreSQL prunes the item partitions
+    assert "(order_items.order_id, order_items.created_at) IN" in items_query.shape
+
+
+async def test_status_update_is_bounded_by_the_partition_key(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add(Order(id=1, user_id="u1", subtotal=0))
+    await session.commit()
+    session.expunge_all()
+
+    service = OrderService(session)
+    with profile_queries() as profile:
+        changed = await service.update_order_status("u1", 1, OrderStatus.COMPLETED)
+    assert changed.status == OrderStatus.COMPLETED
+    (statement,) = [q.shape for q in profile.queries if q.shape.startswith("UPDATE orders")]
+    assert "orders.archived = ? AND orders.created_at = ?" in statement
+    assert "updated_at=" in statement  # still bumps the ETag input
+
+    await session.commit()
+    session.expunge_all()
+    assert (await service.get_order(1, "u1")).status == OrderStatus.COMPLETED
@@ -0,0 +1,60 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.main import create_app
+from app.shared import pool
+from app.shared.config import settings
+
+
+@pytest.fixture
+async def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool, "_engines", {})
+    pool_class = type(
+        "InstrumentedQueuePool",
+        (pool.InstrumentedQueuePool,),
+        {"stats": pool.PoolStats(), "pool_name": "test"},
+    )
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=pool_class,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    pool.register_pool("test", engine)
+    yield engine
+    await engine.dispose()
+
+
+async def test_pool_counts_checkouts_waits_and_timeouts(engine, caplog):
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+        with pytest.raises(exc.TimeoutError):
+            async with engine.connect():
+                pass
+        snapshot = pool.pool_snapshot()["test"]
+        assert snapshot["checked_out"] == 1
+        assert snapshot["timeouts"] == 1
+    assert "Timed out after" in caplog.text
+
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+
+    snapshot = pool.pool_snapshot()["test"]
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 2
+    assert snapshot["wait_seconds_buckets"]["+Inf"] == 2
+    assert snapshot["size"] == 1
+
+
+async def test_internal_pool_endpoint_is_opt_in(engine, monkeypatch):
+    async with AsyncClient(transport=ASGITransport(app=create_app()), base_url="http://t") as ac:
+        assert (await ac.get("/internal/pool")).status_code == 404
+
+    monkeypatch.setattr(settings, "internal_routes_enabled", True)
+    async with AsyncClient(transport=ASGITransport(app=create_app()), base_url="http://t") as ac:
+        response = await ac.get("/internal/pool")
+    assert response.status_code == 200
+    assert response.json()["test"]["pool"] == "InstrumentedQueuePool"
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+
+from app.modules.product.model import Product
+from app.modules.product.service import ProductService
+
+
+@pytest.fixture
+async def products(session):
+    # duplicate names/prices so the id tiebreaker matters
+    session.add_all(
+        Product(name=f"p{i % 7}", description="", price=float(i % 5), stock=1) for i in range(53)
+    )
+    await session.commit()
+
+
+@pytest.mark.parametrize("sort", ["name", "price"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_cursor_walk_matches_page_walk(session, products, sort, order):
+    service = ProductService(session)
+
+    by_page = []
+    for page in range(1, 7):
+        res = await service.list_products(page=page, page_size=10, sort=sort, order=order)
+        by_page += [p.id for p in res.data]
+
+    first = await service.list_products(page_size=10, sort=sort, order=order)
+    by_cursor = [p.id for p in first.data]
+    cursor = first.meta.next_cursor
+    while cursor:
+        res = await service.list_products(page_size=10, sort=sort, order=order, cursor=cursor)
+        assert res.meta.total is None
+        by_cursor += [p.id for p in res.data]
+        cursor = res.meta.next_cursor
+
+    assert by_cursor == by_page
+    assert len(set(by_cursor)) == 53
+
+
+async def test_cursor_rejects_mismatched_sort(session, products):
+    service = ProductService(session)
+    first = await service.list_products(page_size=10, sort="name")
+    with pytest.raises(HTTPException) as exc:
+        await service.list_products(page_size=10, sort="price", cursor=first.meta.next_cursor)
+    assert exc.value.status_code == 400
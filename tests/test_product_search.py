@@ -0,0 +1,28 @@
+from app.modules.product.model import Product
+from app.modules.product.service import ProductService
+
+
+async def test_search_matches_name_and_description_and_ranks(session):
+    session.add_all(
+        [
+            Product(name="Red Keyboard", description="mechanical", price=10, stock=1),
+            Product(name="Mouse", description="pairs well with a keyboard", price=5, stock=1),
+            Product(name="Monitor", description="27 inch", price=99, stock=1),
+            Product(name="Keyboard", description="plain", price=7, stock=1),
+        ]
+    )
+    await session.commit()
+    service = ProductService(session)
+
+    res = await service.list_products(q="KEYB", sort="price")
+    assert [p.name for p in res.data] == ["Mouse", "Keyboard", "Red Keyboard"]
+    assert res.meta.total == 3
+
+    res = await service.list_products(q="keyboard", sort="relevance")
+    assert [p.name for p in res.data][-1] == "Mouse"
+    assert res.meta.next_cursor is None
+
+    session.add(Product(name="Keyboard Cover", description="", price=3, stock=1))
+    await session.commit()  # invalidates the page cache and the search index
+    assert (await service.list_products(q="keyboard")).meta.total == 4
+    assert (await service.list_products(q="zz")).meta.total == 0
@@ -0,0 +1,81 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app.api.deps import get_current_user
+from app.main import create_app
+from app.modules.product.cache import invalidate_product_cache
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.config import settings
+from app.shared.db import get_session, get_transaction_session
+from app.shared.profiler import HEADER, normalize_sql, profile_queries
+
+
+@pytest.fixture
+async def client(session):
+    session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+    session.add_all(Product(name=f"p{i}", description="", price=i + 1, stock=50) for i in range(5))
+    await session.commit()
+    invalidate_product_cache()
+
+    app = create_app()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_transaction_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="u1")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+async def test_order_endpoints_stay_within_their_query_budgets(client):
+    items = [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 2}]
+    with profile_queries() as profile:
+        created = await client.post("/orders", json={"items": items})
+    assert created.status_code == 201
+    profile.assert_budget(3)  # stock UPDATE, order INSERT, items INSERT
+
+    order_id = created.json()["id"]
+    with profile_queries() as profile:
+        assert (await client.get(f"/orders/{order_id}")).status_code == 200
+    profile.assert_budget(3)  # version, order, items
+    assert [q.rows for q in profile.queries] == [1, 1, 2]
+
+    with profile_queries() as profile:
+        response = await client.patch(f"/orders/{order_id}/status", json={"status": "COMPLETED"})
+    assert response.status_code == 200
+    profile.assert_budget(3)  # order, items, UPDATE
+
+    with profile_queries() as profile:
+        assert (await client.get("/products")).status_code == 200
+    profile.assert_budget(3)  # count, page, validator (seeds its cache)
+
+
+async def test_repeated_statement_shapes_are_flagged(session):
+    with profile_queries() as profile:
+        for product_id in range(1, 7):
+            await session.scalar(select(Product).where(Product.id == product_id))
+    assert profile.repeated() == {profile.queries[0].shape: 6}
+    assert normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'") == (
+        "SELECT * FROM t WHERE id IN (...) AND name = ?"
+    )
+
+
+async def test_middleware_reports_summary_header_and_logs_budget_overruns(
+    session, monkeypatch, caplog
+):
+    monkeypatch.setattr(settings, "sql_profiling", True)
+    monkeypatch.setattr(settings, "debug", True)
+    monkeypatch.setattr(settings, "sql_query_budget", 1)
+    invalidate_product_cache()
+    app = create_app()
+    app.dependency_overrides[get_session] = lambda: session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        with caplog.at_level(logging.WARNING, logger="app.shared.profiler"):
+            response = await ac.get("/products")
+
+    assert response.headers[HEADER].startswith("queries=3;")
+    assert "GET /products ran 3 statements" in caplog.text
+    assert "over budget (3 > 1)" in caplog.text
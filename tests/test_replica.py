@@ -0,0 +1,131 @@
+import contextvars
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.main import create_app
+from app.modules.product.model import Product
+from app.shared import replica
+from app.shared.cache import TTLCache
+from app.shared.config import settings
+from app.shared.db import BaseModel, get_primary_session, get_session
+
+
+async def _database(path, product_name):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(Product(name=product_name, description="", price=1, stock=1))
+        await session.commit()
+    return engine
+
+
+@pytest.fixture
+async def databases(tmp_path, monkeypatch):
+    # two databases that never sync, so every read shows where it was routed
+    primary = await _database(tmp_path / "primary.db", "on-primary")
+    secondary = await _database(tmp_path / "replica.db", "on-replica")
+    replicas = replica.ReplicaSet([secondary], max_lag=5.0)
+    monkeypatch.setattr(replica, "_replicas", replicas)
+    monkeypatch.setattr(replica, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(replica, "_request_user", contextvars.ContextVar("user", default=None))
+    reads = async_sessionmaker(
+        primary, class_=AsyncSession, sync_session_class=replica.RoutingSession
+    )
+    writes = async_sessionmaker(primary, class_=AsyncSession)
+    yield reads, writes, replicas
+    await primary.dispose()
+    await secondary.dispose()
+
+
+def _sessions(factory):
+    async def dependency():
+        async with factory() as session:
+            yield session
+
+    return dependency
+
+
+async def _names(session):
+    return set(await session.scalars(select(Product.name)))
+
+
+async def test_reads_use_the_replica_until_the_session_writes(databases):
+    reads, _, _ = databases
+    async with reads() as session:
+        assert "on-replica" in await _names(session)
+        session.add(Product(name="new", description="", price=1, stock=1))
+        await session.flush()
+        assert await _names(session) == {"on-primary", "new"}
+        await session.commit()
+
+    async with reads() as session:
+        assert "new" not in await _names(session)
+
+
+async def test_user_reads_from_primary_after_committing_a_write(databases):
+    reads, writes, _ = databases
+    replica.set_request_user("writer")
+    async with writes() as session:
+        session.add(Product(name="mine", description="", price=1, stock=1))
+        await session.commit()
+
+    async with reads() as session:
+        assert "mine" in await _names(session)
+
+    replica.set_request_user("someone-else")
+    async with reads() as session:
+        assert await _names(session) == {"on-replica"}
+
+
+async def test_unhealthy_or_lagging_replica_falls_back_to_primary(databases, monkeypatch):
+    reads, _, replicas = databases
+    monkeypatch.setitem(replica._LAG_QUERIES, "sqlite", text("SELECT 30"))
+    await replicas.check()
+    async with reads() as session:
+        assert await _names(session) == {"on-primary"}
+
+    monkeypatch.setitem(replica._LAG_QUERIES, "sqlite", text("SELECT 0"))
+    await replicas.check()
+    async with reads() as session:
+        assert await _names(session) == {"on-replica"}
+
+
+async def test_register_then_login_do_not_depend_on_a_lagging_replica(databases, monkeypatch):
+    reads, writes, _ = databases
+    monkeypatch.setattr(settings, "password_hash_executor", "inline")
+
+    app = create_app()
+    app.dependency_overrides[get_session] = _sessions(reads)
+    app.dependency_overrides[get_primary_session] = _sessions(writes)
+    body = {"name": "Ann", "email": "ann@x.io", "password": "s3cret-pass"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post("/auth/register", json=body)).status_code == 201
+        # the replica never receives the user: both must still read the primary
+        assert (await client.post("/auth/register", json=body)).status_code == 400
+        login = await client.post("/auth/login", json={k: body[k] for k in ("email", "password")})
+        assert login.status_code == 200
+
+
+async def test_a_new_user_is_found_even_before_the_replica_has_their_row(databases, monkeypatch):
+    reads, writes, _ = databases
+    monkeypatch.setattr(settings, "password_hash_executor", "inline")
+
+    app = create_app()
+    app.dependency_overrides[get_session] = _sessions(reads)
+    app.dependency_overrides[get_primary_session] = _sessions(writes)
+    body = {"name": "Bo", "email": "bo@x.io", "password": "s3cret-pass"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        registered = await client.post("/auth/register", json=body)
+        assert replica.reads_from_primary(registered.json()["id"])
+        login = await client.post("/auth/login", json={k: body[k] for k in ("email", "password")})
+        token = login.json()["access_token"]
+
+        # another worker never saw the registration: the replica miss is retried on the primary
+        monkeypatch.setattr(replica, "_recent_writers", TTLCache(maxsize=100, ttl=60))
+        me = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert me.status_code == 200
+        assert me.json()["email"] == "bo@x.io"
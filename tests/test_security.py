@@ -0,0 +1,26 @@
+import pytest
+from fastapi import HTTPException
+
+from app.shared import security
+from app.shared.config import settings
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_executor", "thread")
+    monkeypatch.setattr(settings, "password_hash_workers", 2)
+    yield
+    security.shutdown_password_executor()
+
+
+async def test_hash_and_verify_off_loop(thread_pool):
+    hashed = await security.hash_password_async("correct horse")
+    assert await security.verify_password_async("correct horse", hashed)
+    assert not await security.verify_password_async("wrong horse", hashed)
+
+
+async def test_saturated_pool_rejects_with_503(thread_pool, monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    with pytest.raises(HTTPException) as exc:
+        await security.hash_password_async("correct horse")
+    assert exc.value.status_code == 503
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.order.model import Order
+from app.modules.order.service import OrderService
+from app.modules.product.model import Product
+from app.modules.user.model import User
+from app.shared.db import BaseModel
+
+
+@pytest.fixture
+async def sessionmaker(tmp_path):
+    # a file database so every checkout gets its own connection and transaction
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'shop.db'}", connect_args={"timeout": 30}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def test_concurrent_checkouts_of_a_hot_product_never_oversell(sessionmaker):
+    async with sessionmaker() as session:
+        session.add(User(id="u1", name="a", email="a@x.io", password="x"))
+        hot = Product(name="hot", description="", price=5, stock=10)
+        cold = Product(name="cold", description="", price=1, stock=1000)
+        session.add_all([hot, cold])
+        await session.commit()
+
+    async def checkout(qty: int) -> bool:
+        async with sessionmaker() as session:
+            try:
+                async with session.begin():
+                    await OrderService(session).create_order("u1", [(cold.id, 1), (hot.id, qty)])
+                return True
+            except ValueError:
+                return False
+
+    results = await asyncio.gather(*(checkout(1 + i % 2) for i in range(30)))
+
+    async with sessionmaker() as session:
+        hot_stock, cold_stock = (
+            await session.execute(select(Product.stock).order_by(Product.id))
+        ).scalars()
+        orders = await session.scalar(select(func.count()).select_from(Order))
+    assert hot_stock >= 0
+    assert orders == sum(results)
+    # failed checkouts rolled back their reservation of the cold product too
+    assert cold_stock == 1000 - orders
+    assert 10 - hot_stock == sum(1 + i % 2 for i, ok in enumerate(results) if ok)